@@ -2,13 +2,13 @@
 # app.py (Streamlit frontend)
 # ----------------------------------
 import streamlit as st
-import requests
 import pandas as pd
+import os
 import time
 import uuid
-import plotly.express as px
 from io import BytesIO
-from zipfile import ZipFile
+import hashtags
+import profiling
 
 
 # -------------------------------
@@ -18,6 +18,8 @@ REPO = "aprakashaditya373-sudo/instagram-scraper-streamlit"
 WORKFLOW_ID = "scraper.yml"
 GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
 ARTIFACT_NAME = "scraped_data"  # fallback name
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LIVE_REFRESH_SECONDS = 2
 
 # -------------------------------
 # Dashboard Title
@@ -43,6 +45,25 @@ username = st.text_input(
     placeholder="Enter your Name"
 )
 
+# -------------------------------
+# Warm-start: preload sentiment model in the background
+# -------------------------------
+@st.cache_resource(show_spinner=False)
+def start_sentiment_warmup():
+    # Runs once per server process; the form above is already rendered.
+    import sentiment_model
+    return sentiment_model.warm_up()
+
+start_sentiment_warmup()
+
+
+@st.cache_resource(show_spinner=False)
+def get_rollup_store():
+    # One SQLite connection per server process; buckets persist across reports
+    import rollups
+    return rollups.RollupStore()
+
+
 # -------------------------------
 # Helper: Indian number format
 # -------------------------------
@@ -64,46 +85,145 @@ def format_indian_number(number):
     return ','.join(reversed(parts)) + ',' + last3
 
 # -------------------------------
-# Function to fetch artifact CSV
+# Comment counts weighted by near-duplicate cluster size
 # -------------------------------
-def fetch_artifact_csv(repo, token, artifact_name=ARTIFACT_NAME):
-    headers = {"Authorization": f"Bearer {token}"}
-
-    # Wait for artifact to appear (max 2 mins)
-    artifact_found = False
-    for _ in range(6000):
-        artifacts = requests.get(f"https://api.github.com/repos/{repo}/actions/artifacts", headers=headers).json().get("artifacts", [])
-        if any(a["name"] == artifact_name for a in artifacts):
-            artifact_found = True
-            break
-        time.sleep(6)
-
-    if not artifact_found:
-        # st.error(f"❌ Artifact {artifact_name} not found yet. Try again in a few seconds.")
-        st.error(f"❌ Dataset not found yet. Try again in a few seconds.")
-        st.stop()
+def comment_weights(frame):
+    # Collapsed rows stand for Cluster_size original comments
+    weights = frame["Cluster_size"].fillna(1) if "Cluster_size" in frame.columns else pd.Series(1, index=frame.index)
+    return weights.where(frame["Comments"].notna(), 0)
+
+
+def comment_total(frame):
+    return int(comment_weights(frame).sum())
+
+
+def sentiment_shares(frame):
+    weights = comment_weights(frame)
+    if weights.sum() == 0 or "Sentiment_label" not in frame.columns:
+        return pd.Series(dtype=float)
+    labels = frame["Sentiment_label"].astype(str).str.strip().str.title()
+    return weights.groupby(labels, observed=True).sum() / weights.sum() * 100
+
+# -------------------------------
+# Figures cached by the (pre-aggregated) data they are drawn from
+# -------------------------------
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_figure(kind, data, **options):
+    import charts
+    return getattr(charts, kind)(data, **options)
+
+# -------------------------------
+# Sharded workflow dispatcher
+# -------------------------------
+def get_dispatcher():
+    import dispatch
+    api = dispatch.GitHubActions(REPO, GITHUB_TOKEN)
+    return dispatch.ShardedDispatcher(api, workflow_id=WORKFLOW_ID)
+
+# -------------------------------
+# Local scrape with live results: scraper.py runs as a subprocess and
+# publishes each post to a JSONL sink that the live panel tails
+# -------------------------------
+def start_live_scrape(profiles, start_date, end_date, username, artifact_name):
+    import subprocess
+    import sys
+    import live_sink
+
+    sink_path = os.path.join(APP_DIR, live_sink.LIVE_DIR, f"{artifact_name}.jsonl")
+    env = dict(os.environ, **{live_sink.LIVE_SINK_ENV: sink_path})
+    env.setdefault("SCRAPER_HEADLESS", "1")
+    # Own process group, so stopping it also takes down chromedriver and Chrome
+    process = subprocess.Popen(
+        [sys.executable, "scraper.py", ",".join(profiles), str(start_date), str(end_date), username, artifact_name],
+        cwd=APP_DIR, env=env, start_new_session=(os.name != "nt"),
+    )
+    return {
+        "process": process, "tail": live_sink.LiveTail(sink_path), "frame": pd.DataFrame(),
+        "posts": 0, "started": time.time(), "first_insight": None, "finished": False,
+        "stopped": False, "artifact_name": artifact_name,
+    }
+
+
+def live_running(live):
+    return live is not None and not live["finished"] and live["process"].poll() is None
+
+
+def stop_live_scrape(live):
+    # Kills a local scrape that is still running (scraper.py and its browser)
+    import subprocess
+
+    process = live["process"]
+    if process.poll() is None:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+        else:
+            import signal
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        live["stopped"] = True
+    live["finished"] = True
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_panel():
+    # Reruns on its own every few seconds; scores only the comments that arrived since the last tick
+    import charts
+    import sentiment_model
+    from metrics import REGISTRY
+
+    live = st.session_state.get("live")
+    if live is None or live["finished"]:
+        return
+    records = live["tail"].poll()
+    rows = [row for record in records for row in record["rows"]]
+    live["posts"] += len(records)
+    if rows:
+        batch = pd.DataFrame(rows)
+        if batch["Comments"].notna().any():
+            batch = sentiment_model.analyze_comments(batch, column="Comments")
+        live["frame"] = pd.concat([live["frame"], batch], ignore_index=True)
+        if live["first_insight"] is None:
+            live["first_insight"] = time.time() - live["started"]
+            REGISTRY.gauge("live_first_insight_seconds", "Scrape start to first scored comment").set(round(live["first_insight"], 2))
+    frame = live["frame"]
+
+    st.markdown("## ⚡ Live Results")
+    lcol1, lcol2, lcol3 = st.columns([1, 1, 1])
+    with lcol1:
+        st.write(f"📄 **Posts scraped:** {format_indian_number(live['posts'])}")
+    with lcol2:
+        st.write(f"💬 **Comments scored:** {format_indian_number(comment_total(frame) if not frame.empty else 0)}")
+    with lcol3:
+        st.write(f"⏱️ **Elapsed:** {time.time() - live['started']:.0f}s")
+    if live["first_insight"] is not None:
+        st.caption(f"First insight {live['first_insight']:.1f}s after the scrape started")
+
+    if not frame.empty and "Sentiment_label" in frame.columns:
+        col_live_sent, col_live_users = st.columns([1, 1.5])
+        with col_live_sent:
+            st.plotly_chart(charts.sentiment_bar(sentiment_shares(frame), title="Live Sentiment"), use_container_width=True)
+        with col_live_users:
+            by_user = charts.sentiment_by(frame, "username", comment_weights(frame))
+            if not by_user.empty:
+                st.plotly_chart(charts.sentiment_multiples(by_user, "username", title="Live Sentiment by Profile"),
+                                use_container_width=True)
+        live_cols = [c for c in ["username", "Post_Number", "Comments", "Sentiment_label", "Confidence_score"] if c in frame.columns]
+        st.dataframe(frame[live_cols].tail(20).iloc[::-1], use_container_width=True)
+    else:
+        st.info("⏳ Waiting for the first post...")
 
-    # Download artifact
-    r = requests.get(f"https://api.github.com/repos/{repo}/actions/artifacts", headers=headers)
-    artifacts = r.json().get("artifacts", [])
-    artifact = next((a for a in artifacts if a["name"] == artifact_name), None)
-    if not artifact:
-        # st.error(f"❌ Artifact {artifact_name} not found.")
-        st.error(f"❌ Dataset not found.")
-        return None
-
-    download_url = artifact["archive_download_url"]
-    r = requests.get(download_url, headers=headers)
-    if r.status_code != 200:
-        # st.error("❌ Failed to download artifact.")
-        st.error("❌ Failed to download Dataset.")
-        return None
-
-    zipfile = ZipFile(BytesIO(r.content))
-    csv_filename = zipfile.namelist()[0]
-    with zipfile.open(csv_filename) as f:
-        df = pd.read_csv(f)
-    return df
+    exit_code = live["process"].poll()
+    if (live["tail"].finished or exit_code is not None) and not records:
+        live["finished"] = True
+        st.session_state["scrape_done"] = exit_code in (None, 0)
+        st.rerun()  # full rerun: the panel is no longer rendered, so its timer stops
 
 # -------------------------------
 # SCRAPE BUTTON
@@ -116,6 +236,11 @@ with col_scrape:
 with col_report:
     report_clicked = st.button("📊 Get Report")
 
+# Opt-in: profiles the next report (download -> scoring -> rendering)
+profile_report = st.checkbox("🔬 Profile report pipeline", value=profiling.ENABLED)
+# Runs scraper.py on this machine instead of GitHub Actions and streams posts in as they are scraped
+live_local = st.checkbox("⚡ Scrape locally with live results")
+
 # -------------------------------
 # SCRAPE LOGIC
 # -------------------------------
@@ -123,495 +248,450 @@ if scrape_clicked:
     if not profile_url or not username:
         st.warning("⚠️ Please fill all fields before scraping.")
         st.stop()
+    # Two scrapers at once would share the same account (and orphan the first sink)
+    if live_running(st.session_state.get("live")):
+        st.warning("⚠️ A local scrape is still running. Stop it before starting another.")
+        st.stop()
+    if st.session_state.get("live") is not None:
+        stop_live_scrape(st.session_state.pop("live"))
 
-    # Unique artifact per user/session: username + short UUID
+    # Unique artifact prefix per user/session: username + short UUID
     unique_id = uuid.uuid4().hex[:6]
     st.session_state["artifact_name"] = f"scraped_data_{username}_{unique_id}"
 
-    # st.info(f"🚀 Triggering scraper workflow for artifact: `{st.session_state['artifact_name']}`")
-    st.info(f"🚀 Scraping Started")
+    profiles = [p.strip() for p in profile_url.replace("\n", ",").split(",") if p.strip()]
 
-    headers = {
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-    }
+    if live_local:
+        st.session_state["live"] = start_live_scrape(
+            profiles, start_date, end_date, username, st.session_state["artifact_name"]
+        )
+        st.session_state["scrape_done"] = False
+        st.info("⚡ Scraping locally: results stream in below as each post is scraped")
+    else:
+        # st.info(f"🚀 Triggering scraper workflow for artifact: `{st.session_state['artifact_name']}`")
+        st.info(f"🚀 Scraping Started")
+
+        # Profiles are split across parallel workflow runs; each run is found by
+        # its own correlation ID, so concurrent users never pick up each other's runs
+        dispatcher = get_dispatcher()
+        try:
+            shards = dispatcher.dispatch(profiles, start_date, end_date, username, st.session_state["artifact_name"])
+        except Exception as e:
+            st.error(f"❌ Failed to trigger workflow: {e}")
+            st.stop()
+        st.session_state["shards"] = shards
+
+        # st.info("⏳ Waiting for workflow to complete (up to 5 mins)...")
+        st.info(f"⏳ Waiting for scraping to complete ({len(shards)} parallel runs)...")
+        progress = st.progress(0.0)
+
+        def show_progress(shards):
+            finished = sum(s.done for s in shards)
+            progress.progress(finished / len(shards), text=f"{finished}/{len(shards)} runs finished")
+
+        workflow_completed = dispatcher.wait(shards, on_progress=show_progress)
+
+        if workflow_completed:
+            failed = [s for s in shards if s.conclusion != "success"]
+            if failed:
+                st.warning(f"⚠️ {len(failed)} of {len(shards)} runs did not succeed; the report will be partial.")
+            # st.success("🔄 Scraping in progress...")
+            st.success("🔄 Scraping in progress... Click **Get Report**")
+            st.session_state["scrape_done"] = True
+        else:
+            st.error("❌ Workflow timed out.")
+            st.session_state["scrape_done"] = False
+
+# Live panel while a local scrape runs (reruns itself every LIVE_REFRESH_SECONDS)
+live_state = st.session_state.get("live")
+if live_state is not None:
+    if not live_state["finished"]:
+        if st.button("⏹️ Stop local scrape"):
+            stop_live_scrape(live_state)
+            st.session_state["scrape_done"] = False
+            st.rerun()
+        live_panel()
+    elif live_state["stopped"]:
+        st.warning(f"⏹️ Local scrape stopped after {live_state['posts']} posts.")
+    elif st.session_state.get("scrape_done"):
+        st.success(f"✅ Local scrape finished ({live_state['posts']} posts). Click **Get Report**")
+    else:
+        st.error("❌ Local scraper exited with an error; check the console output.")
 
-    payload = {
-        "ref": "main",
-        "inputs": {
-            "profile_url": ",".join([p.strip() for p in profile_url.replace("\n", ",").split(",") if p.strip()]),
-            "start_date": str(start_date),
-            "end_date": str(end_date),
-            "username": username,
-            "artifact_name": st.session_state["artifact_name"],
-        },
-    }
+# The report and render steps share one try: a profiled run that does not
+# reach finish_run() at the end of the render (st.stop, exception) is dropped
+try:
+    # -------------------------------
+    # REPORT LOGIC
+    # -------------------------------
+    if report_clicked and st.session_state.get("scrape_done", False):
+        if profile_report:
+            profiling.start_run()
+        artifact_name = st.session_state.get("artifact_name", ARTIFACT_NAME)
+        # st.info(f"📦 Fetching artifact `{artifact_name}` ...")
+        st.info(f"📦 Fetching Dataset `{artifact_name}` ...")
+
+        # Merge the CSVs of every shard run
+        with profiling.stage("collect"):
+            if live_state is not None:
+                # Local run: scraper.py wrote the combined CSV next to app.py
+                csv_path = os.path.join(APP_DIR, f"{artifact_name}.csv")
+                df = pd.read_csv(csv_path, encoding="utf-8-sig") if os.path.exists(csv_path) else None
+            else:
+                df = get_dispatcher().collect(st.session_state.get("shards", []))
+        if df is None or df.empty:
+            st.warning("⚠️ No data found in your artifact.")
+            st.stop()
 
-    r = requests.post(
-        f"https://api.github.com/repos/{REPO}/actions/workflows/{WORKFLOW_ID}/dispatches",
-        headers=headers,
-        json=payload,
-    )
+        # -------------------------------
+        # Sentiment Analysis Integration
+        # -------------------------------
+        import sentiment_model
+
+        if "Comments" in df.columns and not df["Comments"].isna().all():
+            st.info("🧠 Running Sentiment Analysis on Comments...")
+            with profiling.stage("sentiment"):
+                df = sentiment_model.analyze_comments(df, column="Comments", dedup=True)
+            st.success("✅ Sentiment Analysis Completed!")
+
+        with profiling.stage("index"):
+            st.session_state["hashtag_index"] = hashtags.build_hashtag_index(df)
+            st.session_state.pop("search_index", None)  # rebuilt lazily for the new data
+            get_rollup_store().update(df)
+
+        # Compact once per report: session_state keeps categorical / Arrow-backed
+        # tables instead of an object-string copy of every row
+        import frame_compact
+        with profiling.stage("compact"):
+            report = frame_compact.compact_frame(df)
+        st.session_state["report"] = report
+        st.success("✅ Your report is ready!")
+        st.caption(
+            f"🗜️ Report memory: {report.memory_before / 1e6:.1f} MB → {report.memory_bytes / 1e6:.1f} MB"
+        )
+        with st.expander("Memory by column"):
+            st.dataframe(frame_compact.memory_table(df, report), use_container_width=True)
 
-    if r.status_code != 204:
-        st.error(f"❌ Failed to trigger workflow: {r.text}")
-        st.stop()
+    # -------------------------------
+    # DISPLAY REPORT
+    # -------------------------------
+    if "report" in st.session_state:
+        import charts
 
-    # st.info("⏳ Waiting for workflow to complete (up to 5 mins)...")
-    st.info("⏳ Waiting for scraping to complete (up to 5 mins)...")
-
-    workflow_completed = False
-    for _ in range(6000):  # ~10 mins
-        runs = requests.get(f"https://api.github.com/repos/{REPO}/actions/workflows/{WORKFLOW_ID}/runs", headers=headers).json()
-        latest_run = runs.get("workflow_runs", [None])[0]
-        if latest_run and latest_run.get("status") == "completed":
-            workflow_completed = True
-            break
-        time.sleep(6)
-
-    if workflow_completed:
-        # st.success("🔄 Scraping in progress...")
-        st.success("🔄 Scraping in progress... Click **Get Report**")
-        st.session_state["scrape_done"] = True
-    else:
-        st.error("❌ Workflow timed out.")
-        st.session_state["scrape_done"] = False
+        profiling.begin_stage("render")
 
-# -------------------------------
-# REPORT LOGIC
-# -------------------------------
-if report_clicked and st.session_state.get("scrape_done", False):
-    artifact_name = st.session_state.get("artifact_name", ARTIFACT_NAME)
-    # st.info(f"📦 Fetching artifact `{artifact_name}` ...")
-    st.info(f"📦 Fetching Dataset `{artifact_name}` ...")
-
-    df = fetch_artifact_csv(REPO, GITHUB_TOKEN, artifact_name)
-    if df is None or df.empty:
-        st.warning("⚠️ No data found in your artifact.")
-        st.stop()
+        # Likes / Date / Time are already parsed by frame_compact; this flat view
+        # lives only for the current rerun
+        df = st.session_state["report"].flat()
 
-    # -------------------------------
-    # Sentiment Analysis Integration
-    # -------------------------------
-    import sentiment_model
+        if "hashtag_index" not in st.session_state:
+            st.session_state["hashtag_index"] = hashtags.build_hashtag_index(df)
+        hashtag_index = st.session_state["hashtag_index"]
 
-    if "Comments" in df.columns and not df["Comments"].isna().all():
-        st.info("🧠 Running Sentiment Analysis on Comments...")
-        df = sentiment_model.analyze_comments(df, column="Comments")
-        st.success("✅ Sentiment Analysis Completed!")
+        # -------------------------------
+        # Overall Overview (All Users)
+        # -------------------------------
+        st.markdown("## 📊 Overall Overview")
 
-    st.session_state["scraped_df"] = df
-    st.success("✅ Your report is ready!")
+        total_posts = df["URL"].nunique()
+        total_likes = df["Likes"].sum()
+        total_comments = comment_total(df)
 
-# -------------------------------
-# DISPLAY REPORT
-# -------------------------------
-if "scraped_df" in st.session_state:
-    df = st.session_state["scraped_df"]
+        sentiment_counts = sentiment_shares(df)
 
-    # Clean up data
-    df["Likes"] = df["Likes"].astype(str).str.replace(",", "").str.strip()
-    df["Likes"] = pd.to_numeric(df["Likes"], errors="coerce").fillna(0)
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["Time"] = pd.to_datetime(df["Time"], format='%H:%M:%S', errors="coerce").dt.time
-    df["Comments"] = df["Comments"].replace("", pd.NA)
+        col1, col2, col3 = st.columns([1,1,1])
+        with col1:
+            st.write(f"📄 **Total Posts:** {format_indian_number(total_posts)}")
+        with col2:
+            st.write(f"❤️ **Total Likes:** {format_indian_number(total_likes)}")
+        with col3:
+            st.write(f"💬 **Total Comments:** {format_indian_number(total_comments)}")
 
-    # -------------------------------
-    # Overall Overview (All Users)
-    # -------------------------------
-    st.markdown("## 📊 Overall Overview")
+        # -------------------------------
+        # Sentiment Visualization + Top Hashtags (Overall)
+        # -------------------------------
+        # Prepare top hashtags (overall) from the precomputed index
+        df_hashtags_overall = hashtags.top_hashtags(hashtag_index)
 
-    total_posts = df["URL"].nunique()
-    total_likes = df["Likes"].sum()
-    total_comments = df["Comments"].notna().sum()
+        col_sent_overall, col_hash_overall = st.columns([1, 1.5])
 
-    all_comments = df[df["Comments"].notna()]
-    sentiment_counts = (
-        all_comments["Sentiment_label"].astype(str).str.strip().str.title().value_counts(normalize=True) * 100
-    )
-    pos_pct = sentiment_counts.get("Positive", 0.0)
-    neg_pct = sentiment_counts.get("Negative", 0.0)
-    neu_pct = sentiment_counts.get("Neutral", 0.0)
-
-    col1, col2, col3 = st.columns([1,1,1])
-    with col1:
-        st.write(f"📄 **Total Posts:** {format_indian_number(total_posts)}")
-    with col2:
-        st.write(f"❤️ **Total Likes:** {format_indian_number(total_likes)}")
-    with col3:
-        st.write(f"💬 **Total Comments:** {format_indian_number(total_comments)}")
+        with col_sent_overall:
+            st.plotly_chart(cached_figure("sentiment_bar", sentiment_counts), use_container_width=True)
+
+        with col_hash_overall:
+            if not df_hashtags_overall.empty:
+                st.plotly_chart(cached_figure("hashtag_bar", df_hashtags_overall), use_container_width=True)
+            else:
+                st.info("No hashtags found overall.")
 
         # -------------------------------
-    # -------------------------------
-    # Sentiment Visualization + Top Hashtags (Overall)
-    # -------------------------------
-    # st.markdown("### 📈 Sentiment Distribution & Top Hashtags (Overall)")
-    
-    # Prepare sentiment dataframe
-    df_sentiment_overall = pd.DataFrame({
-        "Sentiment": ["🙂 Positive", "😡 Negative", "😐 Neutral"],
-        "Percentage": [pos_pct, neg_pct, neu_pct]
-    })
-    
-    # Prepare top hashtags (overall)
-    hashtags_list_overall = df['Hashtags'].dropna().tolist()
-    all_hashtags_overall = []
-    for h in hashtags_list_overall:
-        all_hashtags_overall.extend([tag.strip() for tag in h.split(",")])
-    
-    from collections import Counter
-    top_hashtags_overall = Counter(all_hashtags_overall).most_common(10)
-    if top_hashtags_overall:
-        tags, counts = zip(*top_hashtags_overall)
-        df_hashtags_overall = pd.DataFrame({"Hashtag": tags, "Frequency": counts})
-    else:
-        df_hashtags_overall = pd.DataFrame({"Hashtag": [], "Frequency": []})
-    
-    col_sent_overall, col_hash_overall = st.columns([1, 1.5])
-    
-    with col_sent_overall:
-        y_max = df_sentiment_overall["Percentage"].max()
-        y_limit = y_max + 5  # add margin so text labels aren’t cut
-        fig_sent_overall = px.bar(
-            df_sentiment_overall,
-            x="Sentiment",
-            y="Percentage",
-            text="Percentage",
-            color="Sentiment",
-            color_discrete_map={
-                "🙂 Positive": "green",
-                "😡 Negative": "red",
-                "😐 Neutral": "gray"
-            },
-            title="Sentiment Distribution"
-        )
-        fig_sent_overall.update_traces(
-            texttemplate='%{text:.1f}%',
-            textposition='outside',
-            marker_line_width=0.5
-        )
-        fig_sent_overall.update_layout(
-            title_x=0.2,  # Center the title
-            yaxis_title="Percentage",
-            xaxis_title="",
-            showlegend=False,
-            uniformtext_minsize=12,
-            uniformtext_mode='hide',
-            yaxis=dict(range=[0, y_limit]) 
-        )
-        st.plotly_chart(fig_sent_overall, use_container_width=True)
-    
-    with col_hash_overall:
-        if not df_hashtags_overall.empty:
-            fig_hash_overall = px.bar(
-                df_hashtags_overall.sort_values("Frequency", ascending=False),
-                x="Frequency",
-                y="Hashtag",
-                orientation='h',
-                text="Frequency",
-                labels={"Frequency": "Count", "Hashtag": "Hashtags"},
-                title="Top 10 Hashtags"
-            )
-            fig_hash_overall.update_traces(
-                texttemplate='%{text}',
-                textposition='inside',
-                textangle=0,
-                insidetextanchor='middle',
-                marker_color='lightblue',
-                cliponaxis=False
-            )
-            fig_hash_overall.update_layout(
-                title_x=0.5,  # Center the title
-                yaxis=dict(autorange="reversed"),
-                xaxis_title="Frequency",
-                yaxis_title="Hashtags",
-                uniformtext_minsize=12,
-                uniformtext_mode='hide',
-                bargap=0.3
-            )
-            st.plotly_chart(fig_hash_overall, use_container_width=True)
+        # Trends (precomputed daily / hourly buckets)
+        # -------------------------------
+        st.markdown("## 📈 Trends")
+        tcol1, tcol2 = st.columns([1, 1])
+        with tcol1:
+            trend_granularity = st.radio("Bucket", ["day", "hour"], horizontal=True, key="trend_granularity")
+        with tcol2:
+            trend_days = st.slider("Last N days", min_value=7, max_value=365, value=90, key="trend_days")
+
+        rollup_store = get_rollup_store()
+        trend_until = df["Date"].max()
+        trend_until = pd.Timestamp.now() if pd.isna(trend_until) else trend_until
+        trend_since = (trend_until - pd.Timedelta(days=trend_days)).strftime("%Y-%m-%d")
+        report_users = sorted(df["username"].dropna().unique()) if "username" in df.columns else None
+        profile_trend = rollup_store.trend("profile", report_users, trend_granularity, since=trend_since)
+
+        if profile_trend.empty:
+            st.info("No trend data yet.")
         else:
-            st.info("No hashtags found overall.")
-
+            fig_eng = cached_figure(
+                "trend_line", profile_trend, x="bucket", y="comments", color="key",
+                labels={"bucket": "", "comments": "Comments", "key": "Profile"},
+                title="Comments per " + trend_granularity,
+            )
+            st.plotly_chart(fig_eng, use_container_width=True)
 
+            fig_pos = cached_figure(
+                "trend_line", profile_trend, x="bucket", y="positive_pct", color="key",
+                labels={"bucket": "", "positive_pct": "Positive %", "key": "Profile"},
+                title="Positive sentiment share",
+            )
+            st.plotly_chart(fig_pos, use_container_width=True)
+
+            top_tags = hashtags.top_hashtags(hashtag_index)["Hashtag"].tolist()[:5]
+            tag_trend = rollup_store.trend("hashtag", top_tags, trend_granularity, since=trend_since)
+            if not tag_trend.empty:
+                fig_tags = cached_figure(
+                    "trend_line", tag_trend, x="bucket", y="likes", color="key",
+                    labels={"bucket": "", "likes": "Likes", "key": "Hashtag"},
+                    title="Likes on posts with the top hashtags",
+                )
+                st.plotly_chart(fig_tags, use_container_width=True)
 
-    # -------------------------------
-    # Profile Summary Table with Sentiment
-    # -------------------------------
-    if "username" in df.columns:
-        st.markdown("## 👥 Profile Summary")
-        summary_df = df.groupby("username").agg(
-            Total_Posts=("URL", "nunique"),
-            Total_Likes=("Likes", "sum"),
-            Total_Comments=("Comments", lambda x: x.notna().sum()),
-        ).reset_index()
-
-        sentiments_list = []
-        for user in summary_df["username"]:
-            user_comments = df[(df["username"]==user) & (df["Comments"].notna())]
-            scounts = (user_comments["Sentiment_label"].astype(str).str.strip().str.title().value_counts(normalize=True)*100)
-            sentiments_list.append(f"🙂 {scounts.get('Positive',0):.1f}% | 😡 {scounts.get('Negative',0):.1f}% | 😐 {scounts.get('Neutral',0):.1f}%")
-        summary_df["Sentiment"] = sentiments_list
-
-        summary_df["Total_Likes"] = summary_df["Total_Likes"].apply(format_indian_number)
-        summary_df["Total_Comments"] = summary_df["Total_Comments"].apply(format_indian_number)
-
-        st.dataframe(summary_df, use_container_width=True)
-
-        selected_users = st.multiselect(
-            "Select profiles to explore",
-            options=summary_df["username"].tolist(),
+        # -------------------------------
+        # Comment Search
+        # -------------------------------
+        st.markdown("## 🔎 Search Comments")
+        search_query = st.text_input(
+            "Keywords or \"exact phrase\" (spelling variants like chaala / chala match each other)",
+            key="search_query",
         )
+        fcol1, fcol2, fcol3 = st.columns([1, 1, 1])
+        with fcol1:
+            search_users = st.multiselect(
+                "Profiles", options=sorted(df["username"].dropna().unique()) if "username" in df.columns else [],
+                key="search_users",
+            )
+        with fcol2:
+            search_dates = st.date_input("Date range", value=(), key="search_dates")
+        with fcol3:
+            search_sentiments = st.multiselect("Sentiment", options=["Positive", "Negative", "Neutral"], key="search_sentiments")
+
+        if search_query.strip():
+            import search_index
+
+            if "search_index" not in st.session_state:
+                with st.spinner("Building search index..."):
+                    st.session_state["search_index"] = search_index.CommentSearchIndex.from_frame(df)
+            index = st.session_state["search_index"]
+            start_d = search_dates[0] if len(search_dates) > 0 else None
+            end_d = search_dates[1] if len(search_dates) > 1 else start_d
+
+            search_started = time.perf_counter()
+            results = index.search_frame(
+                df, search_query,
+                usernames=search_users or None,
+                start_date=start_d,
+                end_date=end_d,
+                sentiments=search_sentiments or None,
+            )
+            search_ms = (time.perf_counter() - search_started) * 1000
+            st.caption(f"{len(results)} matches in {search_ms:.0f} ms (top 200 shown)")
+            result_cols = [c for c in ["username", "URL", "Match", "Comments", "Caption", "Sentiment_label", "Confidence_score"] if c in results.columns]
+            st.dataframe(results[result_cols], use_container_width=True)
 
         # -------------------------------
-        # User Overview for Selected Users + User-wise Post Exploration + Download
+        # Profile Summary Table with Sentiment
         # -------------------------------
-        
-        for selected_user in selected_users:
-            st.markdown(f"## 👤 User Overview: {selected_user}")
-            filtered = df[df["username"] == selected_user]
-
-            total_posts = filtered["URL"].nunique()
-            total_likes = filtered["Likes"].sum()
-            total_comments = filtered["Comments"].notna().sum()
-
-            all_comments_user = filtered[filtered["Comments"].notna()]
-            sentiment_counts_user = (all_comments_user["Sentiment_label"].astype(str).str.strip().str.title().value_counts(normalize=True)*100)
-            pos_pct = sentiment_counts_user.get("Positive", 0.0)
-            neg_pct = sentiment_counts_user.get("Negative", 0.0)
-            neu_pct = sentiment_counts_user.get("Neutral", 0.0)
-
-            col2, col3, col4 = st.columns([1,1,1])
-            # with col1:
-            #     img_path = f"{selected_user}.jpg"
-            #     try:
-            #         st.image(img_path, width=150, caption=selected_user)
-            #     except Exception:
-            #         st.markdown(f"**Name:** {selected_user}")
-
-            with col2:
-                st.write(f"📄 **Total Posts:** {format_indian_number(total_posts)}")
-            with col3:
-                st.write(f"❤️ **Total Likes:** {format_indian_number(total_likes)}")
-            with col4:
-                st.write(f"💬 **Total Comments:** {format_indian_number(total_comments)}")
-    
-            # -------------------------------
-            # st.markdown(f"### 📊 Sentiment Distribution & Top Hashtags for {selected_user}")
+        if "username" in df.columns:
+            st.markdown("## 👥 Profile Summary")
+            summary_df = df.groupby("username", observed=True).agg(
+                Total_Posts=("URL", "nunique"),
+                Total_Likes=("Likes", "sum"),
+            ).reset_index()
+            comment_totals = comment_weights(df).groupby(df["username"], observed=True).sum()
+            summary_df["Total_Comments"] = summary_df["username"].map(comment_totals).fillna(0).astype(int)
+
+            sentiments_list = []
+            for user in summary_df["username"]:
+                scounts = sentiment_shares(df[df["username"]==user])
+                sentiments_list.append(f"🙂 {scounts.get('Positive',0):.1f}% | 😡 {scounts.get('Negative',0):.1f}% | 😐 {scounts.get('Neutral',0):.1f}%")
+            summary_df["Sentiment"] = sentiments_list
+
+            summary_df["Total_Likes"] = summary_df["Total_Likes"].apply(format_indian_number)
+            summary_df["Total_Comments"] = summary_df["Total_Comments"].apply(format_indian_number)
+
+            st.dataframe(summary_df, use_container_width=True)
+
+            selected_users = st.multiselect(
+                "Select profiles to explore",
+                options=summary_df["username"].tolist(),
+            )
 
-            # Sentiment DataFrame
-            df_sentiment_user = pd.DataFrame({
-                "Sentiment": ["🙂 Positive", "😡 Negative", "😐 Neutral"],
-                "Percentage": [pos_pct, neg_pct, neu_pct]
-            })
-        
-            # Hashtags DataFrame
-            hashtags_list_user = filtered['Hashtags'].dropna().tolist()
-            all_hashtags_user = []
-            for h in hashtags_list_user:
-                all_hashtags_user.extend([tag.strip() for tag in h.split(",")])
-        
-            from collections import Counter
-            top_hashtags_user = Counter(all_hashtags_user).most_common(10)
-        
-            if top_hashtags_user:
-                tags, counts = zip(*top_hashtags_user)
-                df_hashtags_user = pd.DataFrame({"Hashtag": tags, "Frequency": counts})
-            else:
-                df_hashtags_user = pd.DataFrame({"Hashtag": [], "Frequency": []})
-        
-            # Layout (side-by-side)
-            col_sent_user, col_hash_user = st.columns([1, 1.5])
-        
-            with col_sent_user:
-                y_max_user = df_sentiment_user["Percentage"].max()
-                y_limit_user = y_max_user + 5  # Add margin so text isn’t cut
-                fig_sent_user = px.bar(
-                    df_sentiment_user,
-                    x="Sentiment",
-                    y="Percentage",
-                    text="Percentage",
-                    color="Sentiment",
-                    color_discrete_map={
-                        "🙂 Positive": "green",
-                        "😡 Negative": "red",
-                        "😐 Neutral": "gray"
-                    },
-                    title=f"Sentiment Distribution"
-                )
-                fig_sent_user.update_traces(
-                    texttemplate='%{text:.1f}%',
-                    textposition='outside',
-                    marker_line_width=0.5
-                )
-                fig_sent_user.update_layout(
-                    title_x=0.2,
-                    yaxis_title="Percentage",
-                    xaxis_title="",
-                    showlegend=False,
-                    uniformtext_minsize=12,
-                    uniformtext_mode='hide',
-                    yaxis=dict(range=[0, y_limit_user])
-                )
-                st.plotly_chart(fig_sent_user, use_container_width=True, key=f"sent_chart_{selected_user}")
-        
-            with col_hash_user:
-                if not df_hashtags_user.empty:
-                    fig_hash_user = px.bar(
-                        df_hashtags_user.sort_values("Frequency", ascending=False),
-                        x="Frequency",
-                        y="Hashtag",
-                        orientation='h',
-                        text="Frequency",
-                        labels={"Frequency": "Count", "Hashtag": "Hashtags"},
-                        title=f"Top 10 Hashtags for {selected_user}"
-                    )
-                    fig_hash_user.update_traces(
-                        texttemplate='%{text}',
-                        textposition='inside',
-                        textangle=0,
-                        insidetextanchor='middle',
-                        marker_color='lightblue',
-                        cliponaxis=False
+            # -------------------------------
+            # Selected profiles side by side: one faceted figure each for
+            # sentiment and hashtags instead of two figures per profile
+            # -------------------------------
+            if selected_users:
+                selected_df = df[df["username"].isin(selected_users)]
+                if "Sentiment_label" in selected_df.columns and comment_total(selected_df):
+                    user_sentiment = charts.sentiment_by(selected_df, "username", comment_weights(selected_df))
+                    st.plotly_chart(
+                        cached_figure("sentiment_multiples", user_sentiment, by="username", title="Sentiment Distribution by Profile"),
+                        use_container_width=True,
                     )
-                    fig_hash_user.update_layout(
-                        title_x=0.2,
-                        yaxis=dict(autorange="reversed"),
-                        xaxis_title="Frequency",
-                        yaxis_title="Hashtags",
-                        uniformtext_minsize=12,
-                        uniformtext_mode='hide',
-                        bargap=0.3
+                user_tags = pd.concat(
+                    [hashtags.top_hashtags(hashtag_index, user).assign(username=user) for user in selected_users],
+                    ignore_index=True,
+                )
+                if not user_tags.empty:
+                    st.plotly_chart(
+                        cached_figure("hashtag_multiples", user_tags, by="username", title="Top 10 Hashtags by Profile"),
+                        use_container_width=True,
                     )
-                    st.plotly_chart(fig_hash_user, use_container_width=True)
                 else:
-                    st.info(f"No hashtags found for {selected_user}.")
-
+                    st.info("No hashtags found for the selected profiles.")
 
+            # -------------------------------
+            # User Overview for Selected Users + User-wise Post Exploration + Download
+            # -------------------------------
+        
+            for selected_user in selected_users:
+                st.markdown(f"## 👤 User Overview: {selected_user}")
+                filtered = df[df["username"] == selected_user]
+
+                total_posts = filtered["URL"].nunique()
+                total_likes = filtered["Likes"].sum()
+                total_comments = comment_total(filtered)
+
+                col2, col3, col4 = st.columns([1,1,1])
+                # with col1:
+                #     img_path = f"{selected_user}.jpg"
+                #     try:
+                #         st.image(img_path, width=150, caption=selected_user)
+                #     except Exception:
+                #         st.markdown(f"**Name:** {selected_user}")
+
+                with col2:
+                    st.write(f"📄 **Total Posts:** {format_indian_number(total_posts)}")
+                with col3:
+                    st.write(f"❤️ **Total Likes:** {format_indian_number(total_likes)}")
+                with col4:
+                    st.write(f"💬 **Total Comments:** {format_indian_number(total_comments)}")
+
+                # User-wise Post Exploration
+                st.markdown(f"### 📌 Explore Posts: {selected_user}")
+                post_urls_user = filtered["URL"].unique().tolist()
+                selected_posts_user = st.multiselect(
+                    f"🔗 Select Posts for {selected_user}",
+                    post_urls_user,
+                    key=f"posts_{selected_user}"
+                )
 
-            # User-wise Post Exploration
-            st.markdown(f"### 📌 Explore Posts: {selected_user}")
-            post_urls_user = filtered["URL"].unique().tolist()
-            selected_posts_user = st.multiselect(
-                f"🔗 Select Posts for {selected_user}",
-                post_urls_user,
-                key=f"posts_{selected_user}"
-            )
+                if selected_posts_user:
+                    multi_posts_user = filtered[filtered["URL"].isin(selected_posts_user)]
+                    st.subheader(f"📝 Selected Posts Details: {selected_user}")
 
-            if selected_posts_user:
-                multi_posts_user = filtered[filtered["URL"].isin(selected_posts_user)]
-                st.subheader(f"📝 Selected Posts Details: {selected_user}")
+                    for url in selected_posts_user:
+                        post_group = multi_posts_user[multi_posts_user["URL"] == url]
+                        caption_row = post_group[post_group["Caption"].notna()]
 
-                for url in selected_posts_user:
-                    post_group = multi_posts_user[multi_posts_user["URL"] == url]
-                    caption_row = post_group[post_group["Caption"].notna()]
+                        # Total comments for this post
+                        total_comments_post = comment_total(post_group)
 
-                    # Total comments for this post
-                    total_comments_post = post_group["Comments"].notna().sum()
+                        if not caption_row.empty:
+                            row = caption_row.iloc[0]
 
-                    if not caption_row.empty:
-                        row = caption_row.iloc[0]
+                            # Format likes and comments
+                            likes_formatted = format_indian_number(row["Likes"])
+                            comments_formatted = format_indian_number(total_comments_post)
 
-                        # Format likes and comments
-                        likes_formatted = format_indian_number(row["Likes"])
-                        comments_formatted = format_indian_number(total_comments_post)
+                            st.markdown(
+                                f"**Caption:** {row['Caption']} 🔗 [View Post]({url})  \n\n"
+                                f"📅 {row['Date'].date()}  🕒 {row['Time']}  ❤️ Likes: {likes_formatted}  💬 Comments: {comments_formatted}  \n"
+                            )
 
-                        st.markdown(
-                            f"**Caption:** {row['Caption']} 🔗 [View Post]({url})  \n\n"
-                            f"📅 {row['Date'].date()}  🕒 {row['Time']}  ❤️ Likes: {likes_formatted}  💬 Comments: {comments_formatted}  \n"
+                    # Sentiment of every selected post in one figure
+                    posts_scored = multi_posts_user[multi_posts_user["Comments"].notna()]
+                    if not posts_scored.empty and "Sentiment_label" in posts_scored.columns:
+                        posts_scored = posts_scored.assign(
+                            Post=posts_scored["URL"].astype(str).str.rstrip("/").str.split("/").str[-1]
+                        )
+                        post_sentiment = charts.sentiment_by(posts_scored, "Post", comment_weights(posts_scored))
+                        st.plotly_chart(
+                            cached_figure("sentiment_multiples", post_sentiment, by="Post", title="Sentiment Distribution by Post"),
+                            use_container_width=True,
+                            key=f"sent_chart_{selected_user}",
                         )
 
-                        # Calculate post sentiment (if comments exist)
-                        comments_with_sentiment = post_group[post_group["Comments"].notna()]
-                        if not comments_with_sentiment.empty and "Sentiment_label" in comments_with_sentiment.columns:
-                            sentiment_counts_post = (
-                                comments_with_sentiment["Sentiment_label"].astype(str).str.title().value_counts(normalize=True) * 100
-                            )
+                    # Download Button for Selected Posts (User-wise)
+                    download_df_user = multi_posts_user.copy()
+                    download_df_user["Likes"] = download_df_user["Likes"].astype(int)
+                    csv_bytes_user = download_df_user.to_csv(index=False).encode("utf-8")
+                    st.download_button(
+                        label=f"📥 Download Selected Posts for {selected_user}",
+                        data=csv_bytes_user,
+                        file_name=f"{selected_user}_selected_posts.csv",
+                        mime="text/csv"
+                    )
+
+                # Download Overall User Data as Excel
+                excel_buffer_user = BytesIO()
+                filtered_copy = filtered.copy()
+                filtered_copy["Likes"] = filtered_copy["Likes"].astype(int)
+                with pd.ExcelWriter(excel_buffer_user) as writer:
+                    filtered_copy.to_excel(writer, index=False, sheet_name='User Data')
+                excel_buffer_user.seek(0)
 
-                            # -------------------------
-                            # --- Plot Sentiment Only ---
-                            # -------------------------
-                            df_sentiment = pd.DataFrame({
-                                "Sentiment": ["🙂 Positive", "😡 Negative", "😐 Neutral"],
-                                "Percentage": [
-                                    sentiment_counts_post.get("Positive", 0),
-                                    sentiment_counts_post.get("Negative", 0),
-                                    sentiment_counts_post.get("Neutral", 0)
-                                ]
-                            })
-                            
-                            # Create a column just for sentiment
-                            col_sent = st.container()
-                            
-                            with col_sent:
-                                y_max = df_sentiment["Percentage"].max()
-                                y_limit = y_max + 5  # Add small margin so labels don’t get cut
-                                fig_sent = px.bar(
-                                    df_sentiment,
-                                    x="Sentiment",
-                                    y="Percentage",
-                                    text="Percentage",
-                                    color="Sentiment",
-                                    color_discrete_map={
-                                        "🙂 Positive": "green",
-                                        "😡 Negative": "red",
-                                        "😐 Neutral": "gray"
-                                    },
-                                    title="Sentiment Distribution"
-                                )
-                                fig_sent.update_traces(
-                                    texttemplate='%{text:.1f}%',
-                                    textposition='outside',
-                                    marker_line_width=0.5
-                                )
-                                fig_sent.update_layout(
-                                    yaxis_title="Percentage",
-                                    xaxis_title="",
-                                    showlegend=False,
-                                    uniformtext_minsize=12,
-                                    uniformtext_mode='hide',
-                                    yaxis=dict(range=[0, y_limit]),
-                                    title_x=0.4
-                                )
-                                st.plotly_chart(fig_sent, use_container_width=True, key=f"sent_chart_{selected_user}_{url}")
-                                # st.markdown("---")
-                
-                # Download Button for Selected Posts (User-wise)
-                download_df_user = multi_posts_user.copy()
-                download_df_user["Likes"] = download_df_user["Likes"].astype(int)
-                csv_bytes_user = download_df_user.to_csv(index=False).encode("utf-8")
                 st.download_button(
-                    label=f"📥 Download Selected Posts for {selected_user}",
-                    data=csv_bytes_user,
-                    file_name=f"{selected_user}_selected_posts.csv",
-                    mime="text/csv"
+                    label=f"📥 Download Full Data for {selected_user}",
+                    data=excel_buffer_user,
+                    file_name=f"{selected_user}_full_data.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
+                st.markdown("---")
+
+        # Full dataset download as Excel
+        output = BytesIO()
+        with pd.ExcelWriter(output) as writer:
+            df.to_excel(writer, index=False, sheet_name='Sheet1')
+        output.seek(0)
+
+        st.download_button(
+            label="📥 Download Full Scraped Data as Excel",
+            data=output,
+            file_name="full_scraped_report.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
 
-            # Download Overall User Data as Excel
-            excel_buffer_user = BytesIO()
-            filtered_copy = filtered.copy()
-            filtered_copy["Likes"] = filtered_copy["Likes"].astype(int)
-            with pd.ExcelWriter(excel_buffer_user) as writer:
-                filtered_copy.to_excel(writer, index=False, sheet_name='User Data')
-            excel_buffer_user.seek(0)
-
-            st.download_button(
-                label=f"📥 Download Full Data for {selected_user}",
-                data=excel_buffer_user,
-                file_name=f"{selected_user}_full_data.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            st.markdown("---")
-
-    # Full dataset download as Excel
-    output = BytesIO()
-    with pd.ExcelWriter(output) as writer:
-        df.to_excel(writer, index=False, sheet_name='Sheet1')
-    output.seek(0)
-
-    st.download_button(
-        label="📥 Download Full Scraped Data as Excel",
-        data=output,
-        file_name="full_scraped_report.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+        # -------------------------------
+        # Profile of the last profiled report (stage table, flamegraph, raw files)
+        # -------------------------------
+        finished_run = profiling.finish_run()
+        if finished_run is not None:
+            st.session_state["profile_run"] = finished_run
+        profile_run = st.session_state.get("profile_run")
+        if profile_run is not None:
+            with st.expander(f"🔬 Profile {profile_run.run_id} ({profile_run.wall_seconds:.2f}s)"):
+                stage_table = profile_run.stage_table()
+                st.dataframe(stage_table, use_container_width=True)
+                if not stage_table.empty:
+                    st.plotly_chart(charts.stage_icicle(stage_table, profile_run.wall_seconds), use_container_width=True)
+                st.download_button(
+                    label="📥 Download profile (flamegraph + stage table + raw profiles)",
+                    data=profile_run.zip_bytes(),
+                    file_name=f"profile_{profile_run.run_id}.zip",
+                    mime="application/zip",
+                )
+finally:
+    profiling.discard_run()
@@ -0,0 +1,109 @@
+# ----------------------------------
+# benchmarks/bench_charts.py
+# Dashboard chart cost for N selected profiles x M selected posts each:
+# the old layout (one px.bar per profile for sentiment + hashtags, one per
+# post) vs charts.py (one faceted / aggregated figure per view). Reports
+# figure count, build time and total JSON payload sent to the browser.
+#
+#   python benchmarks/bench_charts.py --users 5 20 50 --posts 10
+# ----------------------------------
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def synthetic_frame(users, posts, comments_per_post, seed=0):
+    import pandas as pd
+
+    rng = random.Random(seed)
+    tags = [f"#tag{i}" for i in range(60)]
+    rows = []
+    for u in range(users):
+        for p in range(posts):
+            url = f"https://www.instagram.com/p/u{u}p{p}/"
+            for c in range(comments_per_post):
+                rows.append({
+                    "username": f"user{u}", "URL": url, "Comments": f"comment {c}",
+                    "Sentiment_label": rng.choice(["Positive", "Negative", "Neutral"]),
+                    "Hashtags": " ".join(rng.sample(tags, 3)) if c == 0 else "",
+                })
+    return pd.DataFrame(rows)
+
+
+def old_layout(df, hashtag_index):
+    # One figure per profile (sentiment + hashtags) and one per post, as app.py used to draw
+    import charts
+    import hashtags
+    import plotly.express as px
+
+    figures = []
+    for user, frame in df.groupby("username"):
+        shares = frame["Sentiment_label"].value_counts(normalize=True) * 100
+        data = {"Sentiment": charts.SENTIMENTS, "Percentage": [shares.get(s.split(" ", 1)[1], 0) for s in charts.SENTIMENTS]}
+        figures.append(px.bar(data, x="Sentiment", y="Percentage", text="Percentage", color="Sentiment",
+                              color_discrete_map=charts.SENTIMENT_COLORS))
+        tags = hashtags.top_hashtags(hashtag_index, user)
+        if not tags.empty:
+            figures.append(px.bar(tags, x="Frequency", y="Hashtag", orientation="h", text="Frequency"))
+        for _, post in frame.groupby("URL"):
+            shares = post["Sentiment_label"].value_counts(normalize=True) * 100
+            data = {"Sentiment": charts.SENTIMENTS, "Percentage": [shares.get(s.split(" ", 1)[1], 0) for s in charts.SENTIMENTS]}
+            figures.append(px.bar(data, x="Sentiment", y="Percentage", text="Percentage", color="Sentiment",
+                                  color_discrete_map=charts.SENTIMENT_COLORS))
+    return figures
+
+
+def new_layout(df, hashtag_index):
+    import pandas as pd
+    import charts
+    import hashtags
+
+    weights = pd.Series(1, index=df.index)
+    figures = [
+        charts.sentiment_multiples(charts.sentiment_by(df, "username", weights), "username"),
+        charts.hashtag_multiples(pd.concat(
+            [hashtags.top_hashtags(hashtag_index, u).assign(username=u) for u in df["username"].unique()],
+            ignore_index=True,
+        ), "username"),
+    ]
+    for user, frame in df.groupby("username"):
+        frame = frame.assign(Post=frame["URL"].str.rstrip("/").str.split("/").str[-1])
+        figures.append(charts.sentiment_multiples(charts.sentiment_by(frame, "Post", weights[frame.index]), "Post"))
+    return figures
+
+
+def measure(build, df, hashtag_index):
+    import charts
+
+    started = time.perf_counter()
+    figures = build(df, hashtag_index)
+    build_seconds = time.perf_counter() - started
+    payload = sum(charts.payload_bytes(f) for f in figures)
+    return len(figures), build_seconds, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-entity vs faceted chart benchmark")
+    parser.add_argument("--users", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--posts", type=int, default=10, help="selected posts per profile")
+    parser.add_argument("--comments", type=int, default=50, help="comments per post")
+    args = parser.parse_args()
+
+    import hashtags
+
+    print(f"{'users':>5} {'layout':>8} {'figures':>8} {'build (s)':>10} {'payload (KB)':>13}")
+    for users in args.users:
+        df = synthetic_frame(users, args.posts, args.comments)
+        hashtag_index = hashtags.build_hashtag_index(df)
+        for name, build in (("old", old_layout), ("faceted", new_layout)):
+            count, seconds, payload = measure(build, df, hashtag_index)
+            print(f"{users:>5} {name:>8} {count:>8} {seconds:>10.2f} {payload / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# ----------------------------------
+# benchmarks/bench_dispatch.py
+# Sharded dispatch against the fake GitHub API: end-to-end time per shard
+# count vs the slowest shard, plus two concurrent "users" to check that each
+# one collects only its own runs.
+#
+#   python benchmarks/bench_dispatch.py --profiles 20 --shards 1 4 10 --seconds-per-profile 0.5
+# ----------------------------------
+import argparse
+import os
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from fake_github import FakeGitHub  # noqa: E402
+
+
+def run_once(base_url, profiles, shards, poll_interval, prefix):
+    import dispatch
+
+    dispatcher = dispatch.ShardedDispatcher(
+        dispatch.GitHubActions("owner/repo", "fake-token", api_url=base_url),
+        # Fake API: pretend there is one account per shard so the cap does not apply
+        shards=shards, accounts=shards, poll_interval=poll_interval, timeout=600,
+    )
+    started = time.perf_counter()
+    runs = dispatcher.dispatch(profiles, "2025-01-01", "2025-01-31", "bench", prefix)
+    finished = dispatcher.wait(runs)
+    df = dispatcher.collect(runs)
+    elapsed = time.perf_counter() - started
+    return {
+        "finished": finished,
+        "elapsed": elapsed,
+        "slowest": max(s.seconds for s in runs),
+        "shards": len(runs),
+        "users": set(df["username"]) if not df.empty else set(),
+        "rows": len(df),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded dispatch benchmark (fake GitHub API)")
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--seconds-per-profile", type=float, default=0.5)
+    parser.add_argument("--queue-ms", type=int, default=200)
+    parser.add_argument("--poll", type=float, default=0.1, help="poll interval (s)")
+    args = parser.parse_args()
+
+    profiles = [f"https://www.instagram.com/user{i}/" for i in range(args.profiles)]
+    with FakeGitHub(args.seconds_per_profile, args.queue_ms) as fake:
+        print(f"{'shards':>6} {'end-to-end (s)':>15} {'slowest shard (s)':>18} {'rows':>6} {'profiles ok':>12}")
+        for shards in args.shards:
+            r = run_once(fake.base_url, profiles, shards, args.poll, f"bench_{shards}")
+            ok = r["finished"] and len(r["users"]) == len(profiles)
+            print(f"{r['shards']:>6} {r['elapsed']:>15.2f} {r['slowest']:>18.2f} {r['rows']:>6} {'✅' if ok else '❌':>12}")
+
+        # Two users dispatching at the same time must not see each other's runs
+        results = {}
+        half = len(profiles) // 2
+        users = {"alice": profiles[:half], "bob": profiles[half:]}
+        threads = [
+            threading.Thread(target=lambda n=n, p=p: results.__setitem__(n, run_once(fake.base_url, p, 4, args.poll, n)))
+            for n, p in users.items()
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for name, own in users.items():
+            expected = {p.rstrip("/").split("/")[-1] for p in own}
+            status = "✅" if results[name]["users"] == expected else "❌ mixed-up runs"
+            print(f"👥 {name}: {len(results[name]['users'])} profiles collected {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# ----------------------------------
+# benchmarks/bench_preprocess.py
+# Text preparation before inference: the old row-wise path (emoji.replace_emoji
+# via .apply, re.search per comment, one re.sub per rule key) vs the columnar
+# strip_emojis + MuRILSentiment-style script routing + preprocess_many.
+# No model is loaded; only the pre-tokenizer work is timed.
+#
+#   python benchmarks/bench_preprocess.py scraped_data_x.csv --repeat 3
+# ----------------------------------
+import argparse
+import os
+import re
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def rowwise(comments, preprocessor):
+    import emoji
+
+    cleaned = comments.fillna("").astype(str).apply(lambda t: emoji.replace_emoji(t, replace="")).str.strip()
+    out = []
+    for text in cleaned:
+        if re.search(r'[\u0C00-\u0C7F]', text):
+            out.append(text.strip())
+            continue
+        text = text.strip().lower()
+        for mapping in (preprocessor.translit_variants, preprocessor.negations, preprocessor.boosters):
+            for key, val in mapping.items():
+                text = re.sub(rf"\b{re.escape(key)}\b", val, text, flags=re.IGNORECASE)
+        out.append(preprocessor.punctuation_pattern.sub("", preprocessor._normalize_emoji(text)))
+    return out
+
+
+def columnar(comments, preprocessor):
+    import sentiment_model
+
+    texts = sentiment_model.strip_emojis(comments)
+    native = texts.str.contains(sentiment_model.TELUGU_PATTERN)
+    prepared = texts.copy()
+    prepared[~native] = preprocessor.preprocess_many(texts[~native].tolist())
+    return prepared.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row-wise vs columnar comment preprocessing")
+    parser.add_argument("csv", help="scraped CSV with a Comments column")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import pandas as pd
+    import sentiment_model
+
+    comments = pd.read_csv(args.csv, encoding="utf-8-sig")["Comments"].dropna().astype(str).reset_index(drop=True)
+    preprocessor = sentiment_model.EnhancedTeluguPreprocessor()
+    sentiment_model.emoji_pattern()  # compile outside the timed region
+    preprocessor._polarity_table()
+
+    results = {}
+    for name, fn in (("row-wise", rowwise), ("columnar", columnar)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results[name] = fn(comments, preprocessor)
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:>9}: {best:.3f}s for {len(comments)} comments ({best / max(len(comments), 1) * 1e6:.1f} µs/comment)")
+
+    same = sum(a == b for a, b in zip(results["row-wise"], results["columnar"]))
+    print(f"identical output: {same}/{len(comments)}")
+
+
+if __name__ == "__main__":
+    main()
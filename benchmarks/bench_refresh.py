@@ -0,0 +1,84 @@
+# ----------------------------------
+# benchmarks/bench_refresh.py
+# Differential refresh against the mock site. New comments are spread through
+# an already-stored post (the live modal is ordered by relevance), and the
+# first of them repeats an old comment's text. Checks that every new comment,
+# the repeat included, is found with an unused Comment_ID, and reports how much
+# of the post was read compared with a full reload.
+#
+#   SCRAPER_HEADLESS=1 python benchmarks/bench_refresh.py --comments 120 --new 5
+# ----------------------------------
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from mock_instagram import add_arguments, from_args  # noqa: E402
+
+
+def run_check(args):
+    import scraper
+    from comment_store import OccurrenceCounter
+    from metrics import REGISTRY
+    from rate_limiter import get_limiter
+
+    REGISTRY.reset()
+    mock = from_args(args).start()
+    try:
+        post = mock.posts[0]
+        url = mock.post_url(0)
+        occurrences = OccurrenceCounter(url)
+        known = {occurrences.next_id(text) for text in post["comments"]}
+        stored = len(post["comments"])
+
+        # Duplicate-text new comment first, then the others between old comments
+        repeat = post["comments"][args.page_size // 2]
+        fresh = [f"fresh comment {i}" for i in range(args.new)]
+        mock.add_comments(0, [repeat])
+        for i, text in enumerate(fresh):
+            mock.add_comments(0, [text], at=2 + i * args.gap)
+
+        driver = scraper._build_driver()
+        try:
+            scraper._open_session(driver, mock.base_url, scraper.DEFAULT_COOKIES)
+            started = time.perf_counter()
+            _, found, ids = scraper.refresh_post_comments(driver, url, known, get_limiter("bench_refresh"))
+            elapsed = time.perf_counter() - started
+        finally:
+            driver.quit()
+    finally:
+        mock.stop()
+
+    summary = REGISTRY.summary()["metrics"]
+    expected = Counter(fresh + [repeat])
+    found = Counter(found)
+    return {
+        "stored_comments": stored,
+        "new_expected": sum(expected.values()),
+        "new_found": sum((found & expected).values()),
+        "unexpected": sorted((found - expected).elements()),
+        "reused_ids": len(set(ids) & known),
+        "early_stop": summary.get("refresh_early_stops_total", 0),
+        "load_more_clicks": summary.get("load_more_clicks_total", 0),
+        "full_reload_clicks": -(-(stored + len(fresh) + 1) // args.page_size) - 1,
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = add_arguments(argparse.ArgumentParser(description="Check differential refresh against the mock site"))
+    parser.add_argument("--new", type=int, default=5, help="new comments added to the stored post")
+    parser.add_argument("--gap", type=int, default=4, help="old comments between consecutive new ones")
+    args = parser.parse_args()
+
+    report = run_check(args)
+    print("\n📊 Refresh check")
+    for key, value in report.items():
+        print(f"   {key:<20} {value}")
+    ok = report["new_found"] == report["new_expected"] and not report["unexpected"] and not report["reused_ids"]
+    print("✅ All new comments found" if ok else "❌ Refresh missed new comments")
+    sys.exit(0 if ok else 1)
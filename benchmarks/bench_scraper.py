@@ -0,0 +1,125 @@
+# ----------------------------------
+# benchmarks/bench_scraper.py
+# Drives the real scrape_instagram() against the local mock site and reports
+# posts/min, comments/min, browser memory and the metrics run summary.
+#
+#   SCRAPER_HEADLESS=1 python benchmarks/bench_scraper.py --posts 10 --comments 60
+# ----------------------------------
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from mock_instagram import add_arguments, from_args  # noqa: E402
+
+
+class BrowserMemorySampler:
+    # Sums RSS of every child process (chromedriver + Chrome renderers).
+    # psutil is optional; without it memory is reported as unavailable.
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak_rss = 0
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = 0
+            for child in self._process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except Exception:
+                    continue
+            self.samples.append((time.time(), rss))
+            self.peak_rss = max(self.peak_rss, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self._process is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def run_benchmark(args):
+    import pandas as pd
+    import scraper
+    from metrics import REGISTRY
+
+    REGISTRY.reset()
+    mock = from_args(args).start()
+    # Cover every mock post: newest post is today, oldest is (posts-1)*days_between ago
+    end_date = datetime.now(timezone.utc).date()
+    start_date = end_date - timedelta(days=(args.posts - 1) * args.days_between)
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="bench_scraper_")
+    os.chdir(workdir)
+    try:
+        with BrowserMemorySampler() as memory:
+            started = time.perf_counter()
+            if args.mode == "fanout":
+                scraper.scrape_instagram_fanout(mock.profile_url, str(start_date), str(end_date),
+                                                base_url=mock.base_url, workers=args.workers)
+            else:
+                scraper.scrape_instagram(mock.profile_url, str(start_date), str(end_date), base_url=mock.base_url)
+            elapsed = time.perf_counter() - started
+        csv_files = glob.glob("*.csv")
+        df = pd.read_csv(csv_files[0], encoding="utf-8-sig") if csv_files else pd.DataFrame()
+    finally:
+        os.chdir(cwd)
+        mock.stop()
+
+    posts = df["URL"].nunique() if not df.empty else 0
+    comments = len(df)
+    minutes = elapsed / 60
+    return {
+        "mode": args.mode,
+        "posts_expected": len(mock.posts),
+        "comments_expected": sum(len(p["comments"]) for p in mock.posts),
+        "posts_scraped": int(posts),
+        "comments_scraped": int(comments),
+        "elapsed_s": round(elapsed, 2),
+        "posts_per_min": round(posts / minutes, 2) if minutes else 0.0,
+        "comments_per_min": round(comments / minutes, 2) if minutes else 0.0,
+        "browser_peak_rss_mb": round(memory.peak_rss / 2**20, 1) if memory.samples else None,
+        "http_requests": mock.requests_served,
+        "metrics": REGISTRY.summary()["metrics"],
+    }
+
+
+if __name__ == "__main__":
+    parser = add_arguments(argparse.ArgumentParser(description="Benchmark scrape_instagram against the mock site"))
+    parser.add_argument("--mode", choices=["traverse", "fanout"], default="traverse")
+    parser.add_argument("--workers", type=int, default=3, help="browser workers in fanout mode")
+    parser.add_argument("--json", help="write the full report to this path")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print("\n📊 Scraper benchmark")
+    for key, value in report.items():
+        if key != "metrics":
+            print(f"   {key:<22} {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\n✅ Report saved to {args.json}")
@@ -0,0 +1,57 @@
+# ----------------------------------
+# benchmarks/bench_truncation.py
+# Latency / accuracy trade-off of MuRILSentiment's max_length + truncation
+# settings. Labels from the full 512-token budget are the reference.
+#
+#   python benchmarks/bench_truncation.py scraped_data_x.csv --configs 64:head_tail 128:head_tail 128:window
+# ----------------------------------
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_CONFIGS = ["64:head_tail", "128:head", "128:head_tail", "128:window", "256:head_tail"]
+
+
+def run(model, texts, max_length, truncation):
+    model.max_length, model.truncation = max_length, truncation
+    started = time.perf_counter()
+    results = model.predict_batch(texts)
+    return [label for label, _ in results], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment truncation latency/accuracy benchmark")
+    parser.add_argument("csv", help="scraped CSV with a Comments column")
+    parser.add_argument("--sample", type=int, default=2000, help="comments to score (default 2000)")
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS, help="max_length:truncation pairs")
+    args = parser.parse_args()
+
+    import pandas as pd
+    import sentiment_model
+
+    comments = pd.read_csv(args.csv, encoding="utf-8-sig")["Comments"].dropna().astype(str)
+    texts = comments.sample(min(args.sample, len(comments)), random_state=0).tolist()
+    model = sentiment_model.get_model()
+    lengths = [len(ids) for ids in model.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+    long_mask = [n > 128 - model.tokenizer.num_special_tokens_to_add() for n in lengths]
+    print(f"📏 {len(texts)} comments, tokens p50={sorted(lengths)[len(lengths) // 2]} max={max(lengths)}, "
+          f"{sum(long_mask)} longer than 128")
+
+    reference, ref_s = run(model, texts, 512, "head")
+    print(f"\n{'config':<16} {'seconds':>8} {'speedup':>8} {'agree %':>8} {'agree long %':>13}")
+    print(f"{'512:head':<16} {ref_s:>8.2f} {1.0:>8.2f} {100.0:>8.1f} {100.0:>13.1f}")
+    for config in args.configs:
+        max_length, truncation = config.split(":")
+        labels, seconds = run(model, texts, int(max_length), truncation)
+        agree = [a == b for a, b in zip(labels, reference)]
+        long_agree = [a for a, is_long in zip(agree, long_mask) if is_long]
+        long_pct = 100 * sum(long_agree) / len(long_agree) if long_agree else float("nan")
+        print(f"{config:<16} {seconds:>8.2f} {ref_s / seconds:>8.2f} {100 * sum(agree) / len(agree):>8.1f} {long_pct:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
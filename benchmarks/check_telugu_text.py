@@ -0,0 +1,74 @@
+# ----------------------------------
+# benchmarks/check_telugu_text.py
+# Regression check for text normalization on Telugu: word pairs that differ
+# only in a vowel sign / virama have opposite or unrelated meanings and must
+# never share a dedup key, be clustered together, or match each other in
+# comment search. Exits non-zero on failure.
+#
+#   python benchmarks/check_telugu_text.py
+# ----------------------------------
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# (a, b): must stay apart
+DISTINCT_PAIRS = [
+    ("చాలా బాగుంది", "చాలా బాగోదు"),   # very good / won't be good
+    ("మంచి", "మంచు"),                  # good / snow
+    ("నచ్చింది", "నచ్చలేదు"),           # liked / didn't like
+]
+# (a, b): must collapse to the same key
+SAME_PAIRS = [
+    ("Super sir!!! 👏👏👏", "super   sir 👏"),
+    ("చాలా బాగుంది!!!", "చాలా   బాగుంది"),
+]
+
+
+def check_dedup():
+    from dedup import cluster_near_duplicates, normalize_comment
+
+    failures = []
+    for a, b in DISTINCT_PAIRS:
+        if normalize_comment(a) == normalize_comment(b):
+            failures.append(f"dedup key collision: {a!r} / {b!r} -> {normalize_comment(a)!r}")
+        clusters = cluster_near_duplicates([a, b])
+        if clusters[0] == clusters[1]:
+            failures.append(f"clustered together: {a!r} / {b!r}")
+    for a, b in SAME_PAIRS:
+        if normalize_comment(a) != normalize_comment(b):
+            failures.append(f"dedup keys differ: {normalize_comment(a)!r} / {normalize_comment(b)!r}")
+    return failures
+
+
+def check_search():
+    import pandas as pd
+    from search_index import CommentSearchIndex
+
+    failures = []
+    texts = [text for pair in DISTINCT_PAIRS for text in pair]
+    index = CommentSearchIndex.from_frame(pd.DataFrame({"Comments": texts}))
+    for a, b in DISTINCT_PAIRS:
+        # Query with the word that differs, e.g. "బాగుంది" must not hit "బాగోదు"
+        word = a.split()[-1]
+        hits = {texts[pos] for pos, _ in index.search(word)}
+        if a not in hits:
+            failures.append(f"search {word!r} missed {a!r}")
+        if b in hits:
+            failures.append(f"search {word!r} matched {b!r}")
+    index.close()
+    return failures
+
+
+def main():
+    failures = check_dedup() + check_search()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Telugu dedup keys and search terms keep vowel signs apart")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# ----------------------------------
+# benchmarks/fake_github.py
+# Local stand-in for the GitHub Actions endpoints dispatch.py uses:
+# workflow_dispatch, run listing / lookup, run artifacts and zip download.
+# Each dispatched run is titled like scraper.yml's run-name, stays queued for
+# --queue-ms, then "scrapes" for --seconds-per-profile per profile and
+# completes with a synthetic CSV artifact.
+#
+#   python benchmarks/fake_github.py --port 8766
+#   GITHUB_API_URL=http://127.0.0.1:8766 streamlit run app.py
+# ----------------------------------
+import argparse
+import csv
+import io
+import json
+import re
+import threading
+import time
+import zipfile
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RUN_NAME = "Instagram Scraper {artifact_name} [{correlation_id}]"
+CSV_COLUMNS = ["username", "Post_Number", "URL", "Date", "Time", "Likes", "Caption", "Hashtags", "Comments", "Comment_ID"]
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeGitHub:
+    def __init__(self, seconds_per_profile=1.0, queue_ms=200, fail_profiles=(), comments_per_profile=5,
+                 host="127.0.0.1", port=0):
+        self.seconds_per_profile = seconds_per_profile
+        self.queue_delay = queue_ms / 1000.0
+        self.fail_profiles = set(fail_profiles)
+        self.comments_per_profile = comments_per_profile
+        self.host = host
+        self.port = port
+        self.runs = {}
+        self.dispatches = 0
+        self._lock = threading.Lock()
+        self._next_id = 1000
+        self._server = None
+        self._thread = None
+
+    # ------------------------
+    # Run lifecycle
+    # ------------------------
+    def _create_run(self, workflow_id, inputs):
+        profiles = [p for p in inputs.get("profile_url", "").split(",") if p]
+        with self._lock:
+            self._next_id += 1
+            run_id = self._next_id
+            self.dispatches += 1
+            self.runs[run_id] = {
+                "id": run_id,
+                "workflow_id": workflow_id,
+                "inputs": inputs,
+                "profiles": profiles,
+                "created": time.time(),
+                "duration": self.queue_delay + self.seconds_per_profile * len(profiles),
+                "display_title": RUN_NAME.format(
+                    artifact_name=inputs.get("artifact_name", ""), correlation_id=inputs.get("correlation_id", "")
+                ),
+            }
+        return run_id
+
+    def _view(self, run):
+        elapsed = time.time() - run["created"]
+        if elapsed < self.queue_delay:
+            status, conclusion = "queued", None
+        elif elapsed < run["duration"]:
+            status, conclusion = "in_progress", None
+        else:
+            status = "completed"
+            conclusion = "failure" if self.fail_profiles & set(run["profiles"]) else "success"
+        return {
+            "id": run["id"], "name": "Instagram Scraper", "display_title": run["display_title"],
+            "event": "workflow_dispatch", "status": status, "conclusion": conclusion,
+            "created_at": _iso(run["created"]),
+        }
+
+    def _artifact_zip(self, run):
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        day = datetime.fromtimestamp(run["created"], timezone.utc).strftime("%Y-%m-%d")
+        for profile in run["profiles"]:
+            user = profile.rstrip("/").split("/")[-1]
+            url = f"https://www.instagram.com/p/{user}{run['id']}/"
+            for i in range(self.comments_per_profile):
+                first = i == 0
+                writer.writerow({
+                    "username": user, "Post_Number": 1, "URL": url,
+                    "Date": day if first else "", "Time": "10:30:00" if first else "",
+                    "Likes": 100 if first else "", "Caption": f"post by {user}" if first else "",
+                    "Hashtags": "#Fake" if first else "", "Comments": f"comment {i} for {user}",
+                    "Comment_ID": f"{user}-{run['id']}-{i}",
+                })
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, "w") as archive:
+            archive.writestr(f"{run['inputs'].get('artifact_name', 'scraped_data')}.csv", buf.getvalue().encode("utf-8-sig"))
+        return out.getvalue()
+
+    # ------------------------
+    # HTTP
+    # ------------------------
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                m = re.fullmatch(r"/repos/[^/]+/[^/]+/actions/workflows/([^/]+)/dispatches", self.path)
+                if not m:
+                    return self._json({"message": "Not Found"}, 404)
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                fake._create_run(m.group(1), body.get("inputs", {}))
+                self.send_response(204)
+                self.end_headers()
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if m := re.fullmatch(r"/repos/[^/]+/[^/]+/actions/workflows/([^/]+)/runs", path):
+                    with fake._lock:
+                        runs = [r for r in fake.runs.values() if r["workflow_id"] == m.group(1)]
+                    views = [fake._view(r) for r in sorted(runs, key=lambda r: r["created"], reverse=True)]
+                    return self._json({"total_count": len(views), "workflow_runs": views})
+                if m := re.fullmatch(r"/repos/[^/]+/[^/]+/actions/runs/(\d+)", path):
+                    run = fake.runs.get(int(m.group(1)))
+                    return self._json(fake._view(run)) if run else self._json({"message": "Not Found"}, 404)
+                if m := re.fullmatch(r"/repos/[^/]+/[^/]+/actions/runs/(\d+)/artifacts", path):
+                    run = fake.runs.get(int(m.group(1)))
+                    if not run:
+                        return self._json({"message": "Not Found"}, 404)
+                    artifacts = []
+                    if fake._view(run)["status"] == "completed":
+                        artifacts.append({
+                            "name": run["inputs"].get("artifact_name"),
+                            "archive_download_url": f"{fake.base_url}/download/{run['id']}",
+                        })
+                    return self._json({"total_count": len(artifacts), "artifacts": artifacts})
+                if m := re.fullmatch(r"/download/(\d+)", path):
+                    data = fake._artifact_zip(fake.runs[int(m.group(1))])
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/zip")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return None
+                return self._json({"message": "Not Found"}, 404)
+
+            def _json(self, payload, status=200):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake GitHub Actions API")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seconds-per-profile", type=float, default=1.0)
+    parser.add_argument("--queue-ms", type=int, default=200)
+    args = parser.parse_args()
+    with FakeGitHub(args.seconds_per_profile, args.queue_ms, port=args.port) as fake:
+        print(f"🧪 Fake GitHub API at {fake.base_url}")
+        print(f"   GITHUB_API_URL={fake.base_url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,67 @@
+# ----------------------------------
+# benchmarks/import_time.py
+# Startup profile: `python -X importtime` per module + wall-clock import time.
+#
+#   python benchmarks/import_time.py                      # default module set
+#   python benchmarks/import_time.py sentiment_model torch
+# ----------------------------------
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "streamlit" is the baseline the dashboard's first render should approach.
+DEFAULT_MODULES = ["streamlit", "hashtags", "sentiment_model", "scraper"]
+
+
+def profile_import(module, top=10):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+
+    # Lines look like: "import time:       123 |       4567 | package.sub"
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_part, cumulative_part, name = line[len("import time:"):].split("|", 2)
+            entries.append((name.strip(), int(self_part), int(cumulative_part)))
+        except ValueError:
+            continue
+
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "wall_s": wall,
+        "modules_loaded": len(entries),
+        "cumulative_s": max((e[2] for e in entries), default=0) / 1e6,
+        "top": sorted(entries, key=lambda e: e[2], reverse=True)[:top],
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else "",
+    }
+
+
+def main(modules):
+    print(f"{'module':<20} {'wall (s)':>9} {'import (s)':>11} {'#modules':>9}")
+    reports = [profile_import(m) for m in modules]
+    for r in reports:
+        status = "" if r["ok"] else f"  ⚠️ {r['error']}"
+        print(f"{r['module']:<20} {r['wall_s']:>9.3f} {r['cumulative_s']:>11.3f} {r['modules_loaded']:>9}{status}")
+
+    for r in reports:
+        if not r["top"]:
+            continue
+        print(f"\n📦 Heaviest imports under `{r['module']}` (cumulative):")
+        for name, self_us, cumulative_us in r["top"]:
+            print(f"   {cumulative_us / 1e3:>9.1f} ms  (self {self_us / 1e3:>7.1f} ms)  {name}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DEFAULT_MODULES)
@@ -0,0 +1,242 @@
+# ----------------------------------
+# benchmarks/mock_instagram.py
+# Local fixture server with synthetic profile / post pages laid out with the
+# DOM structure scraper.py expects (absolute modal XPaths, next button,
+# "load more" comments pagination). Deterministic for a given seed.
+#
+#   python benchmarks/mock_instagram.py --posts 20 --comments 120 --latency-ms 50
+# ----------------------------------
+import argparse
+import html
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# XPaths in scraper.py, split into segments ("div[3]" = 2 empty siblings first).
+PROFILE_GRID_PATH = "div[1]/div/div/div[2]/div/div/div[1]/div[2]/div[2]/section/main/div/div/div[2]/div/div/div/div"
+MODAL_ARTICLE_PATH = "div[1]/div/div[3]/div/div/div/div/div[2]/div/article"  # under body/div[4|5]
+ARTICLE_BODY_PATH = "div/div[2]/div/div/div[2]"
+LIKES_PATH = "section[2]/div/div/span/div/span"
+CAPTION_PATH = "div/div/div[2]/div[1]/h1"           # under ul/div[1]/li
+COMMENT_PATH = "div/div/div[2]/div[1]/span"          # under container/div/ul/div/li
+
+WORDS_EN = ["super", "worst", "great", "bagundi", "chala", "manchi", "waste", "sir", "jai", "anna", "nice", "bad", "cm", "govt"]
+WORDS_TE = ["చాలా", "బాగుంది", "మంచి", "చెత్త", "అన్న", "జై", "ప్రభుత్వం"]
+TAGS = ["#Telangana", "#AndhraPradesh", "#తెలుగు", "#Hyderabad", "#Politics", "#News", "#Vizag"]
+
+
+def _segment(tag_spec):
+    m = re.fullmatch(r"(\w+)(?:\[(\d+)\])?", tag_spec)
+    return m.group(1), int(m.group(2) or 1)
+
+
+def nest(path, inner):
+    # Wrap `inner` so that `path` (relative XPath of plain steps) resolves to it
+    html_out = inner
+    for spec in reversed(path.split("/")):
+        tag, index = _segment(spec)
+        html_out = f"<{tag}></{tag}>" * (index - 1) + f"<{tag}>{html_out}</{tag}>"
+    return html_out
+
+
+class MockInstagram:
+    def __init__(self, username="mock_user", posts=10, comments=60, page_size=15,
+                 latency_ms=0, load_more_ms=150, days_between=1, seed=13, host="127.0.0.1", port=0):
+        self.username = username
+        self.page_size = page_size
+        self.latency = latency_ms / 1000.0
+        self.load_more_ms = load_more_ms
+        self.host = host
+        self.port = port
+        self.requests_served = 0
+        self._server = None
+        self._thread = None
+
+        rng = random.Random(seed)
+        today = datetime.now(timezone.utc).replace(hour=10, minute=30, second=0, microsecond=0)
+        self.posts = []
+        for i in range(posts):
+            post_comments = []
+            for _ in range(comments):
+                words = WORDS_TE if rng.random() < 0.3 else WORDS_EN
+                post_comments.append(" ".join(rng.choice(words) for _ in range(rng.randint(2, 9))))
+            self.posts.append({
+                "id": f"MOCK{i:05d}",
+                "datetime": (today - timedelta(days=i * days_between)).isoformat().replace("+00:00", "Z"),
+                "likes": f"{rng.randint(100, 99999):,}",
+                "caption": f"Post {i} " + " ".join(rng.sample(TAGS, 2)) + "#glued",
+                "comments": post_comments,
+            })
+        self._by_id = {p["id"]: i for i, p in enumerate(self.posts)}
+
+    def add_comments(self, index, texts, at=0):
+        # New comments for refresh mode; `at` places them further down, as the
+        # relevance-ordered modal on the live site does
+        self.posts[index]["comments"][at:at] = list(texts)
+
+    # ------------------------
+    # Page rendering
+    # ------------------------
+    def post_url(self, index):
+        return f"{self.base_url}/p/{self.posts[index]['id']}/"
+
+    def render_profile(self):
+        rows = []
+        for start in range(0, len(self.posts), 3):
+            cells = "".join(
+                f'<div><a href="/p/{p["id"]}/">post {start + j}</a></div>'
+                for j, p in enumerate(self.posts[start:start + 3])
+            )
+            rows.append(f"<div>{cells}</div>")
+        body = nest(PROFILE_GRID_PATH, "".join(rows))
+        return f"<html><head><title>{self.username}</title></head><body>{body}</body></html>"
+
+    def _comment_html(self, text):
+        return nest("div/ul/div/li/" + COMMENT_PATH, html.escape(text))
+
+    def render_post(self, index):
+        post = self.posts[index]
+        first_page = "".join(self._comment_html(c) for c in post["comments"][:self.page_size])
+        remaining = post["comments"][self.page_size:]
+        load_more = '<li><div><button type="button" onclick="loadMore(this)">Load more</button></div></li>' if remaining else ""
+
+        ul = (
+            f"<div>{nest('li/' + CAPTION_PATH, html.escape(post['caption']))}</div>"
+            "<div></div>"
+            f"<div><div><div id=\"comments\">{first_page}{load_more}</div></div></div>"
+        )
+        article_body = (
+            f"{nest(LIKES_PATH, post['likes'])}"
+            f"<div><ul>{ul}</ul></div>"
+            f'<time datetime="{post["datetime"]}">{post["datetime"][:10]}</time>'
+        )
+        article = nest(ARTICLE_BODY_PATH, article_body)
+
+        next_btn = ""
+        if index + 1 < len(self.posts):
+            next_href = f"/p/{self.posts[index + 1]['id']}/"
+            next_btn = (
+                f'<div class="_aaqg _aaqh"><button class="_abl-" type="button" '
+                f"onclick=\"location.href='{next_href}'\">Next</button></div>"
+            )
+
+        # First post opens in body/div[5], later ones in body/div[4] (as on the live site)
+        modal_slot = 5 if index == 0 else 4
+        modal = nest(f"div[{modal_slot}]/{MODAL_ARTICLE_PATH}", article)
+        script = f"""
+<script>
+var pending = {json.dumps(remaining, ensure_ascii=False)};
+var pageSize = {self.page_size};
+function loadMore(btn) {{
+  setTimeout(function () {{
+    var box = document.getElementById("comments");
+    var li = btn.closest("li");
+    pending.splice(0, pageSize).forEach(function (text) {{
+      var tpl = document.createElement("template");
+      tpl.innerHTML = {json.dumps(self._comment_html("__TEXT__"))}.replace("__TEXT__", text.replace(/&/g, "&amp;").replace(/</g, "&lt;"));
+      box.insertBefore(tpl.content.firstChild, li);
+    }});
+    if (!pending.length) li.remove();
+  }}, {self.load_more_ms});
+}}
+</script>"""
+        return f"<html><head><title>{post['id']}</title></head><body>{modal}{next_btn}{script}</body></html>"
+
+    # ------------------------
+    # Server
+    # ------------------------
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def profile_url(self):
+        return f"{self.base_url}/{self.username}/"
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                mock.requests_served += 1
+                if mock.latency:
+                    time.sleep(mock.latency)
+                path = self.path.split("?", 1)[0]
+                if path == f"/{mock.username}/":
+                    self._send(mock.render_profile())
+                elif path.startswith("/p/") and path.strip("/").split("/")[-1] in mock._by_id:
+                    self._send(mock.render_post(mock._by_id[path.strip("/").split("/")[-1]]))
+                elif path == "/":
+                    self._send("<html><body><div>mock instagram</div></body></html>")
+                else:
+                    self._send("<html><body>not found</body></html>", status=404)
+
+            def _send(self, body, status=200):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_arguments(parser):
+    parser.add_argument("--username", default="mock_user")
+    parser.add_argument("--posts", type=int, default=10)
+    parser.add_argument("--comments", type=int, default=60, help="comments per post")
+    parser.add_argument("--page-size", type=int, default=15, help="comments per 'load more' page")
+    parser.add_argument("--latency-ms", type=int, default=0, help="server-side delay per request")
+    parser.add_argument("--load-more-ms", type=int, default=150, help="client-side delay per 'load more'")
+    parser.add_argument("--days-between", type=int, default=1, help="days between consecutive posts")
+    parser.add_argument("--seed", type=int, default=13)
+    return parser
+
+
+def from_args(args, port=0):
+    return MockInstagram(
+        username=args.username, posts=args.posts, comments=args.comments, page_size=args.page_size,
+        latency_ms=args.latency_ms, load_more_ms=args.load_more_ms, days_between=args.days_between,
+        seed=args.seed, port=port,
+    )
+
+
+if __name__ == "__main__":
+    parser = add_arguments(argparse.ArgumentParser(description="Serve a synthetic Instagram profile"))
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    with from_args(args, port=args.port) as mock:
+        print(f"🧪 Mock Instagram at {mock.profile_url} ({len(mock.posts)} posts)")
+        print(f"   INSTAGRAM_BASE_URL={mock.base_url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,168 @@
+# browser_watchdog.py
+# Samples Chrome memory while a long scrape runs: JS heap / DOM nodes via CDP
+# Performance.getMetrics and, when psutil is installed, browser + renderer RSS.
+# When a threshold is crossed it tells the scraper to recycle the tab (cheap)
+# or the whole browser (frees everything). Every sample is appended to a
+# JSONL trace so thresholds can be tuned from real runs.
+import json
+import os
+import threading
+import time
+
+from metrics import REGISTRY, log
+
+DEFAULT_TRACE_PATH = os.environ.get("SCRAPER_WATCHDOG_TRACE", "watchdog_trace.jsonl")
+# Profiles scrape in parallel threads and share one trace file
+_TRACE_LOCK = threading.Lock()
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class BrowserWatchdog:
+    def __init__(self, driver, max_heap_mb=None, max_nodes=None, max_rss_mb=None, check_every=None,
+                 trace_path=DEFAULT_TRACE_PATH, label=""):
+        self.max_heap_mb = max_heap_mb or _env_float("WATCHDOG_MAX_HEAP_MB", 512)
+        self.max_nodes = max_nodes or _env_float("WATCHDOG_MAX_NODES", 150000)
+        self.max_rss_mb = max_rss_mb or _env_float("WATCHDOG_MAX_RSS_MB", 2048)
+        self.check_every = int(check_every or _env_float("WATCHDOG_CHECK_EVERY", 5))
+        self.trace_path = trace_path
+        self.label = label
+        self.recycles = 0
+        self._last_recycle_kind = None
+        self._started = time.perf_counter()
+        self._cdp_handle = None
+        self.attach(driver)
+
+        self._heap_gauge = REGISTRY.gauge("browser_js_heap_mb", "JS heap used at the last watchdog sample")
+        self._nodes_gauge = REGISTRY.gauge("browser_dom_nodes", "DOM nodes at the last watchdog sample")
+        self._rss_gauge = REGISTRY.gauge("browser_rss_mb", "Browser + renderer RSS at the last watchdog sample")
+        self._sample_seconds = REGISTRY.histogram("watchdog_sample_seconds", help="Cost of one watchdog sample")
+        self._recycled = REGISTRY.counter("browser_recycles_total", "Tabs / browsers recycled by the watchdog")
+
+    def attach(self, driver):
+        # Called again after the scraper replaces the browser
+        self.driver = driver
+        self._cdp_handle = None
+        try:
+            import psutil
+            self._process = psutil.Process(driver.service.process.pid)
+        except Exception:
+            self._process = None
+
+    def due(self, post_count):
+        return post_count > 1 and post_count % self.check_every == 0
+
+    # ------------------------
+    # Sampling
+    # ------------------------
+    def _cdp_metrics(self):
+        # Performance domain is per target, so re-enable after a tab switch
+        handle = self.driver.current_window_handle
+        if handle != self._cdp_handle:
+            self.driver.execute_cdp_cmd("Performance.enable", {})
+            self._cdp_handle = handle
+        result = self.driver.execute_cdp_cmd("Performance.getMetrics", {})
+        return {m["name"]: m["value"] for m in result.get("metrics", [])}
+
+    def _rss(self):
+        # chromedriver's children are the browser, GPU, utility and renderer processes
+        if self._process is None:
+            return None, None
+        total = renderers = 0
+        try:
+            for child in self._process.children(recursive=True):
+                try:
+                    rss = child.memory_info().rss
+                    total += rss
+                    if "--type=renderer" in " ".join(child.cmdline()):
+                        renderers += rss
+                except Exception:
+                    continue
+        except Exception:
+            return None, None
+        return total / 1e6, renderers / 1e6
+
+    def sample(self, post_count=None, post_url=None):
+        started = time.perf_counter()
+        try:
+            perf = self._cdp_metrics()
+        except Exception as e:
+            log(f"⚠️ Watchdog could not read CDP metrics: {e}", verbose=True)
+            perf = {}
+        rss_mb, renderer_mb = self._rss()
+        sample = {
+            "t": round(time.perf_counter() - self._started, 2),
+            "label": self.label,
+            "post": post_count,
+            "url": post_url,
+            "js_heap_mb": round(perf.get("JSHeapUsedSize", 0) / 1e6, 1),
+            "js_heap_total_mb": round(perf.get("JSHeapTotalSize", 0) / 1e6, 1),
+            "dom_nodes": int(perf.get("Nodes", 0)),
+            "documents": int(perf.get("Documents", 0)),
+            "listeners": int(perf.get("JSEventListeners", 0)),
+            "layout_seconds": round(perf.get("LayoutDuration", 0), 3),
+            "script_seconds": round(perf.get("ScriptDuration", 0), 3),
+            "rss_mb": None if rss_mb is None else round(rss_mb, 1),
+            "renderer_rss_mb": None if renderer_mb is None else round(renderer_mb, 1),
+            "recycles": self.recycles,
+        }
+        self._sample_seconds.observe(time.perf_counter() - started)
+        self._heap_gauge.set(sample["js_heap_mb"])
+        self._nodes_gauge.set(sample["dom_nodes"])
+        if rss_mb is not None:
+            self._rss_gauge.set(sample["rss_mb"])
+        self._trace(sample)
+        return sample
+
+    def _trace(self, record):
+        if not self.trace_path:
+            return
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with _TRACE_LOCK, open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass
+
+    # ------------------------
+    # Decision
+    # ------------------------
+    def check(self, post_count=None, post_url=None):
+        # Returns (kind, reason) with kind "tab" / "browser", or (None, None)
+        sample = self.sample(post_count, post_url)
+        if sample["rss_mb"] is not None and sample["rss_mb"] > self.max_rss_mb:
+            return "browser", f"RSS {sample['rss_mb']:.0f} MB > {self.max_rss_mb:.0f} MB"
+        reason = None
+        if sample["js_heap_mb"] > self.max_heap_mb:
+            reason = f"JS heap {sample['js_heap_mb']:.0f} MB > {self.max_heap_mb:.0f} MB"
+        elif sample["dom_nodes"] > self.max_nodes:
+            reason = f"{sample['dom_nodes']} DOM nodes > {self.max_nodes:.0f}"
+        if reason is None:
+            self._last_recycle_kind = None
+            return None, None
+        # A fresh tab that is already over the limit again means the browser itself leaks
+        kind = "browser" if self._last_recycle_kind == "tab" else "tab"
+        return kind, reason
+
+    def recorded(self, kind, reason, seconds, post_count=None, post_url=None):
+        self.recycles += 1
+        self._last_recycle_kind = kind
+        self._recycled.inc()
+        REGISTRY.histogram("browser_recycle_seconds", help="Time to recycle and resume").observe(seconds)
+        self._trace({"t": round(time.perf_counter() - self._started, 2), "label": self.label, "post": post_count,
+                     "url": post_url, "event": f"recycle_{kind}", "reason": reason, "seconds": round(seconds, 2)})
+        print(f"♻️ Recycled {kind} at post {post_count} ({reason}) in {seconds:.1f}s")
+
+
+def recycle_tab(driver):
+    # Fresh renderer state for the same browser session (cookies are kept)
+    old = driver.current_window_handle
+    driver.switch_to.new_window("tab")
+    new = driver.current_window_handle
+    driver.switch_to.window(old)
+    driver.close()
+    driver.switch_to.window(new)
+    return driver
@@ -0,0 +1,209 @@
+# charts.py
+# Plotly figures for the dashboard. Multi-entity views (several profiles or
+# posts) are drawn as one faceted figure instead of one figure per entity;
+# past FACET_LIMIT entities they collapse to a single stacked bar / heatmap
+# aggregated here, and long line charts switch to WebGL traces. Build time
+# and JSON payload size of every figure go to the metrics registry.
+import os
+import time
+
+import pandas as pd
+
+from metrics import REGISTRY, SIZE_BUCKETS
+
+SENTIMENTS = ["🙂 Positive", "😡 Negative", "😐 Neutral"]
+SENTIMENT_COLORS = {"🙂 Positive": "green", "😡 Negative": "red", "😐 Neutral": "gray"}
+_LABEL_TO_SENTIMENT = {"Positive": "🙂 Positive", "Negative": "😡 Negative", "Neutral": "😐 Neutral"}
+
+# Small multiples up to this many entities, one aggregated figure beyond it
+FACET_LIMIT = int(os.environ.get("CHART_FACET_LIMIT", "12"))
+FACET_WRAP = 4
+# Entities drawn individually in the aggregated view; the rest become "Other"
+MAX_ENTITIES = int(os.environ.get("CHART_MAX_ENTITIES", "40"))
+# Line charts with more points than this use Scattergl
+WEBGL_POINTS = int(os.environ.get("CHART_WEBGL_POINTS", "1000"))
+
+
+def payload_bytes(fig):
+    return len(fig.to_json().encode("utf-8"))
+
+
+def _finish(fig, kind, started):
+    REGISTRY.histogram("chart_build_seconds", help="Plotly figure build time").observe(time.perf_counter() - started)
+    REGISTRY.histogram(
+        "chart_payload_kb", buckets=SIZE_BUCKETS, help="Plotly figure JSON size (KB)"
+    ).observe(payload_bytes(fig) / 1024)
+    REGISTRY.counter(f"charts_{kind}_total", f"{kind} figures built").inc()
+    return fig
+
+
+def _strip_facet_titles(fig):
+    # "username=foo" -> "foo"
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=", 1)[-1]))
+
+
+# ------------------------
+# Aggregation
+# ------------------------
+def sentiment_by(frame: pd.DataFrame, by, weights: pd.Series) -> pd.DataFrame:
+    # Weighted sentiment shares per entity in one groupby: columns by, Sentiment, Percentage, Comments
+    labels = frame["Sentiment_label"].astype(str).str.strip().str.title().map(_LABEL_TO_SENTIMENT)
+    counts = weights.groupby([frame[by], labels], observed=True).sum().unstack(fill_value=0)
+    counts = counts.reindex(columns=SENTIMENTS, fill_value=0)
+    totals = counts.sum(axis=1)
+    counts = counts[totals > 0]
+    shares = counts.div(totals[totals > 0], axis=0) * 100
+    table = shares.rename_axis(index=by, columns="Sentiment").stack().rename("Percentage").reset_index()
+    table["Comments"] = table[by].map(totals).astype(int)
+    # Plain strings so facets / "Other" rows never see unused categories
+    table[by] = table[by].astype(str)
+    return table
+
+
+def _limit_entities(table, by, value, limit):
+    # Keep the `limit` entities with the most comments, fold the rest into one row group
+    totals = table.groupby(by, observed=True)["Comments"].first().sort_values(ascending=False)
+    if len(totals) <= limit:
+        return table, list(totals.index)
+    keep = list(totals.index[:limit])
+    rest = table[~table[by].isin(keep)]
+    other = f"Other ({len(totals) - limit})"
+    # Comment-weighted mean share of the folded entities
+    weighted = (rest[value] * rest["Comments"]).groupby(rest["Sentiment"], observed=True).sum()
+    folded = pd.DataFrame({
+        by: other,
+        "Sentiment": weighted.index,
+        value: (weighted / totals.iloc[limit:].sum()).values,
+        "Comments": int(totals.iloc[limit:].sum()),
+    })
+    table = pd.concat([table[table[by].isin(keep)], folded], ignore_index=True)
+    return table, keep + [other]
+
+
+# ------------------------
+# Figures
+# ------------------------
+def sentiment_bar(shares, title="Sentiment Distribution", title_x=0.2):
+    import plotly.express as px
+
+    started = time.perf_counter()
+    data = pd.DataFrame({"Sentiment": SENTIMENTS, "Percentage": [shares.get(s.split(" ", 1)[1], 0.0) for s in SENTIMENTS]})
+    fig = px.bar(
+        data, x="Sentiment", y="Percentage", text="Percentage", color="Sentiment",
+        color_discrete_map=SENTIMENT_COLORS, title=title,
+    )
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside', marker_line_width=0.5)
+    fig.update_layout(
+        title_x=title_x, yaxis_title="Percentage", xaxis_title="", showlegend=False,
+        uniformtext_minsize=12, uniformtext_mode='hide',
+        yaxis=dict(range=[0, data["Percentage"].max() + 5]),  # margin so text labels aren't cut
+    )
+    return _finish(fig, "sentiment_bar", started)
+
+
+def hashtag_bar(tags: pd.DataFrame, title="Top 10 Hashtags", title_x=0.5):
+    import plotly.express as px
+
+    started = time.perf_counter()
+    fig = px.bar(
+        tags.sort_values("Frequency", ascending=False), x="Frequency", y="Hashtag", orientation='h',
+        text="Frequency", labels={"Frequency": "Count", "Hashtag": "Hashtags"}, title=title,
+    )
+    fig.update_traces(
+        texttemplate='%{text}', textposition='inside', textangle=0, insidetextanchor='middle',
+        marker_color='lightblue', cliponaxis=False,
+    )
+    fig.update_layout(
+        title_x=title_x, yaxis=dict(autorange="reversed"), xaxis_title="Frequency", yaxis_title="Hashtags",
+        uniformtext_minsize=12, uniformtext_mode='hide', bargap=0.3,
+    )
+    return _finish(fig, "hashtag_bar", started)
+
+
+def sentiment_multiples(table: pd.DataFrame, by, title="Sentiment Distribution"):
+    # table from sentiment_by(); one subplot per entity, or one stacked bar row per entity
+    import plotly.express as px
+
+    started = time.perf_counter()
+    entities = table[by].nunique()
+    if entities <= FACET_LIMIT:
+        rows = -(-entities // FACET_WRAP)
+        fig = px.bar(
+            table, x="Sentiment", y="Percentage", text="Percentage", color="Sentiment",
+            color_discrete_map=SENTIMENT_COLORS, facet_col=by, facet_col_wrap=FACET_WRAP,
+            facet_row_spacing=0.12 / max(rows, 1), category_orders={"Sentiment": SENTIMENTS}, title=title,
+        )
+        fig.update_traces(texttemplate='%{text:.0f}%', textposition='outside', marker_line_width=0.5, cliponaxis=False)
+        fig.update_xaxes(showticklabels=False, title="")
+        fig.update_yaxes(range=[0, 110], title="")
+        fig.update_layout(height=80 + 240 * rows, legend_title_text="")
+        _strip_facet_titles(fig)
+        return _finish(fig, "sentiment_multiples", started)
+
+    # Too many panels: one horizontal 100% stacked bar per entity, three traces total
+    table, order = _limit_entities(table, by, "Percentage", MAX_ENTITIES)
+    fig = px.bar(
+        table, x="Percentage", y=by, color="Sentiment", orientation='h',
+        color_discrete_map=SENTIMENT_COLORS, hover_data={"Comments": True},
+        category_orders={by: order, "Sentiment": SENTIMENTS}, title=title,
+    )
+    fig.update_layout(
+        barmode="stack", height=120 + 22 * len(order), xaxis=dict(range=[0, 100], title="Percentage"),
+        yaxis_title="", legend_title_text="",
+    )
+    return _finish(fig, "sentiment_stacked", started)
+
+
+def hashtag_multiples(tags: pd.DataFrame, by, title="Top Hashtags", top=15):
+    # tags: columns by, Hashtag, Frequency (top-k per entity)
+    import plotly.express as px
+
+    started = time.perf_counter()
+    entities = tags[by].nunique()
+    if entities <= FACET_LIMIT:
+        rows = -(-entities // FACET_WRAP)
+        fig = px.bar(
+            tags, x="Frequency", y="Hashtag", orientation='h', text="Frequency", facet_col=by,
+            facet_col_wrap=FACET_WRAP, facet_row_spacing=0.12 / max(rows, 1), title=title,
+        )
+        fig.update_traces(textposition='inside', insidetextanchor='middle', marker_color='lightblue')
+        # Each profile has its own top tags, so y axes must not be shared
+        fig.update_yaxes(matches=None, showticklabels=True, autorange="reversed", title="")
+        fig.update_xaxes(title="")
+        fig.update_layout(height=80 + 300 * rows, bargap=0.3)
+        _strip_facet_titles(fig)
+        return _finish(fig, "hashtag_multiples", started)
+
+    # Profiles x most frequent tags as one heatmap
+    grid = tags.pivot_table(index=by, columns="Hashtag", values="Frequency", aggfunc="sum", fill_value=0, observed=True)
+    grid = grid[grid.sum().nlargest(top).index]
+    grid = grid.loc[grid.sum(axis=1).nlargest(MAX_ENTITIES).index]
+    fig = px.imshow(grid, aspect="auto", color_continuous_scale="Blues", labels={"color": "Count"}, title=title)
+    fig.update_layout(height=120 + 22 * len(grid), xaxis_title="", yaxis_title="")
+    return _finish(fig, "hashtag_heatmap", started)
+
+
+def trend_line(data: pd.DataFrame, x, y, color, labels=None, title=None):
+    import plotly.express as px
+
+    started = time.perf_counter()
+    render_mode = "webgl" if len(data) > WEBGL_POINTS else "svg"
+    fig = px.line(data, x=x, y=y, color=color, labels=labels, title=title, render_mode=render_mode)
+    return _finish(fig, f"trend_{render_mode}", started)
+
+
+def stage_icicle(table: pd.DataFrame, wall_seconds, title="Report pipeline stages"):
+    # table from profiling.ProfileRun.stage_table(); nested stages drawn as a flame-style icicle
+    import plotly.graph_objects as go
+
+    started = time.perf_counter()
+    ids = ["run"] + table["stage"].tolist()
+    parents = [""] + [s.rsplit(" / ", 1)[0] if " / " in s else "run" for s in table["stage"]]
+    labels = ["run"] + [s.rsplit(" / ", 1)[-1] for s in table["stage"]]
+    values = [wall_seconds] + table["seconds"].tolist()
+    fig = go.Figure(go.Icicle(
+        ids=ids, parents=parents, labels=labels, values=values, branchvalues="total",
+        tiling=dict(orientation="v"), hovertemplate="%{label}: %{value:.3f}s<extra></extra>",
+    ))
+    fig.update_layout(title=title, margin=dict(t=40, l=0, r=0, b=0), height=360)
+    return _finish(fig, "stage_icicle", started)
@@ -0,0 +1,169 @@
+# comment_store.py
+# Local SQLite store of scraped posts and comments, keyed by a stable comment
+# ID so refreshes can tell which comments are already known.
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.environ.get("IG_STORE_PATH", "instagram_store.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    url            TEXT PRIMARY KEY,
+    username       TEXT,
+    post_number    INTEGER,
+    date           TEXT,
+    time           TEXT,
+    likes          TEXT,
+    caption        TEXT,
+    hashtags       TEXT,
+    last_refreshed REAL
+);
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id       TEXT PRIMARY KEY,
+    url              TEXT NOT NULL,
+    text             TEXT,
+    scraped_at       REAL,
+    sentiment_label  TEXT,
+    confidence_score REAL,
+    sentiment_score  INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_comments_url ON comments(url);
+"""
+
+
+def comment_id(post_url, text, occurrence=0):
+    # Stable per (post, text, n-th copy of that text): every "Nice" / "❤️" on a
+    # post is its own comment. The first copy keeps the original (post, text) ID.
+    key = f"{post_url.split('?')[0]}\n{(text or '').strip()}"
+    if occurrence:
+        key += f"\n#{occurrence}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class OccurrenceCounter:
+    # Hands out comment IDs in reading order, numbering repeats of a text per post
+    def __init__(self, post_url):
+        self.post_url = post_url
+        self.seen = {}
+
+    def next_id(self, text):
+        key = (text or "").strip()
+        occurrence = self.seen.get(key, 0)
+        self.seen[key] = occurrence + 1
+        return comment_id(self.post_url, text, occurrence)
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value
+
+
+def _text(value):
+    value = _clean(value)
+    return None if value is None else str(value)
+
+
+class CommentStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # ------------------------
+    # Writes
+    # ------------------------
+    def ingest_frame(self, df: pd.DataFrame):
+        # Accepts the scraper CSV layout (post fields on the first row of each post),
+        # with or without sentiment columns. Returns the number of new comments.
+        if df.empty:
+            return 0
+        now = time.time()
+        if "Date" in df.columns:
+            posts = df[df["Date"].notna() & (df["Date"].astype(str) != "")].drop_duplicates("URL")
+        else:
+            posts = df.iloc[0:0]
+        post_rows = [
+            (r["URL"], r.get("username"), _clean(r.get("Post_Number")), str(r["Date"])[:10], _text(r.get("Time")),
+             _text(r.get("Likes")), _clean(r.get("Caption")), _clean(r.get("Hashtags")), now)
+            for r in posts.to_dict("records")
+        ]
+        comments = df[df["Comments"].notna()]
+        occurrence = comments.groupby(
+            [comments["URL"], comments["Comments"].astype(str).str.strip()], sort=False
+        ).cumcount()
+        given = comments["Comment_ID"] if "Comment_ID" in comments.columns else pd.Series(None, index=comments.index)
+        # CSVs written before per-occurrence IDs repeat one ID for every copy of a text
+        repeated = given.duplicated() & given.notna()
+        comment_rows = []
+        for r, n, cid, again in zip(comments.to_dict("records"), occurrence, given, repeated):
+            if not isinstance(cid, str) or again:
+                cid = comment_id(r["URL"], r["Comments"], n)
+            comment_rows.append((
+                cid, r["URL"], r["Comments"], now,
+                _clean(r.get("Sentiment_label")), _clean(r.get("Confidence_score")), _clean(r.get("Sentiment_score")),
+            ))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET "
+                "likes = excluded.likes, last_refreshed = excluded.last_refreshed",
+                post_rows,
+            )
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?)", comment_rows)
+            return self._conn.total_changes - before
+
+    def mark_refreshed(self, url, likes=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE posts SET last_refreshed = ?, likes = COALESCE(?, likes) WHERE url = ?",
+                (time.time(), likes, url),
+            )
+
+    # ------------------------
+    # Reads
+    # ------------------------
+    def known_ids(self, url):
+        with self._lock:
+            rows = self._conn.execute("SELECT comment_id FROM comments WHERE url = ?", (url,)).fetchall()
+        return {r[0] for r in rows}
+
+    def posts(self, usernames=None, since=None):
+        query = "SELECT url, username, post_number, date FROM posts WHERE 1 = 1"
+        params = []
+        if usernames:
+            query += f" AND username IN ({','.join('?' * len(usernames))})"
+            params.extend(usernames)
+        if since:
+            query += " AND date >= ?"
+            params.append(str(since))
+        with self._lock:
+            return pd.read_sql_query(query + " ORDER BY username, post_number", self._conn, params=params)
+
+    def to_frame(self, usernames=None):
+        # Rebuilds the dashboard layout: one row per comment, post fields on the first row
+        query = """
+            SELECT p.username, p.post_number AS Post_Number, p.url AS URL, p.date AS Date, p.time AS Time,
+                   p.likes AS Likes, p.caption AS Caption, p.hashtags AS Hashtags,
+                   c.text AS Comments, c.comment_id AS Comment_ID, c.sentiment_label AS Sentiment_label,
+                   c.confidence_score AS Confidence_score, c.sentiment_score AS Sentiment_score
+            FROM comments c JOIN posts p ON p.url = c.url
+        """
+        params = []
+        if usernames:
+            query += f" WHERE p.username IN ({','.join('?' * len(usernames))})"
+            params.extend(usernames)
+        with self._lock:
+            df = pd.read_sql_query(query + " ORDER BY p.username, p.post_number, c.rowid", self._conn, params=params)
+        repeat = df["URL"].duplicated()
+        df.loc[repeat, ["Date", "Time", "Likes", "Caption", "Hashtags"]] = ""
+        return df
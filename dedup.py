@@ -0,0 +1,115 @@
+# dedup.py
+# Near-duplicate / copy-paste comment clustering (MinHash + LSH) so floods of
+# identical bot comments are scored once and stored once with a Cluster_size.
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# \w misses Indic vowel signs / viramas; dropping them would turn "బాగుంది" and
+# "బాగోదు" into the same consonant skeleton (see hashtags.HASHTAG_PATTERN)
+_NON_WORD = re.compile(r"[^\w\s\u0900-\u0DFF\u200C\u200D]", re.UNICODE)
+_REPEATS = re.compile(r"(.)\1{2,}")
+_SPACES = re.compile(r"\s+")
+
+# Post-level fields live on the first row of each post; such rows are never dropped
+POST_LEVEL_COLUMNS = ("Date", "Caption", "Likes")
+
+
+def normalize_comment(text):
+    # "Super sir!!! 👏👏👏" and "super   sirrr 👏" should shingle the same
+    if not isinstance(text, str):
+        return ""
+    text = _NON_WORD.sub(" ", text.casefold())
+    text = _REPEATS.sub(r"\1\1", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _shingles(text, k):
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in _shingles(text, self.shingle_size)), dtype=np.uint64
+        )
+        # (a * h + b) mod p, truncated to 32 bits; one row per permutation
+        values = (np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return values.min(axis=1)
+
+
+def cluster_near_duplicates(texts, threshold=0.7, num_perm=128, bands=32, shingle_size=5):
+    # Returns, for every input text, the position of its cluster representative
+    # (the first member seen). Exact duplicates after normalization are grouped
+    # directly; MinHash/LSH runs only over the distinct normalized texts.
+    normalized = [normalize_comment(t) for t in texts]
+    first_seen = {}
+    exact_rep = np.empty(len(normalized), dtype=np.int64)
+    for i, text in enumerate(normalized):
+        exact_rep[i] = first_seen.setdefault(text, i)
+
+    unique_pos = np.fromiter(first_seen.values(), dtype=np.int64)
+    parent = {int(p): int(p) for p in unique_pos}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+    rows = num_perm // bands
+    signatures = {}
+    buckets = [{} for _ in range(bands)]
+    for pos in unique_pos:
+        pos = int(pos)
+        text = normalized[pos]
+        if not text:
+            continue
+        sig = hasher.signature(text)
+        signatures[pos] = sig
+        for band in range(bands):
+            key = sig[band * rows:(band + 1) * rows].tobytes()
+            anchor = buckets[band].setdefault(key, pos)
+            if anchor == pos:
+                continue
+            # Verify against the bucket anchor (estimated Jaccard) before merging
+            if np.mean(signatures[anchor] == sig) >= threshold:
+                ra, rb = find(anchor), find(pos)
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+
+    return np.array([find(int(exact_rep[i])) for i in range(len(normalized))], dtype=np.int64)
+
+
+def collapse_near_duplicates(df: pd.DataFrame, clusters, group_column="URL") -> pd.DataFrame:
+    # Keeps one row per (post, cluster); its Cluster_size is the number of rows
+    # it stands for. Rows carrying post-level fields are always kept.
+    df = df.copy()
+    df["Cluster_id"] = clusters
+    keys = [group_column, "Cluster_id"] if group_column in df.columns else ["Cluster_id"]
+
+    duplicate = df.duplicated(keys, keep="first")
+    post_level = pd.Series(False, index=df.index)
+    for col in POST_LEVEL_COLUMNS:
+        if col in df.columns:
+            post_level |= df[col].notna() & (df[col].astype(str) != "")
+    drop = duplicate & ~post_level
+
+    dropped_in_group = drop.groupby([df[k] for k in keys], sort=False, dropna=False).transform("sum")
+    df["Cluster_size"] = np.where(duplicate, 1, 1 + dropped_in_group).astype("int64")
+    return df[~drop].drop(columns=["Cluster_id"]).reset_index(drop=True)
@@ -0,0 +1,198 @@
+# dispatch.py
+# Sharded workflow_dispatch: splits the profile list across N parallel runs of
+# scraper.yml, finds each run by the correlation ID embedded in its run-name
+# (not by "newest run"), waits for all of them and merges their CSVs.
+import os
+import time
+import uuid
+from io import BytesIO
+from zipfile import ZipFile
+
+import pandas as pd
+
+import profiling
+from metrics import REGISTRY, log
+
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+# 0 = one shard per account session (see below)
+DEFAULT_SHARDS = int(os.environ.get("SCRAPER_SHARDS", "0"))
+# Accounts in the workflow's IG_ACCOUNTS_FILE. Every shard is a separate runner
+# whose SessionPool / rate limiter cannot see the others, so shards are capped
+# at accounts x sessions per account and each one gets its own account slice.
+# Without an accounts file every runner would share the built-in cookie set.
+SCRAPER_ACCOUNTS = int(os.environ.get("SCRAPER_ACCOUNTS", "1"))
+SESSIONS_PER_ACCOUNT = int(os.environ.get("IG_SESSIONS_PER_ACCOUNT", "1"))
+
+
+def shard_profiles(profiles, shards):
+    # Round-robin keeps shard sizes within one profile of each other
+    shards = max(1, min(shards, len(profiles)))
+    return [profiles[i::shards] for i in range(shards)]
+
+
+class GitHubActions:
+    def __init__(self, repo, token, api_url=GITHUB_API_URL):
+        import requests
+        self.repo = repo
+        self.base = f"{api_url.rstrip('/')}/repos/{repo}/actions"
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {token}",
+        })
+
+    def dispatch(self, workflow_id, ref, inputs):
+        r = self.session.post(f"{self.base}/workflows/{workflow_id}/dispatches", json={"ref": ref, "inputs": inputs})
+        if r.status_code != 204:
+            raise RuntimeError(f"Failed to trigger workflow: {r.status_code} {r.text}")
+
+    def runs(self, workflow_id, created_after=None):
+        params = {"event": "workflow_dispatch", "per_page": 100}
+        if created_after:
+            params["created"] = f">={created_after}"
+        r = self.session.get(f"{self.base}/workflows/{workflow_id}/runs", params=params)
+        r.raise_for_status()
+        return r.json().get("workflow_runs", [])
+
+    def run(self, run_id):
+        r = self.session.get(f"{self.base}/runs/{run_id}")
+        r.raise_for_status()
+        return r.json()
+
+    def run_artifacts(self, run_id):
+        r = self.session.get(f"{self.base}/runs/{run_id}/artifacts")
+        r.raise_for_status()
+        return r.json().get("artifacts", [])
+
+    def download(self, artifact):
+        r = self.session.get(artifact["archive_download_url"])
+        r.raise_for_status()
+        return r.content
+
+
+class Shard:
+    def __init__(self, index, profiles, correlation_id, artifact_name):
+        self.index = index
+        self.profiles = profiles
+        self.correlation_id = correlation_id
+        self.artifact_name = artifact_name
+        self.run_id = None
+        self.status = "dispatched"
+        self.conclusion = None
+        self.dispatched_at = time.time()
+        self.completed_at = None
+
+    @property
+    def done(self):
+        return self.status == "completed"
+
+    @property
+    def seconds(self):
+        return (self.completed_at or time.time()) - self.dispatched_at
+
+    def as_dict(self):
+        return {
+            "index": self.index, "profiles": self.profiles, "correlation_id": self.correlation_id,
+            "artifact_name": self.artifact_name, "run_id": self.run_id, "status": self.status,
+            "conclusion": self.conclusion, "seconds": round(self.seconds, 1),
+        }
+
+
+class ShardedDispatcher:
+    def __init__(self, api, workflow_id="scraper.yml", ref="main", shards=DEFAULT_SHARDS,
+                 accounts=SCRAPER_ACCOUNTS, sessions_per_account=SESSIONS_PER_ACCOUNT,
+                 poll_interval=6.0, timeout=3600.0):
+        self.api = api
+        self.workflow_id = workflow_id
+        self.ref = ref
+        self.shards = shards
+        self.accounts = max(1, accounts)
+        self.sessions_per_account = max(1, sessions_per_account)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def dispatch(self, profiles, start_date, end_date, username, artifact_prefix):
+        batch_id = uuid.uuid4().hex[:8]
+        shards = []
+        limit = self.accounts * self.sessions_per_account
+        if self.shards > limit:
+            log(f"⚠️ {self.shards} shards requested but only {limit} account sessions; dispatching {limit}")
+        chunks = shard_profiles(profiles, min(self.shards, limit) if self.shards > 0 else limit)
+        for i, chunk in enumerate(chunks):
+            correlation_id = f"{batch_id}-{i}"
+            shard = Shard(i, chunk, correlation_id, f"{artifact_prefix}_s{i}")
+            self.api.dispatch(self.workflow_id, self.ref, {
+                "profile_url": ",".join(chunk),
+                "start_date": str(start_date),
+                "end_date": str(end_date),
+                "username": username,
+                "artifact_name": shard.artifact_name,
+                "correlation_id": correlation_id,
+                # Runner i uses accounts[i::stride] (see session_pool.shard_accounts)
+                "account_index": str(i),
+                "account_stride": str(len(chunks)),
+            })
+            shards.append(shard)
+        REGISTRY.counter("shards_dispatched_total", "Workflow runs dispatched").inc(len(shards))
+        log(f"🚀 Dispatched {len(shards)} shards for {len(profiles)} profiles (batch {batch_id})")
+        return shards
+
+    def _match_runs(self, shards, created_after):
+        # run-name of scraper.yml ends with "[<correlation_id>]"
+        waiting = {f"[{s.correlation_id}]": s for s in shards if s.run_id is None}
+        for run in self.api.runs(self.workflow_id, created_after):
+            title = run.get("display_title") or run.get("name") or ""
+            for marker, shard in list(waiting.items()):
+                if marker in title:
+                    shard.run_id = run["id"]
+                    del waiting[marker]
+
+    def poll(self, shards):
+        # One round of status updates; returns True when every shard finished
+        pending = [s for s in shards if not s.done]
+        if any(s.run_id is None for s in pending):
+            earliest = min(s.dispatched_at for s in shards) - 60  # allow for clock skew
+            self._match_runs(pending, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(earliest)))
+        for shard in pending:
+            if shard.run_id is None:
+                continue
+            run = self.api.run(shard.run_id)
+            shard.status = run.get("status", shard.status)
+            shard.conclusion = run.get("conclusion")
+            if shard.done and shard.completed_at is None:
+                shard.completed_at = time.time()
+                REGISTRY.histogram("shard_seconds", help="Dispatch-to-completion time per shard").observe(shard.seconds)
+        return all(s.done for s in shards)
+
+    def wait(self, shards, on_progress=None):
+        deadline = time.time() + self.timeout
+        while True:
+            finished = self.poll(shards)
+            if on_progress:
+                on_progress(shards)
+            if finished:
+                return True
+            if time.time() > deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    def collect(self, shards):
+        # Concatenates every successful shard's CSV in shard order
+        frames = []
+        for shard in shards:
+            if shard.run_id is None:
+                continue
+            artifact = next((a for a in self.api.run_artifacts(shard.run_id) if a["name"] == shard.artifact_name), None)
+            if artifact is None:
+                log(f"⚠️ Shard {shard.index}: artifact {shard.artifact_name} not found")
+                continue
+            with profiling.stage("download"):
+                payload = self.api.download(artifact)
+            with ZipFile(BytesIO(payload)) as archive, profiling.stage("parse_csv"):
+                for name in archive.namelist():
+                    if name.endswith(".csv"):
+                        with archive.open(name) as f:
+                            frames.append(pd.read_csv(f, encoding="utf-8-sig"))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,266 @@
+# ----------------------------------
+# distill.py
+# Small student for high-volume sentiment scoring: a hashed character n-gram
+# linear model trained on MuRILSentiment's probabilities (soft labels) over
+# the scraped corpus. Pure numpy at inference time, no torch import.
+#
+#   python distill.py train scraped_data_*.csv --out sentiment_student.npz
+#   python distill.py eval scraped_data_x.csv --student sentiment_student.npz
+#
+# Tiers in sentiment_model (SENTIMENT_TIER): full | student | cascade
+# ----------------------------------
+import argparse
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from metrics import REGISTRY
+
+DEFAULT_STUDENT_PATH = "sentiment_student.npz"
+LABELS = ["negative", "neutral", "positive"]
+
+_SPACES = re.compile(r"\s+")
+
+
+def _softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class CharNgramStudent:
+    def __init__(self, n_buckets=1 << 18, ngram_range=(2, 4), labels=LABELS):
+        self.n_buckets = n_buckets
+        self.ngram_range = tuple(ngram_range)
+        self.labels = list(labels)
+        self.weights = np.zeros((n_buckets, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    # ------------------------
+    # Features
+    # ------------------------
+    def features(self, text):
+        # Hashed word unigrams + character n-grams of " word word " (spaces mark word edges)
+        text = _SPACES.sub(" ", text.lower()).strip() if isinstance(text, str) else ""
+        padded = f" {text} "
+        grams = ["w:" + w for w in text.split()]
+        lo, hi = self.ngram_range
+        for n in range(lo, hi + 1):
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        if not grams:
+            return np.zeros(0, dtype=np.int64)
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) % self.n_buckets for g in grams), dtype=np.int64)
+
+    def _logits(self, ids):
+        # Mean of the active rows keeps long and short comments on the same scale
+        if len(ids) == 0:
+            return self.bias.copy()
+        return self.weights[ids].mean(axis=0) + self.bias
+
+    # ------------------------
+    # Training (soft-label cross-entropy, plain SGD)
+    # ------------------------
+    def fit(self, texts, soft_labels, epochs=5, lr=0.5, l2=1e-6, seed=0):
+        targets = np.asarray(soft_labels, dtype=np.float32)
+        feats = [self.features(t) for t in texts]
+        rng = np.random.RandomState(seed)
+        for epoch in range(epochs):
+            loss = 0.0
+            step = lr / (1 + epoch)
+            for i in rng.permutation(len(feats)):
+                ids = feats[i]
+                z = self._logits(ids)
+                p = np.exp(z - z.max())
+                p /= p.sum()
+                grad = p - targets[i]
+                loss -= float(np.dot(targets[i], np.log(p + 1e-9)))
+                if len(ids):
+                    np.add.at(self.weights, ids, -step * (grad / len(ids) + l2 * self.weights[ids]))
+                self.bias -= step * grad
+            print(f"📉 epoch {epoch + 1}/{epochs}: soft-label loss {loss / max(1, len(feats)):.4f}")
+        return self
+
+    # ------------------------
+    # Inference (same contract as MuRILSentiment)
+    # ------------------------
+    def predict_proba(self, texts):
+        if not len(texts):
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        with REGISTRY.timer("student_seconds", "Student model scoring time per batch"):
+            return _softmax(np.stack([self._logits(self.features(t)) for t in texts]))
+
+    def predict_batch(self, texts):
+        from sentiment_model import probs_to_results
+        return probs_to_results(self.predict_proba(texts), self.labels)
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def save(self, path=DEFAULT_STUDENT_PATH):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, n_buckets=self.n_buckets,
+                            ngram_range=np.array(self.ngram_range), labels=np.array(self.labels))
+
+    @classmethod
+    def load(cls, path=DEFAULT_STUDENT_PATH):
+        data = np.load(path)
+        student = cls(int(data["n_buckets"]), tuple(int(n) for n in data["ngram_range"]), [str(l) for l in data["labels"]])
+        student.weights = data["weights"]
+        student.bias = data["bias"]
+        return student
+
+
+class CascadeSentiment:
+    # Student scores everything; comments it is unsure about (top probability
+    # below `threshold`) are re-scored by the full model.
+    def __init__(self, student, teacher, threshold=0.8):
+        self.student = student
+        self.teacher = teacher
+        self.threshold = threshold
+        self.labels = student.labels
+        self._escalated = REGISTRY.counter("cascade_escalated_total", "Comments sent on to the full model")
+        self._kept = REGISTRY.counter("cascade_student_total", "Comments settled by the student")
+
+    def predict_batch(self, texts):
+        from sentiment_model import probs_to_results
+
+        probs = self.student.predict_proba(texts)
+        results = probs_to_results(probs, self.labels)
+        unsure = np.flatnonzero(probs.max(axis=1) < self.threshold)
+        if len(unsure):
+            # Teacher may be the local model or RemoteSentiment; both speak predict_batch
+            for i, result in zip(unsure, self.teacher.predict_batch([texts[i] for i in unsure])):
+                results[i] = result
+        self._escalated.inc(len(unsure))
+        self._kept.inc(len(texts) - len(unsure))
+        return results
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+
+# ------------------------
+# Agreement Metrics
+# ------------------------
+def agreement_report(student_probs, teacher_probs, labels=LABELS, thresholds=(0.6, 0.7, 0.8, 0.9)):
+    # Label agreement overall, per teacher class, and per cascade threshold
+    # (coverage = share the student would keep; agreement = on that share).
+    s_idx = student_probs.argmax(axis=1)
+    t_idx = teacher_probs.argmax(axis=1)
+    agree = s_idx == t_idx
+    report = {
+        "n": int(len(agree)),
+        "agreement": float(agree.mean()) if len(agree) else 0.0,
+        "per_class": {
+            label: float(agree[t_idx == k].mean()) if (t_idx == k).any() else None
+            for k, label in enumerate(labels)
+        },
+        "cascade": [],
+    }
+    confidence = student_probs.max(axis=1)
+    for threshold in thresholds:
+        kept = confidence >= threshold
+        # Escalated comments get the teacher's label, so they always agree
+        report["cascade"].append({
+            "threshold": threshold,
+            "student_share": float(kept.mean()) if len(kept) else 0.0,
+            "student_agreement": float(agree[kept].mean()) if kept.any() else None,
+            "cascade_agreement": float((agree | ~kept).mean()) if len(kept) else 0.0,
+        })
+    return report
+
+
+def print_report(report):
+    print(f"\n🤝 Student vs full model on {report['n']} comments: {report['agreement'] * 100:.1f}% agree")
+    for label, value in report["per_class"].items():
+        print(f"   {label:<9} {'-' if value is None else f'{value * 100:.1f}%'}")
+    print(f"\n{'threshold':>9} {'student share':>14} {'student agree':>14} {'cascade agree':>14}")
+    for row in report["cascade"]:
+        student_agree = "-" if row["student_agreement"] is None else f"{row['student_agreement'] * 100:.1f}%"
+        print(f"{row['threshold']:>9.2f} {row['student_share'] * 100:>13.1f}% {student_agree:>14} "
+              f"{row['cascade_agreement'] * 100:>13.1f}%")
+
+
+# ------------------------
+# Corpus + Teacher Labels
+# ------------------------
+def load_corpus(csv_paths):
+    # Same text the full model sees inside analyze_comments (emojis stripped)
+    import pandas as pd
+    from sentiment_model import strip_emojis
+
+    frames = [pd.read_csv(p, encoding="utf-8-sig", usecols=["Comments"]) for p in csv_paths]
+    comments = pd.concat(frames, ignore_index=True)["Comments"].dropna().astype(str)
+    comments = strip_emojis(comments)
+    return comments[comments != ""].drop_duplicates().tolist()
+
+
+def teacher_probs(texts):
+    import sentiment_model
+    started = time.perf_counter()
+    probs = sentiment_model.get_model().predict_proba(texts)
+    print(f"🧠 Teacher scored {len(texts)} comments in {time.perf_counter() - started:.1f}s")
+    return probs
+
+
+def train(csv_paths, out=DEFAULT_STUDENT_PATH, holdout=0.1, epochs=5, n_buckets=1 << 18, seed=0):
+    texts = load_corpus(csv_paths)
+    if not texts:
+        print("⚠️ No comments found.")
+        return None
+    probs = teacher_probs(texts)
+    order = np.random.RandomState(seed).permutation(len(texts))
+    n_test = int(len(texts) * holdout)
+    test, fit_idx = order[:n_test], order[n_test:]
+
+    student = CharNgramStudent(n_buckets=n_buckets)
+    student.fit([texts[i] for i in fit_idx], probs[fit_idx], epochs=epochs, seed=seed)
+    student.save(out)
+    print(f"💾 Student saved to {out}")
+
+    if n_test:
+        test_texts = [texts[i] for i in test]
+        started = time.perf_counter()
+        student_probs = student.predict_proba(test_texts)
+        elapsed = time.perf_counter() - started
+        print(f"⚡ Student: {n_test / elapsed:.0f} comments/s on the holdout")
+        print_report(agreement_report(student_probs, probs[test], student.labels))
+    return student
+
+
+def evaluate(csv_paths, student_path=DEFAULT_STUDENT_PATH):
+    texts = load_corpus(csv_paths)
+    student = CharNgramStudent.load(student_path)
+    started = time.perf_counter()
+    student_probs = student.predict_proba(texts)
+    student_s = time.perf_counter() - started
+    started = time.perf_counter()
+    probs = teacher_probs(texts)
+    teacher_s = time.perf_counter() - started
+    print(f"⚡ Student {student_s:.2f}s vs full model {teacher_s:.2f}s ({teacher_s / max(student_s, 1e-9):.0f}x)")
+    print_report(agreement_report(student_probs, probs, student.labels))
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Distil MuRILSentiment into a char n-gram student")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_train = sub.add_parser("train", help="label the corpus with the full model and fit the student")
+    p_train.add_argument("csv", nargs="+")
+    p_train.add_argument("--out", default=DEFAULT_STUDENT_PATH)
+    p_train.add_argument("--holdout", type=float, default=0.1, help="share kept out for agreement metrics")
+    p_train.add_argument("--epochs", type=int, default=5)
+    p_train.add_argument("--buckets", type=int, default=1 << 18, help="hashed feature buckets")
+
+    p_eval = sub.add_parser("eval", help="agreement + speed of a trained student against the full model")
+    p_eval.add_argument("csv", nargs="+")
+    p_eval.add_argument("--student", default=DEFAULT_STUDENT_PATH)
+
+    args = parser.parse_args()
+    if args.command == "train":
+        train(args.csv, args.out, args.holdout, args.epochs, args.buckets)
+    else:
+        evaluate(args.csv, args.student)
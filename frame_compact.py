@@ -0,0 +1,127 @@
+# frame_compact.py
+# Memory-compact report layout: post-level fields move to a one-row-per-post
+# table, repeated strings become categoricals, free text becomes Arrow-backed
+# strings and numbers are downcast. flat() rebuilds the scraper CSV layout
+# (post fields on the first row of each post) on demand.
+import pandas as pd
+
+from metrics import REGISTRY, log
+
+# Only present on the first row of each post in the scraper CSV
+FIRST_ROW_COLUMNS = ["Date", "Time", "Likes", "Caption", "Hashtags"]
+# Same value on every row of a post
+PER_POST_COLUMNS = ["username", "Post_Number"]
+CATEGORY_COLUMNS = ["username", "URL", "Sentiment_label"]
+
+
+def _string_dtype():
+    # Arrow-backed strings when pyarrow is installed (it ships with streamlit)
+    try:
+        import pyarrow  # noqa: F401
+        return pd.StringDtype("pyarrow")
+    except ImportError:
+        return pd.StringDtype()
+
+
+def frame_memory(df: pd.DataFrame):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _blank_to_na(series):
+    if series.dtype == object:
+        return series.replace("", pd.NA)
+    return series
+
+
+class CompactReport:
+    def __init__(self, comments: pd.DataFrame, posts: pd.DataFrame, columns, memory_before=None):
+        self.comments = comments
+        self.posts = posts
+        self.columns = list(columns)
+        self.memory_before = memory_before
+
+    @property
+    def memory_bytes(self):
+        return frame_memory(self.comments) + frame_memory(self.posts)
+
+    def flat(self) -> pd.DataFrame:
+        # Original layout: post fields joined back, kept on the first row of each post only
+        first = ~self.comments["URL"].duplicated()
+        post_fields = [c for c in FIRST_ROW_COLUMNS if c in self.posts.columns]
+        df = self.comments.join(self.posts.set_index("URL")[post_fields], on="URL")
+        for col in post_fields:
+            df[col] = df[col].where(first, 0 if col == "Likes" else pd.NA)
+        return df[[c for c in self.columns if c in df.columns]]
+
+
+def compact_frame(df: pd.DataFrame) -> CompactReport:
+    before = frame_memory(df)
+    columns = list(df.columns)
+    df = df.reset_index(drop=True)
+    string_dtype = _string_dtype()
+
+    # ------------------------
+    # Posts table (one row per URL)
+    # ------------------------
+    post_cols = ["URL"] + [c for c in PER_POST_COLUMNS + FIRST_ROW_COLUMNS if c in df.columns]
+    present = df["Date"].notna() & (df["Date"].astype(str) != "") if "Date" in df.columns else pd.Series(True, index=df.index)
+    posts = df.loc[present, post_cols].drop_duplicates("URL")
+    # Posts whose first row lost its date still get a row
+    missing = df.loc[~df["URL"].isin(posts["URL"]), post_cols].drop_duplicates("URL")
+    posts = pd.concat([posts, missing], ignore_index=True)
+    if "Date" in posts.columns:
+        posts["Date"] = pd.to_datetime(_blank_to_na(posts["Date"]), errors="coerce")
+    if "Time" in posts.columns:
+        posts["Time"] = _blank_to_na(posts["Time"].astype(object)).astype(string_dtype)
+    if "Likes" in posts.columns:
+        likes = posts["Likes"].astype(str).str.replace(",", "").str.strip()
+        posts["Likes"] = pd.to_numeric(likes, errors="coerce").fillna(0).astype("int64")
+    for col in ("Caption", "Hashtags"):
+        if col in posts.columns:
+            posts[col] = _blank_to_na(posts[col].astype(object)).astype(string_dtype)
+    if "username" in posts.columns:
+        posts["username"] = posts["username"].astype("category")
+    if "Post_Number" in posts.columns:
+        posts["Post_Number"] = pd.to_numeric(posts["Post_Number"], errors="coerce", downcast="integer")
+
+    # ------------------------
+    # Comments table (one row per comment, post fields dropped)
+    # ------------------------
+    comments = df.drop(columns=[c for c in FIRST_ROW_COLUMNS if c in df.columns])
+    for col in CATEGORY_COLUMNS:
+        if col in comments.columns:
+            comments[col] = comments[col].astype("category")
+    if "Post_Number" in comments.columns:
+        comments["Post_Number"] = pd.to_numeric(comments["Post_Number"], errors="coerce", downcast="integer")
+    for col in ("Comments", "Comment_ID"):
+        if col in comments.columns:
+            comments[col] = _blank_to_na(comments[col].astype(object)).astype(string_dtype)
+    if "Confidence_score" in comments.columns:
+        comments["Confidence_score"] = comments["Confidence_score"].astype("float32")
+    if "Sentiment_score" in comments.columns:
+        comments["Sentiment_score"] = comments["Sentiment_score"].astype("Int8")
+    if "Cluster_size" in comments.columns:
+        comments["Cluster_size"] = pd.to_numeric(comments["Cluster_size"], downcast="integer")
+
+    report = CompactReport(comments, posts, columns, memory_before=before)
+    after = report.memory_bytes
+    REGISTRY.gauge("report_memory_before_bytes", "Report frame memory before compaction").set(before)
+    REGISTRY.gauge("report_memory_after_bytes", "Report frame memory after compaction").set(after)
+    log(f"🗜️ Report memory {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({len(posts)} posts, {len(comments)} rows)")
+    return report
+
+
+def memory_table(df: pd.DataFrame, report: CompactReport) -> pd.DataFrame:
+    # Per-column bytes before / after; post fields are counted in the posts table
+    before = df.memory_usage(index=False, deep=True)
+    after = pd.concat([
+        report.comments.memory_usage(index=False, deep=True),
+        report.posts.drop(columns=["URL"]).memory_usage(index=False, deep=True),
+    ]).groupby(level=0).sum()
+    table = pd.DataFrame({"before_bytes": before, "after_bytes": after}).fillna(0).astype("int64")
+    table["dtype"] = [
+        str(report.comments[c].dtype) if c in report.comments.columns
+        else str(report.posts[c].dtype) if c in report.posts.columns else ""
+        for c in table.index
+    ]
+    return table.sort_values("before_bytes", ascending=False)
@@ -0,0 +1,99 @@
+# hashtags.py
+import re
+import pandas as pd
+
+# ------------------------
+# Hashtag Extraction
+# ------------------------
+# \w alone misses Indic vowel signs / viramas (combining marks), so Telugu and
+# Devanagari blocks plus ZWJ/ZWNJ are added explicitly. "#" is not part of the
+# body, so glued tags like "nice#tag1#tag2" split correctly.
+HASHTAG_PATTERN = re.compile(r"#([\w\u0900-\u0DFF\u200C\u200D]+)", re.UNICODE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_hashtag(tag):
+    return "#" + tag.lstrip("#").casefold()
+
+
+def extract_hashtags(text):
+    if not isinstance(text, str) or "#" not in text:
+        return []
+    return ["#" + m for m in HASHTAG_PATTERN.findall(text)]
+
+
+def split_caption(raw_caption):
+    # Returns (caption without hashtags, comma-joined hashtags) for the CSV row
+    if not raw_caption:
+        return "", ""
+    tags = extract_hashtags(raw_caption)
+    caption_clean = WHITESPACE_PATTERN.sub(" ", HASHTAG_PATTERN.sub(" ", raw_caption)).strip()
+    return caption_clean, ", ".join(tags)
+
+
+# ------------------------
+# Exploded / Categorical Column
+# ------------------------
+def explode_hashtags(df: pd.DataFrame, column="Hashtags") -> pd.DataFrame:
+    # One row per (post, hashtag). Hashtags only live on the first row of each
+    # post, so this touches a handful of rows instead of every comment.
+    cols = [c for c in ("username", "URL", "Date") if c in df.columns]
+    if column not in df.columns:
+        return pd.DataFrame(columns=cols + ["Hashtag"])
+
+    tagged = df.loc[df[column].notna() & (df[column].astype(str) != ""), cols + [column]]
+    tags = tagged[column].astype(str).str.findall(HASHTAG_PATTERN)
+    exploded = tagged[cols].assign(Hashtag=tags).explode("Hashtag").dropna(subset=["Hashtag"])
+    exploded["Hashtag"] = ("#" + exploded["Hashtag"].str.casefold()).astype("category")
+    if "username" in exploded.columns:
+        exploded["username"] = exploded["username"].astype("category")
+    return exploded.reset_index(drop=True)
+
+
+# ------------------------
+# Top-K Index (global + per profile)
+# ------------------------
+def _top_k_frame(counts, k):
+    top = counts.nlargest(k)
+    return pd.DataFrame({"Hashtag": top.index.astype(str), "Frequency": top.values})
+
+
+def build_hashtag_index(df: pd.DataFrame, k=10, exploded=None) -> dict:
+    if exploded is None:
+        exploded = explode_hashtags(df)
+
+    index = {"exploded": exploded, "global": _top_k_frame(exploded["Hashtag"].value_counts(), k), "by_profile": {}}
+    if "username" in exploded.columns and not exploded.empty:
+        per_user = exploded.groupby(["username", "Hashtag"], observed=True).size()
+        for user, counts in per_user.groupby(level=0, observed=True):
+            index["by_profile"][user] = _top_k_frame(counts.droplevel(0), k)
+    return index
+
+
+def top_hashtags(index, username=None):
+    if username is None:
+        return index["global"]
+    return index["by_profile"].get(username, pd.DataFrame({"Hashtag": [], "Frequency": []}))
+
+
+# ------------------------
+# Co-occurrence & Trend Queries
+# ------------------------
+def hashtag_cooccurrence(exploded: pd.DataFrame, top=20) -> pd.DataFrame:
+    pairs = exploded[["URL", "Hashtag"]].astype({"Hashtag": str}).drop_duplicates()
+    merged = pairs.merge(pairs, on="URL", suffixes=("_a", "_b"))
+    merged = merged[merged["Hashtag_a"] < merged["Hashtag_b"]]
+    counts = merged.groupby(["Hashtag_a", "Hashtag_b"]).size().rename("Count")
+    return counts.nlargest(top).reset_index()
+
+
+def hashtag_trend(exploded: pd.DataFrame, hashtags=None, freq="D") -> pd.DataFrame:
+    trend = exploded.assign(Date=pd.to_datetime(exploded["Date"], errors="coerce")).dropna(subset=["Date"])
+    if hashtags is not None:
+        trend = trend[trend["Hashtag"].isin([normalize_hashtag(h) for h in hashtags])]
+    return (
+        trend.groupby([pd.Grouper(key="Date", freq=freq), "Hashtag"], observed=True)
+        .size()
+        .rename("Count")
+        .reset_index()
+    )
@@ -0,0 +1,217 @@
+# ----------------------------------
+# inference_server.py
+# Local sentiment scoring service: one warm MuRILSentiment shared by every
+# dashboard session. Requests from all clients are coalesced into
+# micro-batches (up to --max-batch texts or --max-wait-ms, whichever comes
+# first); when the queue is full new requests get 503 + Retry-After.
+#
+#   python inference_server.py --port 8770
+#   SENTIMENT_SERVER_URL=http://127.0.0.1:8770 streamlit run app.py
+#
+#   POST /predict  {"texts": [...]}  ->  {"results": [["positive", 97.1], ...]}
+#   GET  /health                     ->  {"status": "ok", "queued": 0, ...}
+#   GET  /metrics                    ->  Prometheus text
+# ----------------------------------
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import REGISTRY, SIZE_BUCKETS
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+
+class _Pending:
+    __slots__ = ("texts", "enqueued", "done", "results", "error")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, model, max_batch=64, max_wait_ms=10, max_queue=256):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="sentiment-batcher", daemon=True)
+
+        self._batch_texts = REGISTRY.histogram("server_batch_texts", buckets=SIZE_BUCKETS, help="Texts per micro-batch")
+        self._batch_requests = REGISTRY.histogram("server_batch_requests", buckets=SIZE_BUCKETS, help="Requests coalesced per micro-batch")
+        self._queue_wait = REGISTRY.histogram("server_queue_wait_seconds", help="Time a request waited for its batch")
+        self._rejected = REGISTRY.counter("server_rejected_total", "Requests refused because the queue was full")
+        self._depth = REGISTRY.gauge("server_queue_depth", "Requests waiting for a batch")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    @property
+    def queued(self):
+        return self._queue.qsize()
+
+    def submit(self, texts):
+        # Returns a pending handle, or None when the queue is full (caller sheds load)
+        pending = _Pending(texts)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            self._rejected.inc()
+            return None
+        self._depth.set(self._queue.qsize())
+        return pending
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch, size = [first], len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item.texts)
+        return batch
+
+    def _loop(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            self._depth.set(self._queue.qsize())
+            now = time.monotonic()
+            texts = []
+            for item in batch:
+                self._queue_wait.observe(now - item.enqueued)
+                texts.extend(item.texts)
+            self._batch_texts.observe(len(texts))
+            self._batch_requests.observe(len(batch))
+            try:
+                results = self.model.predict_batch(texts)
+            except Exception as e:
+                for item in batch:
+                    item.error = str(e)
+                    item.done.set()
+                continue
+            offset = 0
+            for item in batch:
+                item.results = results[offset:offset + len(item.texts)]
+                offset += len(item.texts)
+                item.done.set()
+
+
+def make_handler(batcher, model_name, max_request_texts=512, timeout=120.0):
+    requests_total = REGISTRY.counter("server_requests_total", "Scoring requests received")
+    texts_total = REGISTRY.counter("server_texts_total", "Texts scored by the server")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json({"status": "ok", "model": model_name, "queued": batcher.queued,
+                                 "max_batch": batcher.max_batch})
+            elif self.path == "/metrics":
+                self._send(REGISTRY.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            else:
+                self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json({"error": "not found"}, 404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                texts = json.loads(self.rfile.read(length) or b"{}").get("texts")
+            except (ValueError, AttributeError):
+                texts = None
+            if not isinstance(texts, list):
+                self._send_json({"error": "body must be {\"texts\": [...]}"}, 400)
+                return
+            if len(texts) > max_request_texts:
+                self._send_json({"error": f"at most {max_request_texts} texts per request"}, 413)
+                return
+            requests_total.inc()
+
+            pending = batcher.submit(["" if t is None else str(t) for t in texts])
+            if pending is None:
+                self._send_json({"error": "overloaded"}, 503, {"Retry-After": "1"})
+                return
+            if not pending.done.wait(timeout):
+                self._send_json({"error": "timed out waiting for a batch"}, 504)
+                return
+            if pending.error:
+                self._send_json({"error": pending.error}, 500)
+                return
+            texts_total.inc(len(texts))
+            self._send_json({"results": pending.results})
+
+        def _send_json(self, payload, status=200, headers=None):
+            self._send(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", status, headers)
+
+        def _send(self, body, content_type, status=200, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8770, model_name=None, max_batch=64, max_wait_ms=10, max_queue=256,
+          max_request_texts=512):
+    import sentiment_model
+
+    model_name = model_name or sentiment_model.DEFAULT_MODEL_NAME
+    print(f"🧠 Loading {model_name} ...")
+    model = sentiment_model.get_model(model_name)
+    model.batch_size = max_batch  # one micro-batch = one forward pass
+    batcher = MicroBatcher(model, max_batch=max_batch, max_wait_ms=max_wait_ms, max_queue=max_queue).start()
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, model_name, max_request_texts))
+    server.daemon_threads = True
+    print(f"✅ Sentiment server on http://{host}:{server.server_address[1]} "
+          f"(batch ≤ {max_batch}, wait ≤ {max_wait_ms} ms, queue ≤ {max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching sentiment inference server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--model", help="model name (default: sentiment_model.DEFAULT_MODEL_NAME)")
+    parser.add_argument("--max-batch", type=int, default=64, help="texts per forward batch")
+    parser.add_argument("--max-wait-ms", type=float, default=10, help="how long to wait for a batch to fill")
+    parser.add_argument("--max-queue", type=int, default=256, help="queued requests before answering 503")
+    parser.add_argument("--max-request-texts", type=int, default=512, help="texts allowed per request")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.model, args.max_batch, args.max_wait_ms, args.max_queue, args.max_request_texts)
@@ -0,0 +1,179 @@
+# metrics.py
+# Lightweight counters / gauges / histograms for the scraper and sentiment
+# hot paths, exportable as Prometheus text or a JSON run summary.
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Per-comment / per-caption prints are a real cost on large posts.
+# SCRAPER_VERBOSE=0 turns them off; status lines are always printed.
+VERBOSE = os.environ.get("SCRAPER_VERBOSE", "1") != "0"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def log(message, verbose=False):
+    if verbose and not VERBOSE:
+        return
+    print(message)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, buckets=SECONDS_BUCKETS, help=""):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.bucket_counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "buckets": {str(b): c for b, c in zip(self.buckets + ("+Inf",), self.bucket_counts)},
+        }
+
+
+class MetricsRegistry:
+    def __init__(self, prefix="igscraper"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _get(self, cls, name, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help=help)
+
+    def gauge(self, name, help=""):
+        return self._get(Gauge, name, help=help)
+
+    def histogram(self, name, buckets=SECONDS_BUCKETS, help=""):
+        return self._get(Histogram, name, buckets=buckets, help=help)
+
+    @contextmanager
+    def timer(self, name, help=""):
+        hist = self.histogram(name, help=help)
+        start = time.perf_counter()
+        try:
+            yield hist
+        finally:
+            hist.observe(time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self.started_at = time.time()
+
+    # ------------------------
+    # Exporters
+    # ------------------------
+    def summary(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {
+            "started_at": self.started_at,
+            "duration_s": round(time.time() - self.started_at, 3),
+            "metrics": {name: m.snapshot() for name, m in sorted(metrics.items())},
+        }
+
+    def to_json(self, path=None):
+        text = json.dumps(self.summary(), indent=2, default=str)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, path=None):
+        with self._lock:
+            metrics = dict(self._metrics)
+        lines = []
+        for name, m in sorted(metrics.items()):
+            full = f"{self.prefix}_{name}"
+            if m.help:
+                lines.append(f"# HELP {full} {m.help}")
+            lines.append(f"# TYPE {full} {m.kind}")
+            if m.kind == "histogram":
+                cumulative = 0
+                for bound, count in zip(m.buckets + ("+Inf",), m.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{full}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{full}_sum {m.sum}")
+                lines.append(f"{full}_count {m.count}")
+            else:
+                lines.append(f"{full} {m.value}")
+        text = "\n".join(lines) + "\n"
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+
+REGISTRY = MetricsRegistry()
+
+
+def instrument_driver(driver, registry=REGISTRY):
+    # Every Selenium command (get, find_element, execute_script, ...) goes
+    # through WebDriver.execute, so wrapping it counts WebDriver round trips.
+    commands = registry.counter("webdriver_commands_total", "WebDriver round trips")
+    original_execute = driver.execute
+
+    def execute(driver_command, params=None):
+        commands.inc()
+        return original_execute(driver_command, params)
+
+    driver.execute = execute
+    return driver
@@ -0,0 +1,256 @@
+# profiling.py
+# Opt-in profiling of the report pipeline (download -> parse -> clean ->
+# preprocess -> tokenize -> forward -> render). A ProfileRun is bound to the
+# current thread (one Streamlit session), wraps the whole run in pyinstrument
+# (cProfile when it is not installed), optionally torch.profiler around
+# scoring, and times named stages. When no run is active stage() hands back
+# a shared no-op context, so the hooks cost one attribute lookup.
+#
+#   REPORT_PROFILE=1 streamlit run app.py      # or tick "Profile report" in the UI
+import io
+import os
+import sys
+import threading
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+from metrics import REGISTRY, log
+
+ENABLED = os.environ.get("REPORT_PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get("REPORT_PROFILE_DIR", "profiles")
+# "pyinstrument" or "cprofile"; default is pyinstrument when installed
+PROFILE_BACKEND = os.environ.get("REPORT_PROFILE_BACKEND", "")
+TORCH_PROFILE = os.environ.get("REPORT_PROFILE_TORCH", "1") == "1"
+
+_NULL = nullcontext()
+_local = threading.local()
+
+
+def _pick_backend(backend):
+    if backend:
+        return backend
+    try:
+        import pyinstrument  # noqa: F401
+        return "pyinstrument"
+    except ImportError:
+        return "cprofile"
+
+
+class ProfileRun:
+    def __init__(self, out_dir=PROFILE_DIR, backend=PROFILE_BACKEND, torch_trace=TORCH_PROFILE):
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:4]
+        self.out_dir = os.path.join(out_dir, self.run_id)
+        self.backend = _pick_backend(backend)
+        self.torch_trace = torch_trace
+        self.totals = {}  # stage path tuple -> [seconds, calls]
+        self.files = []
+        self.wall_seconds = None
+        self._stack = []
+        self._profiler = None
+        self._started = None
+
+    # ------------------------
+    # Lifecycle
+    # ------------------------
+    def start(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        if self.backend == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+        else:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._started
+        while self._stack:
+            self.end()
+        if self.backend == "pyinstrument":
+            self._profiler.stop()
+            self._write("profile.html", self._profiler.output_html())
+            try:
+                from pyinstrument.renderers import SpeedscopeRenderer
+                self._write("profile.speedscope.json", self._profiler.output(SpeedscopeRenderer()))
+            except ImportError:
+                pass
+        else:
+            import pstats
+            self._profiler.disable()
+            path = os.path.join(self.out_dir, "profile.pstats")
+            self._profiler.dump_stats(path)
+            self.files.append(path)
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            self._write("profile_top.txt", out.getvalue())
+
+        self._profiler = None  # the run stays in session_state; drop the raw samples
+        table = self.stage_table()
+        self._write("stages.csv", table.to_csv(index=False))
+        self._write("stages.folded", self.folded())
+        REGISTRY.histogram("profile_run_seconds", help="Wall time of profiled report runs").observe(self.wall_seconds)
+        log(f"🔬 Profile {self.run_id}: {self.wall_seconds:.2f}s, files in {self.out_dir}")
+        return self
+
+    def discard(self):
+        # Stops the profiler of a run that never reached finish()
+        if self._profiler is None:
+            return
+        if self.backend == "pyinstrument":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        self._profiler = None
+
+    def _write(self, name, text):
+        path = os.path.join(self.out_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.files.append(path)
+
+    # ------------------------
+    # Stages
+    # ------------------------
+    def begin(self, name):
+        self._stack.append((name, time.perf_counter()))
+
+    def end(self):
+        started = self._stack[-1][1]
+        path = tuple(name for name, _ in self._stack)
+        self._stack.pop()
+        entry = self.totals.setdefault(path, [0.0, 0])
+        entry[0] += time.perf_counter() - started
+        entry[1] += 1
+
+    @contextmanager
+    def stage(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    @contextmanager
+    def torch_profile(self):
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        with profile(activities=activities, record_shapes=True) as prof:
+            yield
+        trace = os.path.join(self.out_dir, "torch_trace.json")
+        prof.export_chrome_trace(trace)
+        self.files.append(trace)
+        self._write("torch_ops.txt", prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=30))
+
+    # ------------------------
+    # Reports
+    # ------------------------
+    def _self_seconds(self):
+        own = {path: seconds for path, (seconds, _) in self.totals.items()}
+        for path, (seconds, _) in self.totals.items():
+            parent = path[:-1]
+            if parent in own:
+                own[parent] -= seconds
+        return own
+
+    def stage_table(self) -> pd.DataFrame:
+        own = self._self_seconds()
+        rows = [{
+            "stage": " / ".join(path),
+            "depth": len(path) - 1,
+            "calls": calls,
+            "seconds": round(seconds, 4),
+            "self_seconds": round(max(own[path], 0.0), 4),
+            "pct_of_run": round(seconds / self.wall_seconds * 100, 1) if self.wall_seconds else None,
+        } for path, (seconds, calls) in sorted(self.totals.items())]
+        return pd.DataFrame(rows, columns=["stage", "depth", "calls", "seconds", "self_seconds", "pct_of_run"])
+
+    def folded(self):
+        # Collapsed-stack lines ("run;report;score 1234", microseconds of self time)
+        # for flamegraph.pl / speedscope / inferno
+        own = self._self_seconds()
+        lines = [f"run;{';'.join(path)} {int(max(seconds, 0.0) * 1e6)}" for path, seconds in sorted(own.items())]
+        untracked = (self.wall_seconds or 0.0) - sum(s for p, (s, _) in self.totals.items() if len(p) == 1)
+        if untracked > 0:
+            lines.append(f"run {int(untracked * 1e6)}")
+        return "\n".join(lines) + "\n"
+
+    def zip_bytes(self):
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+            for path in self.files:
+                if os.path.exists(path):
+                    archive.write(path, os.path.join(self.run_id, os.path.basename(path)))
+        return out.getvalue()
+
+
+# ------------------------
+# Thread-bound hooks
+# ------------------------
+def active():
+    return getattr(_local, "run", None)
+
+
+def start_run(**kwargs):
+    # Replaces any run left unfinished by an earlier (stopped) script run
+    stale = active()
+    if stale is not None:
+        stale.discard()
+    run = ProfileRun(**kwargs).start()
+    _local.run = run
+    return run
+
+
+def finish_run():
+    run = active()
+    if run is None:
+        return None
+    _local.run = None
+    return run.finish()
+
+
+def discard_run():
+    # Drops a run cut short by st.stop() or an exception, leaving no profiler enabled
+    run = active()
+    if run is None:
+        return
+    _local.run = None
+    run.discard()
+
+
+def stage(name):
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NULL
+    return run.stage(name)
+
+
+def begin_stage(name):
+    # For stages that span a whole block (dashboard rendering)
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.begin(name)
+
+
+def end_stage():
+    run = getattr(_local, "run", None)
+    if run is not None and run._stack:
+        run.end()
+
+
+def torch_profile():
+    # Only when torch is already loaded (a local model); remote scoring is left alone
+    run = getattr(_local, "run", None)
+    if run is None or not run.torch_trace or "torch" not in sys.modules:
+        return _NULL
+    return run.torch_profile()
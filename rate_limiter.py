@@ -0,0 +1,161 @@
+# rate_limiter.py
+# Per-account pacing for the scraper: token bucket + AIMD rate adaptation,
+# exponential backoff on throttling signals and an hourly action budget.
+import random
+import threading
+import time
+from collections import deque
+
+from metrics import REGISTRY
+
+# URL fragments / page text Instagram shows when it throttles or walls a session
+THROTTLE_URL_MARKERS = ("/challenge", "/accounts/login", "/accounts/suspended", "/checkpoint")
+THROTTLE_TEXT_MARKERS = (
+    "please wait a few minutes",
+    "try again later",
+    "we restrict certain activity",
+    "we limit how often",
+    "suspicious activity",
+    "log in to see",
+)
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+def detect_throttle(driver):
+    # Returns a short reason string when the page looks throttled / login-walled.
+    # Reads page_source, so call it on failure paths rather than every step.
+    try:
+        url = driver.current_url.lower()
+        for marker in THROTTLE_URL_MARKERS:
+            if marker in url:
+                return f"redirected to {marker}"
+        page = driver.page_source.lower()
+    except Exception:
+        return None
+    for marker in THROTTLE_TEXT_MARKERS:
+        if marker in page:
+            return f"page says '{marker}'"
+    return None
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate              # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cost=1.0):
+        # Blocks until `cost` tokens are available; returns seconds waited.
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                delay = (cost - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveRateLimiter:
+    # Additive increase while responses stay healthy, multiplicative decrease
+    # plus exponential backoff whenever a throttling signal is seen.
+    def __init__(self, account="default", rate=0.25, min_rate=0.05, max_rate=0.6,
+                 increase=0.01, decrease=0.5, base_backoff=30.0, max_backoff=900.0,
+                 hourly_budget=600, jitter=0.25):
+        self.account = account
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hourly_budget = hourly_budget
+        self.jitter = jitter
+        self.bucket = TokenBucket(rate)
+        self.consecutive_throttles = 0
+        self.throttle_count = 0
+        self.cooldown_until = 0.0
+        self._actions = deque()
+        self._lock = threading.Lock()
+
+        self._throttles = REGISTRY.counter("throttle_events_total", "Throttling signals detected")
+        self._backoff = REGISTRY.histogram("backoff_seconds", help="Backoff sleeps after throttling")
+        self._wait = REGISTRY.histogram("rate_limit_wait_seconds", help="Pacing waits before an action")
+        self._rate = REGISTRY.gauge(f"rate_{account}", f"Current actions/sec for account {account}")
+        self._rate.set(rate)
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def _check_budget(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._actions and now - self._actions[0] > 3600:
+                self._actions.popleft()
+            if len(self._actions) >= self.hourly_budget:
+                raise RateLimitExceeded(
+                    f"account {self.account} used its budget of {self.hourly_budget} actions/hour"
+                )
+            self._actions.append(now)
+
+    def wait(self, cost=1.0):
+        # Call before each navigation-level action (next post, page load).
+        cooldown = self.cooldown_until - time.monotonic()
+        if cooldown > 0:
+            time.sleep(cooldown)
+        self._check_budget()
+        waited = self.bucket.acquire(cost)
+        # Small jitter so the cadence is not perfectly periodic
+        extra = random.uniform(0, self.jitter / self.rate)
+        time.sleep(extra)
+        self._wait.observe(waited + extra)
+
+    def on_success(self):
+        with self._lock:
+            self.consecutive_throttles = 0
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.increase)
+            self._rate.set(round(self.bucket.rate, 4))
+
+    def on_throttle(self, reason=""):
+        # Returns the backoff (seconds) applied before the next action.
+        with self._lock:
+            self.consecutive_throttles += 1
+            self.throttle_count += 1
+            self.bucket.rate = max(self.min_rate, self.bucket.rate * self.decrease)
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.consecutive_throttles - 1))
+            backoff *= random.uniform(1.0, 1.0 + self.jitter)
+            self.cooldown_until = time.monotonic() + backoff
+            self._rate.set(round(self.bucket.rate, 4))
+        self._throttles.inc()
+        self._backoff.observe(backoff)
+        print(f"🐢 Throttling detected for {self.account} ({reason}); backing off {backoff:.0f}s, rate now {self.rate:.3f}/s")
+        return backoff
+
+
+# ------------------------
+# Shared limiters (one per account, shared across threads)
+# ------------------------
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(account="default", **kwargs):
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(account)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(account, **kwargs)
+            _LIMITERS[account] = limiter
+    return limiter
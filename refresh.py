@@ -0,0 +1,113 @@
+# ----------------------------------
+# refresh.py
+# Differential comment refresh for posts already in the local store.
+#
+#   python refresh.py ingest scraped_data_x.csv            # seed the store
+#   python refresh.py run --profiles user1,user2 --days 7  # fetch + score new comments
+# ----------------------------------
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from comment_store import DEFAULT_STORE_PATH, CommentStore
+from rollups import RollupStore
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+
+def ingest(store, csv_paths):
+    import pandas as pd
+
+    for path in csv_paths:
+        df = pd.read_csv(path, encoding="utf-8-sig")
+        added = store.ingest_frame(df)
+        posts = RollupStore(store.path).update(df)
+        print(f"✅ {path}: {added} new comments stored, {posts} posts rolled up")
+
+
+def refresh(store, usernames=None, days=None, base_url=None, score=True):
+    import pandas as pd
+    import scraper
+    from metrics import REGISTRY
+    from rate_limiter import RateLimitExceeded, get_limiter
+    from session_pool import SessionPool
+
+    since = (datetime.now() - timedelta(days=days)).date() if days else None
+    posts = store.posts(usernames, since)
+    if posts.empty:
+        print("⚠️ No stored posts match; ingest a scrape first.")
+        return pd.DataFrame()
+
+    base_url = (base_url or scraper.DEFAULT_BASE_URL).rstrip("/")
+    pool = SessionPool.from_env(scraper.DEFAULT_COOKIES)
+    new_rows = []
+    refreshed = {}  # url -> like count read during the refresh
+    started = datetime.now()
+
+    with pool.lease() as account:
+        limiter = get_limiter(account.user_id)
+        driver = scraper._build_driver()
+        try:
+            if not scraper._open_session(driver, base_url, account.cookies):
+                return pd.DataFrame()
+            for post in posts.to_dict("records"):
+                url = post["url"]
+                try:
+                    likes, texts, ids = scraper.refresh_post_comments(driver, url, store.known_ids(url), limiter)
+                except RateLimitExceeded as e:
+                    print(f"🛑 {e}. Stopping.")
+                    break
+                except Exception as e:
+                    print(f"⚠️ Could not refresh {url}: {e}")
+                    continue
+                print(f"🔄 {post['username']} #{post['post_number']}: {len(texts)} new comments")
+                store.mark_refreshed(url, likes)
+                refreshed[url] = likes
+                new_rows.extend(
+                    {"username": post["username"], "URL": url, "Comments": t, "Comment_ID": cid}
+                    for t, cid in zip(texts, ids)
+                )
+        finally:
+            driver.quit()
+
+    new_df = pd.DataFrame(new_rows, columns=["username", "URL", "Comments", "Comment_ID"])
+    if not new_df.empty and score:
+        # Score only the new comments, in one batch across all refreshed posts
+        import sentiment_model
+        new_df = sentiment_model.analyze_comments(new_df, column="Comments")
+    added = store.ingest_frame(new_df)
+    if refreshed:
+        # Add only the new comments (and new like counts) to the time-series buckets;
+        # the stored posts keep the weighted counts the report applied
+        RollupStore(store.path).add_comments(new_df, likes=refreshed)
+    REGISTRY.gauge("refresh_seconds", "Wall time of the last refresh run").set(
+        round((datetime.now() - started).total_seconds(), 2)
+    )
+    print(f"\n✅ Refresh complete: {added} new comments across {len(posts)} posts")
+    return new_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh comments for stored posts")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="SQLite store path (IG_STORE_PATH)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="load scraped / analysed CSVs into the store")
+    p_ingest.add_argument("csv", nargs="+")
+
+    p_run = sub.add_parser("run", help="fetch only comments newer than the stored ones")
+    p_run.add_argument("--profiles", help="comma-separated usernames (default: all)")
+    p_run.add_argument("--days", type=int, help="only posts published in the last N days")
+    p_run.add_argument("--base-url", help="override INSTAGRAM_BASE_URL")
+    p_run.add_argument("--no-score", action="store_true", help="store new comments without sentiment")
+
+    args = parser.parse_args()
+    store = CommentStore(args.store)
+    try:
+        if args.command == "ingest":
+            ingest(store, args.csv)
+        else:
+            profiles = [p.strip() for p in args.profiles.split(",") if p.strip()] if args.profiles else None
+            refresh(store, profiles, args.days, args.base_url, score=not args.no_score)
+    finally:
+        store.close()
@@ -0,0 +1,220 @@
+# rollups.py
+# Precomputed daily / hourly buckets of posts, likes, comments and sentiment
+# counts per profile and per hashtag. Each post's contribution is remembered,
+# so re-ingesting a post (new comments, new like count) only applies the delta
+# instead of rebuilding every bucket.
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+
+import pandas as pd
+
+from comment_store import DEFAULT_STORE_PATH
+from hashtags import HASHTAG_PATTERN
+from metrics import REGISTRY
+
+DEFAULT_ROLLUP_PATH = os.environ.get("IG_ROLLUP_PATH", DEFAULT_STORE_PATH)
+
+GRANULARITIES = ("day", "hour")
+MEASURES = ("posts", "likes", "comments", "positive", "negative", "neutral")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_posts (
+    url       TEXT PRIMARY KEY,
+    username  TEXT,
+    ts        TEXT,
+    likes     REAL,
+    comments  REAL,
+    positive  REAL,
+    negative  REAL,
+    neutral   REAL,
+    hashtags  TEXT
+);
+CREATE TABLE IF NOT EXISTS rollup_buckets (
+    granularity TEXT NOT NULL,
+    dimension   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    bucket      TEXT NOT NULL,
+    posts       REAL DEFAULT 0,
+    likes       REAL DEFAULT 0,
+    comments    REAL DEFAULT 0,
+    positive    REAL DEFAULT 0,
+    negative    REAL DEFAULT 0,
+    neutral     REAL DEFAULT 0,
+    PRIMARY KEY (granularity, dimension, key, bucket)
+);
+"""
+
+
+def comment_counts(df: pd.DataFrame) -> pd.DataFrame:
+    # Per post URL: comment and sentiment counts, weighted by Cluster_size when
+    # near-duplicates were collapsed
+    comments = df["Comments"].replace("", pd.NA) if "Comments" in df.columns else pd.Series(pd.NA, index=df.index)
+    weights = df["Cluster_size"].fillna(1) if "Cluster_size" in df.columns else pd.Series(1, index=df.index)
+    weights = weights.where(comments.notna(), 0)
+    if "Sentiment_label" in df.columns:
+        labels = df["Sentiment_label"].astype(str).str.strip().str.lower()
+    else:
+        labels = pd.Series("", index=df.index)
+    counts = pd.DataFrame({"url": df["URL"], "comments": weights})
+    for sentiment in ("positive", "negative", "neutral"):
+        counts[sentiment] = weights.where(labels == sentiment, 0)
+    return counts.groupby("url", sort=False).sum()
+
+
+def parse_likes(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values.astype(str).str.replace(",", "").str.strip(), errors="coerce")
+
+
+def post_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    # One row per post: publish timestamp, likes, comment and sentiment counts
+    columns = ["url", "username", "ts", "likes", "comments", "positive", "negative", "neutral", "hashtags"]
+    if df.empty or "URL" not in df.columns or "Date" not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    counts = comment_counts(df)
+
+    # Post-level fields sit on the first row of each post
+    dates = pd.to_datetime(df["Date"].replace("", pd.NA), errors="coerce")
+    posts = df[dates.notna()].drop_duplicates("URL")
+    times = posts["Time"].astype(str) if "Time" in posts.columns else pd.Series("", index=posts.index)
+    ts = pd.to_datetime(
+        dates[posts.index].dt.strftime("%Y-%m-%d") + " " + times.where(times.str.match(r"^\d{1,2}:\d{2}"), "00:00:00"),
+        errors="coerce",
+    ).fillna(dates[posts.index])
+    likes = parse_likes(posts["Likes"]) if "Likes" in posts.columns else pd.Series(0, index=posts.index)
+    tags = posts["Hashtags"] if "Hashtags" in posts.columns else pd.Series("", index=posts.index)
+
+    out = pd.DataFrame({
+        "url": posts["URL"].values,
+        "username": posts["username"].values if "username" in posts.columns else None,
+        "ts": ts.dt.strftime("%Y-%m-%d %H:%M:%S").values,
+        "likes": likes.fillna(0).values,
+        "hashtags": [
+            ",".join(sorted({"#" + t.casefold() for t in HASHTAG_PATTERN.findall(s)})) if isinstance(s, str) else ""
+            for s in tags
+        ],
+    })
+    out = out.join(counts, on="url").fillna({"comments": 0, "positive": 0, "negative": 0, "neutral": 0})
+    return out[columns]
+
+
+def _bucket(ts, granularity):
+    return ts[:10] if granularity == "day" else ts[:13] + ":00"
+
+
+def _accumulate(deltas, post, sign):
+    values = (1, post["likes"], post["comments"], post["positive"], post["negative"], post["neutral"])
+    keys = [("profile", post["username"] if isinstance(post["username"], str) else "")]
+    keys += [("hashtag", tag) for tag in (post["hashtags"] or "").split(",") if tag]
+    for granularity in GRANULARITIES:
+        bucket = _bucket(post["ts"], granularity)
+        for dimension, key in keys:
+            acc = deltas[(granularity, dimension, key, bucket)]
+            for i, v in enumerate(values):
+                acc[i] += sign * (v or 0)
+
+
+class RollupStore:
+    def __init__(self, path=DEFAULT_ROLLUP_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # ------------------------
+    # Incremental update
+    # ------------------------
+    def update(self, df: pd.DataFrame):
+        # Replaces the contribution of every post in df; returns the number of posts applied
+        posts = post_aggregates(df)
+        if posts.empty:
+            return 0
+        with self._lock, self._conn:
+            self._replace(posts.to_dict("records"))
+        return len(posts)
+
+    def add_comments(self, df: pd.DataFrame, likes=None):
+        # Refresh path: adds only the new comments in df (and the refreshed like
+        # counts, {url: "1,234"}) to posts already rolled up. Rebuilding those posts
+        # from the comment store would lose the Cluster_size weighting they were
+        # applied with. Returns the number of posts changed.
+        counts = comment_counts(df) if "URL" in df.columns else pd.DataFrame()
+        likes = {url: v for url, v in (likes or {}).items() if v is not None}
+        parsed = parse_likes(pd.Series(likes, dtype=object)) if likes else pd.Series(dtype=float)
+        urls = list(dict.fromkeys([*counts.index, *likes]))
+        if not urls:
+            return 0
+        with self._lock, self._conn:
+            records = []
+            for post in self._load(urls):
+                post = dict(post)
+                if post["url"] in counts.index:
+                    for m in ("comments", "positive", "negative", "neutral"):
+                        post[m] = (post[m] or 0) + float(counts.at[post["url"], m])
+                if post["url"] in parsed.index and pd.notna(parsed[post["url"]]):
+                    post["likes"] = float(parsed[post["url"]])
+                records.append(post)
+            self._replace(records)
+        return len(records)
+
+    def _load(self, urls):
+        posts = []
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            cursor = self._conn.execute(f"SELECT * FROM rollup_posts WHERE url IN ({','.join('?' * len(chunk))})", chunk)
+            names = [d[0] for d in cursor.description]
+            posts.extend(dict(zip(names, row)) for row in cursor.fetchall())
+        return posts
+
+    def _replace(self, records):
+        # Swaps the stored contribution of each post for `records`; caller holds the lock
+        if not records:
+            return
+        deltas = defaultdict(lambda: [0.0] * len(MEASURES))
+        for post in self._load([r["url"] for r in records]):
+            _accumulate(deltas, post, -1)
+        for post in records:
+            _accumulate(deltas, post, +1)
+        assignments = ", ".join(f"{m} = {m} + excluded.{m}" for m in MEASURES)
+        self._conn.executemany(
+            f"INSERT INTO rollup_buckets (granularity, dimension, key, bucket, {', '.join(MEASURES)}) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(granularity, dimension, key, bucket) DO UPDATE SET {assignments}",
+            [(*k, *v) for k, v in deltas.items() if any(v)],
+        )
+        self._conn.execute("DELETE FROM rollup_buckets WHERE posts <= 0")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO rollup_posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [tuple(r.values()) for r in records],
+        )
+        REGISTRY.counter("rollup_posts_applied_total", "Posts applied to time-series rollups").inc(len(records))
+
+    # ------------------------
+    # Reads
+    # ------------------------
+    def trend(self, dimension="profile", keys=None, granularity="day", since=None, until=None):
+        # Bucket rows only; shares are derived from the stored sentiment counts
+        query = f"SELECT key, bucket, {', '.join(MEASURES)} FROM rollup_buckets WHERE granularity = ? AND dimension = ?"
+        params = [granularity, dimension]
+        if keys:
+            keys = list(keys)
+            query += f" AND key IN ({','.join('?' * len(keys))})"
+            params.extend(keys)
+        if since:
+            query += " AND bucket >= ?"
+            params.append(str(since))
+        if until:
+            query += " AND bucket <= ?"
+            params.append(str(until)[:10] + " ~")  # "~" sorts after every hour of that day
+        with self._lock:
+            df = pd.read_sql_query(query + " ORDER BY key, bucket", self._conn, params=params)
+        df["bucket"] = pd.to_datetime(df["bucket"])
+        scored = df[["positive", "negative", "neutral"]].sum(axis=1)
+        for sentiment in ("positive", "negative", "neutral"):
+            df[f"{sentiment}_pct"] = (df[sentiment] / scored.where(scored > 0) * 100).round(1)
+        return df
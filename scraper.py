@@ -1,27 +1,61 @@
 import os
 import time
-import random
-import pandas as pd
 import sys
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-# import undetected_chromedriver as uc
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import json
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-def scrape_instagram(profile_url, start_date, end_date, username=None):
-    # Generate output filename dynamically
+# Overridable so the scraper can be driven against benchmarks/mock_instagram.py
+DEFAULT_BASE_URL = os.environ.get("INSTAGRAM_BASE_URL", "https://www.instagram.com").rstrip("/")
+
+# Built-in session used when no encrypted account pool is configured (see session_pool.py)
+DEFAULT_COOKIES = [
+    {"name": "csrftoken", "value": "bMpnP6wxDxhEY7dvyovVr7MQpoToKtDU", "domain": ".instagram.com", "path": "/"},
+    {"name": "datr",      "value": "BYzwaMODPk1FrOWDRvKdP-MI", "domain": ".instagram.com", "path": "/"},
+    {"name": "dpr",       "value": "1.25", "domain": ".instagram.com", "path": "/"},
+    {"name": "ds_user_id","value": "72782729777", "domain": ".instagram.com", "path": "/"},
+    {"name": "ig_did",    "value": "356B55F2-C173-46CA-BF6B-B6A34260D7AD", "domain": ".instagram.com", "path": "/"},
+    {"name": "mid",       "value": "aPCMBQALAAEuhO8RpUZ7vfEg8cCZ", "domain": ".instagram.com", "path": "/"},
+    {"name": "rur",       "value": "CCO\05472782729777\0541801380319:01fe1f9ac4ae3c36b9846041754eeafc2efe0c05e6525e983405e2ae6c522b4c2e552678", "domain": ".instagram.com", "path": "/"},
+    {"name": "sessionid", "value": "72782729777%3AbgAPAqZK1POmna%3A26%3AAYgsjyJZ00dRx948maKIToFL50pv5QJbTuRQGYQDmA", "domain": ".instagram.com", "path": "/"},
+    {"name": "wd",        "value": "150x730", "domain": ".instagram.com", "path": "/"},
+]
+
+# Standalone post pages (/p/<id>/ opened directly, as in fan-out mode) render the
+# same article as the modal, just not under body/div[4|5]; anchor on <article>.
+POST_BODY_XPATH = '//article/div/div[2]/div/div/div[2]'
+POST_LIKES_XPATH = POST_BODY_XPATH + '/section[2]/div/div/span/div/span'
+POST_COMMENTS_XPATH = POST_BODY_XPATH + '/div[1]/ul/div[3]/div/div'
+POST_CAPTION_XPATH = POST_BODY_XPATH + '/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1'
+
+# Attempts per post (exceptions or throttled "next") before giving up on the profile
+MAX_POST_RETRIES = 3
+
+# Refresh mode stops paginating after this many stored comments in a row
+REFRESH_KNOWN_RUN = int(os.environ.get("REFRESH_KNOWN_RUN", "30"))
+
+USAGE = "Usage: python scraper.py <profile_url(s) comma-separated> <start_date> <end_date> <username> <artifact_name>"
+
+def output_filename(profile_url, start_date, end_date):
     start_str = datetime.strptime(start_date, "%Y-%m-%d").strftime("%m-%d")
     end_str = datetime.strptime(end_date, "%Y-%m-%d").strftime("%m-%d")
     insta_user = profile_url.strip("/").split("/")[-1]
-    output_file = f"{start_str}_{end_str}_{insta_user}.csv"
+    return f"{start_str}_{end_str}_{insta_user}.csv"
+
+
+def _normalize_profile_url(profile_url, base_url):
+    if not profile_url.startswith("http"):
+        profile_url = f"{base_url}/{profile_url.strip().strip('/')}/"
+    return profile_url
+
+
+def _build_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    # import undetected_chromedriver as uc
+    from metrics import instrument_driver
 
     # Chrome options
     chrome_options = Options()
@@ -29,6 +63,8 @@ def scrape_instagram(profile_url, start_date, end_date, username=None):
     chrome_options.add_argument("--disable-notifications")
     chrome_options.add_argument("--start-maximized")
     # chrome_options.add_argument("--headless=new")
+    if os.environ.get("SCRAPER_HEADLESS") == "1":
+        chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--window-size=1920,1080")
     
@@ -63,49 +99,253 @@ def scrape_instagram(profile_url, start_date, end_date, username=None):
     service = Service()  # Add path if chromedriver not in PATH
     driver = webdriver.Chrome(service=service, options=chrome_options)
     # driver = uc.Chrome(options=chrome_options)
-    wait = WebDriverWait(driver, 10)
+    instrument_driver(driver)
+    return driver
+
+
+def _open_session(driver, base_url, cookies):
+    from metrics import REGISTRY
 
     # Open Instagram main page
-    driver.get("https://www.instagram.com/")
+    with REGISTRY.timer("page_load_seconds", "driver.get() wall time"):
+        driver.get(f"{base_url}/")
     print("🔄 Opening Instagram...")
     time.sleep(5)
 
     # ------------------------
-    # Login via hardcoded cookies
+    # Login via cookies (leased from the session pool, or the built-in set)
     # ------------------------
     try:
-        cookies = [
-            {"name": "csrftoken", "value": "bMpnP6wxDxhEY7dvyovVr7MQpoToKtDU", "domain": ".instagram.com", "path": "/"},
-            {"name": "datr",      "value": "BYzwaMODPk1FrOWDRvKdP-MI", "domain": ".instagram.com", "path": "/"},
-            {"name": "dpr",       "value": "1.25", "domain": ".instagram.com", "path": "/"},
-            {"name": "ds_user_id","value": "72782729777", "domain": ".instagram.com", "path": "/"},
-            {"name": "ig_did",    "value": "356B55F2-C173-46CA-BF6B-B6A34260D7AD", "domain": ".instagram.com", "path": "/"},
-            {"name": "mid",       "value": "aPCMBQALAAEuhO8RpUZ7vfEg8cCZ", "domain": ".instagram.com", "path": "/"},
-            {"name": "rur",       "value": "CCO\05472782729777\0541801380319:01fe1f9ac4ae3c36b9846041754eeafc2efe0c05e6525e983405e2ae6c522b4c2e552678", "domain": ".instagram.com", "path": "/"},
-            {"name": "sessionid", "value": "72782729777%3AbgAPAqZK1POmna%3A26%3AAYgsjyJZ00dRx948maKIToFL50pv5QJbTuRQGYQDmA", "domain": ".instagram.com", "path": "/"},
-            {"name": "wd",        "value": "150x730", "domain": ".instagram.com", "path": "/"},
-        ]
-
         for cookie in cookies:
+            if "instagram.com" not in base_url:
+                # Local fixture server: cookies must belong to the current host
+                cookie = {k: v for k, v in cookie.items() if k != "domain"}
             driver.add_cookie(cookie)
 
         driver.refresh()
         time.sleep(5)
-        print("✅ Logged in via hardcoded cookies, no CAPTCHA!")
+        print("✅ Logged in via cookies, no CAPTCHA!")
     except Exception as e:
         print(f"⚠️ Error loading cookies: {e}")
+        return False
+    return True
+
+
+def _recycle_driver(driver, kind, base_url, cookies):
+    # Watchdog recycle: "tab" swaps in a fresh tab, "browser" restarts Chrome and
+    # logs back in with the live session cookies. Returns None if the new
+    # browser cannot be started or logged in (the old one is gone either way).
+    from browser_watchdog import recycle_tab
+
+    if kind == "tab":
+        return recycle_tab(driver)
+    try:
+        cookies = driver.get_cookies() or cookies  # keep any refreshed session tokens
+    except Exception:
+        pass
+    try:
+        driver.quit()
+    except Exception:
+        pass
+    new_driver = None
+    try:
+        new_driver = _build_driver()
+        if _open_session(new_driver, base_url, cookies):
+            return new_driver
+    except Exception as e:
+        print(f"⚠️ Browser restart failed: {e}")
+    if new_driver is not None:
+        try:
+            new_driver.quit()
+        except Exception:
+            pass
+    return None
+
+
+def _reopen_modal(driver, profile_url, post_url, max_scrolls=60):
+    # Re-enters the modal feed at post_url: load the profile grid, scroll until
+    # the post's tile shows up and click it so the "next" button works again.
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from metrics import REGISTRY
+
+    shortcode = post_url.rstrip("/").split("/")[-1]
+    with REGISTRY.timer("page_load_seconds", "driver.get() wall time"):
+        driver.get(profile_url)
+    time.sleep(3)
+    for _ in range(max_scrolls):
+        tiles = driver.find_elements(By.XPATH, f'//main//a[contains(@href, "/{shortcode}/")]')
+        if tiles:
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", tiles[0])
+            time.sleep(1)
+            driver.execute_script("arguments[0].click();", tiles[0])
+            try:
+                WebDriverWait(driver, 10).until(EC.url_contains(shortcode))
+            except TimeoutException:
+                return False
+            time.sleep(2)
+            return True
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(2)
+    return False
+
+
+def _read_post_date(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException
+
+    try:
+        date_element = driver.find_element(By.XPATH, '//time')
+        datetime_str = date_element.get_attribute("datetime")
+        datetime_obj = datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
+        return datetime_obj, datetime_obj.strftime("%Y-%m-%d"), datetime_obj.strftime("%H:%M:%S")
+    except NoSuchElementException:
+        return None, "Unknown", "Unknown"
+
+
+def _load_comments(driver, comments_container, all_comments_data, post_url=None, known_ids=None, known_run=None,
+                   new_ids=None):
+    # Collects visible comments, clicking "load more" until no new ones appear.
+    # With known_ids (refresh mode) stored comments are skipped (the IDs of the
+    # others go to new_ids), and it returns True once `known_run` of them were
+    # seen in a row. One known comment proves nothing: the modal is ordered by
+    # relevance, not time. Repeats of a text are numbered in reading order, so
+    # a third "❤️" on a post that had two stored is new.
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException
+    from metrics import REGISTRY, log
+    from comment_store import OccurrenceCounter
+
+    comments_scraped = REGISTRY.counter("comments_scraped_total", "Comments collected")
+    occurrences = OccurrenceCounter(post_url or "")
+    load_more_clicks = REGISTRY.counter("load_more_clicks_total", "'Load more comments' clicks")
+    known_run = known_run or REFRESH_KNOWN_RUN
+    known_streak = 0
+    prev_count = 0
+    while True:
+        comment_blocks = comments_container.find_elements(By.XPATH, './div[position()>=0]/ul/div/li/div/div/div[2]/div[1]/span')
+        current_count = len(comment_blocks)
+
+        for comment_elem in comment_blocks[prev_count:]:
+            try:
+                comment_text = comment_elem.text.strip()
+            except Exception:
+                continue
+            if known_ids is not None:
+                cid = occurrences.next_id(comment_text)
+                if cid in known_ids:
+                    known_streak += 1
+                    if known_streak >= known_run:
+                        return True
+                    continue
+                known_streak = 0
+                if new_ids is not None:
+                    new_ids.append(cid)
+            all_comments_data.append(comment_text)
+            comments_scraped.inc()
+            log(f"💬 Comment: {comment_text}", verbose=True)
+
+        if current_count == prev_count:
+            break
+        prev_count = current_count
+
+        try:
+            load_more_btn = comments_container.find_element(By.XPATH, './li/div/button')
+            driver.execute_script("arguments[0].click();", load_more_btn)
+            load_more_clicks.inc()
+            time.sleep(2)
+        except NoSuchElementException:
+            break
+    return False
+
+
+def _post_rows(profile_url, post_count, post_url, date_posted, time_posted, likes, all_comments_data):
+    # all_comments_data[0] is the caption; post-level fields go on the first row only
+    from hashtags import split_caption
+    from comment_store import OccurrenceCounter
+
+    rows = []
+    occurrences = OccurrenceCounter(post_url)
+    first_row = True
+    raw_caption = all_comments_data[0] if all_comments_data else ""
+    caption_clean, hashtags_text = split_caption(raw_caption)
+
+    for comment in all_comments_data[1:]:
+        rows.append({
+            "username": profile_url.split("/")[-2],
+            "Post_Number": post_count,
+            "URL": post_url,
+            "Date": date_posted if first_row else "",
+            "Time": time_posted if first_row else "",
+            "Likes": likes if first_row else "",
+            "Caption": caption_clean if first_row else "",
+            "Hashtags": hashtags_text if first_row else "",
+            "Comments": comment,
+            "Comment_ID": occurrences.next_id(comment),
+        })
+        first_row = False
+    return rows
+
+
+def _save_rows(data, output_file):
+    import pandas as pd
+
+    if data:
+        df = pd.DataFrame(data)
+        df.to_csv(output_file, index=False, encoding="utf-8-sig")
+        print(f"\n✅ Data saved to {output_file} (Rows: {len(df)})")
+    else:
+        print("\n⚠️ No data scraped.")
+
+
+def scrape_instagram(profile_url, start_date, end_date, username=None, base_url=None, cookies=None):
+    # pandas / selenium are imported here rather than at module import so that
+    # `python scraper.py --help` and importing helpers stay fast.
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException, TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from metrics import REGISTRY, log
+    from rate_limiter import RateLimitExceeded, detect_throttle, get_limiter
+    from browser_watchdog import BrowserWatchdog
+    from live_sink import get_sink
+
+    base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+
+    # Generate output filename dynamically
+    output_file = output_filename(profile_url, start_date, end_date)
+
+    driver = _build_driver()
+    wait = WebDriverWait(driver, 10)
+
+    cookies = cookies or DEFAULT_COOKIES
+    if not _open_session(driver, base_url, cookies):
         driver.quit()
         return
 
+    # One pacing state per account, shared by every thread using these cookies
+    account = next((c["value"] for c in cookies if c["name"] == "ds_user_id"), "default")
+    limiter = get_limiter(account)
+
     # Navigate to profile
     time.sleep(5)
     # ✅ Normalize profile input
-    if not profile_url.startswith("http"):
-        profile_url = f"https://www.instagram.com/{profile_url.strip().strip('/')}/"
-    driver.get(profile_url)
+    profile_url = _normalize_profile_url(profile_url, base_url)
+    with REGISTRY.timer("page_load_seconds", "driver.get() wall time"):
+        driver.get(profile_url)
     print("✅ Profile page loaded")
     time.sleep(5)
 
+    reason = detect_throttle(driver)
+    if reason:
+        limiter.on_throttle(reason)
+        print(f"⚠️ Session blocked before scraping ({reason}), stopping.")
+        driver.save_screenshot("click_error.png")
+        driver.quit()
+        return
+
     # Click first post      
     first_post_xpath = '/html/body/div[1]/div/div/div[2]/div/div/div[1]/div[2]/div[2]/section/main/div/div/div[2]/div/div/div/div/div[1]/div[1]/a'
     # first_post_xpath = '/html/body/div[1]/div/div/div[2]/div/div/div[1]/div[2]/div[2]/section/main/div/div/div[2]/div/div/div/div/div[1]/div[1]'
@@ -128,163 +368,429 @@ def scrape_instagram(profile_url, start_date, end_date, username=None):
 
     # Scrape posts
     data = []
+    live = get_sink()  # SCRAPER_LIVE_SINK: per-post records for the dashboard's live view
     start_dt = datetime.strptime(start_date, "%Y-%m-%d")
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
 
-    post_count = 0
-    while True:
-        post_count += 1
-        print(f"\n📸 Scraping Post {post_count}")
-        try:
-            post_url = driver.current_url
+    post_seconds = REGISTRY.histogram("post_scrape_seconds", help="Wall time per post, including navigation")
+    post_retries = REGISTRY.counter("post_retries_total", "Posts retried after an exception")
+
+    # Renderer memory grows over hundreds of modals; the watchdog samples it
+    # every few posts and asks for a tab / browser recycle past its thresholds
+    watchdog = BrowserWatchdog(driver, label=profile_url.rstrip("/").split("/")[-1])
 
-            # Date
+    post_count = 0
+    post_started = None
+    post_failures = {}
+    # A retried post keeps its number, and its rows are saved / published once
+    post_numbers = {}
+    saved_urls = set()
+    # The first modal opened from the grid sits under body/div[5], later ones under div[4]
+    first_in_modal = True
+    try:
+        while True:
+            if post_started is not None:
+                post_seconds.observe(time.perf_counter() - post_started)
+            post_started = time.perf_counter()
+            post_url = None
             try:
-                # date_element = driver.find_element(By.XPATH, '//time')
-                date_element = driver.find_element(By.XPATH, '//time')
-                datetime_str = date_element.get_attribute("datetime")
-                datetime_obj = datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
-                date_posted = datetime_obj.strftime("%Y-%m-%d")
-                time_posted = datetime_obj.strftime("%H:%M:%S")
-            except NoSuchElementException:
-                datetime_obj = None
-                date_posted, time_posted = "Unknown", "Unknown"
-
-            if post_count > 3 and datetime_obj and datetime_obj.date() < start_dt.date():
-                print(f"🛑 Post {post_count} is older than start date. Stopping scrape.")
-                break
+                post_url = driver.current_url
+                post_count = post_numbers.setdefault(post_url, len(post_numbers) + 1)
+                print(f"\n📸 Scraping Post {post_count}")
+
+                if watchdog.due(post_count):
+                    kind, why = watchdog.check(post_count, post_url)
+                    if kind:
+                        recycle_started = time.perf_counter()
+                        driver = _recycle_driver(driver, kind, base_url, cookies)
+                        if driver is None or not _reopen_modal(driver, profile_url, post_url):
+                            print(f"🛑 Could not resume at {post_url} after recycling the {kind}, stopping.")
+                            break
+                        watchdog.attach(driver)
+                        wait = WebDriverWait(driver, 10)
+                        first_in_modal = True
+                        watchdog.recorded(kind, why, time.perf_counter() - recycle_started, post_count, post_url)
 
-            # Likes
-            if post_count == 1:
-                try:
-                    # likes = driver.find_element(By.XPATH, '//section[2]/div/div/span/a/span/span').text
-                    likes = driver.find_element(By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/section[2]/div/div/span/div/span').text
-                
-                except NoSuchElementException:
-                    likes = "Hidden"
+                # Date
+                datetime_obj, date_posted, time_posted = _read_post_date(driver)
 
-            else:
-                try:
-                    # likes = driver.find_element(By.XPATH, '//section[2]/div/div/span/a/span/span').text
-                    likes = driver.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/section[2]/div/div/span/div/span').text
-                
-                except NoSuchElementException:
-                    likes = "Hidden"
+                if post_count > 3 and datetime_obj and datetime_obj.date() < start_dt.date():
+                    print(f"🛑 Post {post_count} is older than start date. Stopping scrape.")
+                    break
 
-            # Caption & comments
-            all_comments_data = []
-            if datetime_obj and start_dt.date() <= datetime_obj.date() <= end_dt.date():
-                try:
-                    if post_count == 1:
-                        try:
-                            comments_container = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
-                            )
-                            caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
-                        except Exception:
-                            comments_container = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
-                            )
-                            caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
-                    else:
-                        try:
-                            comments_container = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
-                            )
-                            caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
-                        except Exception:
-                            comments_container = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
-                            )
-                            caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
-
-                    print(f"✅ Comments container found for Post {post_count}")
-                    # Caption
+                # Likes
+                if first_in_modal:
                     try:
-                        # caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
-                        caption_text = caption_elem.text.strip()
-                        all_comments_data.append(caption_text)
-                        print(f"📝 Caption: {caption_text}")
+                        # likes = driver.find_element(By.XPATH, '//section[2]/div/div/span/a/span/span').text
+                        likes = driver.find_element(By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/section[2]/div/div/span/div/span').text
+                
                     except NoSuchElementException:
-                        pass
+                        likes = "Hidden"
 
-                    # Load comments
-                    prev_count = 0
-                    while True:
-                        comment_blocks = comments_container.find_elements(By.XPATH, './div[position()>=0]/ul/div/li/div/div/div[2]/div[1]/span')
-                        current_count = len(comment_blocks)
+                else:
+                    try:
+                        # likes = driver.find_element(By.XPATH, '//section[2]/div/div/span/a/span/span').text
+                        likes = driver.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/section[2]/div/div/span/div/span').text
+                
+                    except NoSuchElementException:
+                        likes = "Hidden"
 
-                        for comment_elem in comment_blocks[prev_count:]:
+                # Caption & comments
+                all_comments_data = []
+                if datetime_obj and start_dt.date() <= datetime_obj.date() <= end_dt.date():
+                    try:
+                        if first_in_modal:
                             try:
-                                comment_text = comment_elem.text.strip()
-                                all_comments_data.append(comment_text)
-                                print(f"💬 Comment: {comment_text}")
+                                comments_container = WebDriverWait(driver, 10).until(
+                                    EC.presence_of_element_located((By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
+                                )
+                                caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
                             except Exception:
-                                continue
-
-                        if current_count == prev_count:
-                            break
-                        prev_count = current_count
+                                comments_container = WebDriverWait(driver, 10).until(
+                                    EC.presence_of_element_located((By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
+                                )
+                                caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
+                        else:
+                            try:
+                                comments_container = WebDriverWait(driver, 10).until(
+                                    EC.presence_of_element_located((By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
+                                )
+                                caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
+                            except Exception:
+                                comments_container = WebDriverWait(driver, 10).until(
+                                    EC.presence_of_element_located((By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[3]/div/div'))
+                                )
+                                caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[5]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
 
+                        print(f"✅ Comments container found for Post {post_count}")
+                        # Caption
                         try:
-                            load_more_btn = comments_container.find_element(By.XPATH, './li/div/button')
-                            driver.execute_script("arguments[0].click();", load_more_btn)
-                            time.sleep(2)
+                            # caption_elem = comments_container.find_element(By.XPATH, '/html/body/div[4]/div[1]/div/div[3]/div/div/div/div/div[2]/div/article/div/div[2]/div/div/div[2]/div[1]/ul/div[1]/li/div/div/div[2]/div[1]/h1')
+                            caption_text = caption_elem.text.strip()
+                            all_comments_data.append(caption_text)
+                            log(f"📝 Caption: {caption_text}", verbose=True)
                         except NoSuchElementException:
+                            pass
+
+                        # Load comments
+                        _load_comments(driver, comments_container, all_comments_data)
+                    except Exception:
+                        print("⚠️ Comments div not found")
+                        reason = detect_throttle(driver)
+                        if reason:
+                            limiter.on_throttle(reason)
+                else:
+                    print(f"⏭ Post {post_count} skipped: date {date_posted} not in range.")
+
+                # Save post data (added hashtag separation here)
+                if post_url not in saved_urls:
+                    rows = _post_rows(profile_url, post_count, post_url, date_posted, time_posted, likes, all_comments_data)
+                    data.extend(rows)
+                    saved_urls.add(post_url)
+                    if live is not None:
+                        live.publish(rows, profile=profile_url.split("/")[-2], post_url=post_url, post_number=post_count)
+
+                # Next post (a missing button is either the end of the feed or a soft block)
+                next_btn = None
+                for _ in range(MAX_POST_RETRIES):
+                    try:
+                        next_btn = wait.until(EC.element_to_be_clickable((By.XPATH, '//div[contains(@class, "_aaqg") and contains(@class, "_aaqh")]//button[contains(@class, "_abl-")]')))
+                        break
+                    except TimeoutException:
+                        reason = detect_throttle(driver)
+                        if not reason:
                             break
-                except Exception:
-                    print("⚠️ Comments div not found")
-            else:
-                print(f"⏭ Post {post_count} skipped: date {date_posted} not in range.")
-
-            # Save post data (added hashtag separation here)
-            first_row = True
-            raw_caption = all_comments_data[0] if all_comments_data else ""
-            if raw_caption:
-                parts = raw_caption.split()
-                hashtags = [p for p in parts if p.startswith("#")]
-                caption_clean = " ".join(p for p in parts if not p.startswith("#"))
-                hashtags_text = ", ".join(hashtags)
-            else:
-                caption_clean = ""
-                hashtags_text = ""
-
-            for comment in all_comments_data[1:]:
-                data.append({
-                    "username": profile_url.split("/")[-2],
-                    "Post_Number": post_count,
-                    "URL": post_url,
-                    "Date": date_posted if first_row else "",
-                    "Time": time_posted if first_row else "",
-                    "Likes": likes if first_row else "",
-                    "Caption": caption_clean if first_row else "",
-                    "Hashtags": hashtags_text if first_row else "",
-                    "Comments": comment,
-                })
-                first_row = False
-
-            # Next post
-            try:
-                next_btn = wait.until(EC.element_to_be_clickable((By.XPATH, '//div[contains(@class, "_aaqg") and contains(@class, "_aaqh")]//button[contains(@class, "_abl-")]')))
+                        limiter.on_throttle(reason)
+                        limiter.wait()
+                        # A reload of /p/<id>/ gives the standalone page, which has no next arrow
+                        if not _reopen_modal(driver, profile_url, post_url):
+                            break
+                        first_in_modal = True
+                if next_btn is None:
+                    print("⚠️ Next button not found, stopping.")
+                    break
+
                 driver.execute_script("arguments[0].click();", next_btn)
-                time.sleep(random.uniform(3, 5))
-            except TimeoutException:
-                print("⚠️ Next button not found, stopping.")
+                first_in_modal = False
+                try:
+                    WebDriverWait(driver, 10).until(EC.url_changes(post_url))
+                except TimeoutException:
+                    pass
+                limiter.on_success()
+                limiter.wait()
+
+            except RateLimitExceeded as e:
+                print(f"🛑 {e}. Stopping.")
                 break
+            except Exception as e:
+                print(f"⚠️ Error scraping post {post_count}: {e}")
+                post_retries.inc()
+                try:
+                    reason = detect_throttle(driver)
+                    failed_url = post_url or driver.current_url
+                except Exception:
+                    # The browser itself is gone (renderer crash, failed restart)
+                    print(f"🛑 Browser unavailable after post {post_count}, stopping.")
+                    break
+                if reason:
+                    limiter.on_throttle(reason)
+                post_failures[failed_url] = post_failures.get(failed_url, 0) + 1
+                if post_failures[failed_url] >= MAX_POST_RETRIES:
+                    print(f"🛑 Post {post_count} failed {MAX_POST_RETRIES} times, stopping.")
+                    break
+                try:
+                    limiter.wait()
+                except RateLimitExceeded as e:
+                    print(f"🛑 {e}. Stopping.")
+                    break
+                continue
+    finally:
+        if post_started is not None:
+            post_seconds.observe(time.perf_counter() - post_started)
+
+        # Save to CSV (also when the loop dies or the browser crashes mid-profile)
+        _save_rows(data, output_file)
+
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    print("\n✅ Scraping completed successfully!")
 
-        except Exception as e:
-            print(f"⚠️ Error scraping post {post_count}: {e}")
-            continue
 
-    # Save to CSV
-    if data:
-        df = pd.DataFrame(data)
-        df.to_csv(output_file, index=False, encoding="utf-8-sig")
-        print(f"\n✅ Data saved to {output_file} (Rows: {len(df)})")
+# ------------------------
+# Fan-out mode: collect post URLs from the grid, then scrape posts in parallel
+# ------------------------
+def _probe_post_date(driver, post_url):
+    # Opens a post in a throwaway tab just to read its date
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    grid_window = driver.current_window_handle
+    driver.switch_to.new_window("tab")
+    try:
+        driver.get(post_url)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//time")))
+        return _read_post_date(driver)[0]
+    except Exception:
+        return None
+    finally:
+        driver.close()
+        driver.switch_to.window(grid_window)
+
+
+def collect_post_urls(driver, profile_url, start_dt, max_posts=300):
+    # Phase one: scroll the profile grid, collecting post URLs in feed order.
+    # The grid carries no dates, so after each scroll the oldest URL so far is
+    # probed and scrolling stops once it is older than start_dt (first 3 may be pinned).
+    from metrics import REGISTRY
+
+    with REGISTRY.timer("page_load_seconds", "driver.get() wall time"):
+        driver.get(profile_url)
+    time.sleep(3)
+
+    urls, seen, stale_rounds = [], set(), 0
+    while len(urls) < max_posts and stale_rounds < 3:
+        hrefs = driver.execute_script(
+            "return Array.from(document.querySelectorAll('main a[href*=\"/p/\"], main a[href*=\"/reel/\"]')).map(a => a.href);"
+        )
+        new = [h for h in hrefs if h not in seen]
+        seen.update(new)
+        urls.extend(new)
+        if not new:
+            stale_rounds += 1
+        else:
+            stale_rounds = 0
+            if len(urls) > 3:
+                oldest = _probe_post_date(driver, urls[-1])
+                if oldest and oldest.date() < start_dt.date():
+                    break
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(2)
+
+    print(f"🔗 Collected {len(urls[:max_posts])} post URLs from the grid")
+    return urls[:max_posts]
+
+
+def _scrape_post_page(driver, post_url, post_number, profile_url, start_dt, end_dt, limiter):
+    # Phase two worker step: open one post directly and return (post datetime, rows)
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException, TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from metrics import REGISTRY, log
+    from rate_limiter import detect_throttle
+
+    limiter.wait()
+    with REGISTRY.timer("page_load_seconds", "driver.get() wall time"):
+        driver.get(post_url)
+    try:
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//time")))
+    except TimeoutException:
+        reason = detect_throttle(driver)
+        if reason:
+            limiter.on_throttle(reason)
+        raise
+
+    datetime_obj, date_posted, time_posted = _read_post_date(driver)
+    try:
+        likes = driver.find_element(By.XPATH, POST_LIKES_XPATH).text
+    except NoSuchElementException:
+        likes = "Hidden"
+
+    all_comments_data = []
+    if datetime_obj and start_dt.date() <= datetime_obj.date() <= end_dt.date():
+        comments_container = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.XPATH, POST_COMMENTS_XPATH))
+        )
+        try:
+            caption_text = driver.find_element(By.XPATH, POST_CAPTION_XPATH).text.strip()
+            all_comments_data.append(caption_text)
+            log(f"📝 Caption: {caption_text}", verbose=True)
+        except NoSuchElementException:
+            all_comments_data.append("")
+        _load_comments(driver, comments_container, all_comments_data)
+        print(f"✅ Post {post_number}: {len(all_comments_data) - 1} comments")
     else:
-        print("\n⚠️ No data scraped.")
+        print(f"⏭ Post {post_number} skipped: date {date_posted} not in range.")
+
+    limiter.on_success()
+    return datetime_obj, _post_rows(profile_url, post_number, post_url, date_posted, time_posted, likes, all_comments_data)
+
+
+def refresh_post_comments(driver, post_url, known_ids, limiter):
+    # Differential refresh: reopen a stored post and collect only comments
+    # whose ID is not stored yet. Pagination stops after REFRESH_KNOWN_RUN
+    # stored comments in a row (see _load_comments). Returns (likes, texts, ids).
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException, TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from metrics import REGISTRY
+    from rate_limiter import detect_throttle
+
+    limiter.wait()
+    with REGISTRY.timer("page_load_seconds", "driver.get() wall time"):
+        driver.get(post_url)
+    try:
+        comments_container = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.XPATH, POST_COMMENTS_XPATH))
+        )
+    except TimeoutException:
+        reason = detect_throttle(driver)
+        if reason:
+            limiter.on_throttle(reason)
+        raise
+    try:
+        likes = driver.find_element(By.XPATH, POST_LIKES_XPATH).text
+    except NoSuchElementException:
+        likes = None
+
+    new_comments = []
+    new_ids = []
+    reached_known = _load_comments(driver, comments_container, new_comments, post_url=post_url, known_ids=known_ids,
+                                   new_ids=new_ids)
+    REGISTRY.counter("refresh_new_comments_total", "New comments found by refresh").inc(len(new_comments))
+    if reached_known:
+        REGISTRY.counter("refresh_early_stops_total", "Refreshes stopped after a run of known comments").inc()
+    limiter.on_success()
+    return likes, new_comments, new_ids
+
+
+def scrape_instagram_fanout(profile_url, start_date, end_date, username=None, base_url=None, cookies=None, workers=None):
+    # Same output as scrape_instagram, but posts are fetched concurrently by
+    # several browser workers (Selenium drivers are single-threaded, so one
+    # browser per worker rather than tabs) and reassembled in feed order.
+    import threading
+    from metrics import REGISTRY
+    from rate_limiter import RateLimitExceeded, get_limiter
+    from live_sink import get_sink
+
+    base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    workers = workers or int(os.environ.get("SCRAPER_WORKERS", "3"))
+    output_file = output_filename(profile_url, start_date, end_date)
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    cookies = cookies or DEFAULT_COOKIES
+    profile_url = _normalize_profile_url(profile_url, base_url)
+    account = next((c["value"] for c in cookies if c["name"] == "ds_user_id"), "default")
+    limiter = get_limiter(account)
 
-    driver.quit()
+    driver = _build_driver()
+    if not _open_session(driver, base_url, cookies):
+        driver.quit()
+        return
+    try:
+        post_urls = collect_post_urls(driver, profile_url, start_dt)
+    except Exception as e:
+        print(f"⚠️ Error collecting post URLs: {e}")
+        driver.save_screenshot("click_error.png")
+        driver.quit()
+        return
+
+    post_seconds = REGISTRY.histogram("post_scrape_seconds", help="Wall time per post, including navigation")
+    post_retries = REGISTRY.counter("post_retries_total", "Posts retried after an exception")
+    results = {}
+    live = get_sink()
+    state = {"next": 0, "stop": len(post_urls)}
+    lock = threading.Lock()
+
+    def run_worker(worker_driver):
+        try:
+            if worker_driver is None:
+                try:
+                    worker_driver = _build_driver()
+                except Exception as e:
+                    print(f"⚠️ Could not start browser worker: {e}")
+                    return
+                if not _open_session(worker_driver, base_url, cookies):
+                    return
+            while True:
+                with lock:
+                    if state["next"] >= state["stop"]:
+                        return
+                    index = state["next"]
+                    state["next"] += 1
+                started = time.perf_counter()
+                for attempt in range(1, MAX_POST_RETRIES + 1):
+                    try:
+                        post_dt, rows = _scrape_post_page(
+                            worker_driver, post_urls[index], index + 1, profile_url, start_dt, end_dt, limiter
+                        )
+                        break
+                    except RateLimitExceeded as e:
+                        print(f"🛑 {e}. Stopping.")
+                        with lock:
+                            state["stop"] = 0
+                        return
+                    except Exception as e:
+                        post_retries.inc()
+                        print(f"⚠️ Error scraping post {index + 1} (attempt {attempt}): {e}")
+                else:
+                    post_dt, rows = None, []
+                post_seconds.observe(time.perf_counter() - started)
+                results[index] = rows
+                if live is not None:
+                    live.publish(rows, profile=profile_url.split("/")[-2], post_url=post_urls[index], post_number=index + 1)
+                # Feed is newest-first: past start_date (ignoring pinned posts) nothing later is in range
+                if index >= 3 and post_dt and post_dt.date() < start_dt.date():
+                    with lock:
+                        state["stop"] = min(state["stop"], index + 1)
+        finally:
+            if worker_driver is not None:
+                worker_driver.quit()
+
+    threads = [threading.Thread(target=run_worker, args=(driver if i == 0 else None,), daemon=True)
+               for i in range(max(1, min(workers, len(post_urls))))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    data = [row for index in sorted(results) for row in results[index]]
+    _save_rows(data, output_file)
     print("\n✅ Scraping completed successfully!")
 
 
@@ -296,10 +802,18 @@ if __name__ == "__main__":
     import sys
     import os
 
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print(USAGE)
+        sys.exit(0)
+
     if len(sys.argv) < 6:
-        print("Usage: python scraper.py <profile_url(s) comma-separated> <start_date> <end_date> <username> <artifact_name>")
+        print(USAGE)
         sys.exit(1)
 
+    import pandas as pd
+    from metrics import REGISTRY
+    from session_pool import SessionPool
+
     profiles_arg = sys.argv[1]
     start_date = sys.argv[2]
     end_date = sys.argv[3]
@@ -314,13 +828,19 @@ if __name__ == "__main__":
 
     combined_df = pd.DataFrame()
 
+    # Each worker leases an account, so parallelism is bounded by the pool size
+    # (IG_ACCOUNTS_FILE / IG_SESSIONS_PER_ACCOUNT) instead of piling onto one session.
+    pool = SessionPool.from_env(DEFAULT_COOKIES)
+
+    # SCRAPER_MODE=fanout: grid URL collection + parallel post workers (SCRAPER_WORKERS)
+    scrape_fn = scrape_instagram_fanout if os.environ.get("SCRAPER_MODE") == "fanout" else scrape_instagram
+
     def scrape_and_return_df(profile):
         try:
-            scrape_instagram(profile, start_date, end_date, username)
-            start_str = datetime.strptime(start_date, "%Y-%m-%d").strftime("%m-%d")
-            end_str = datetime.strptime(end_date, "%Y-%m-%d").strftime("%m-%d")
-            insta_user = profile.strip("/").split("/")[-1]
-            temp_file = f"{start_str}_{end_str}_{insta_user}.csv"
+            with pool.lease() as account:
+                print(f"🔑 {profile}: using account {account.name}")
+                scrape_fn(profile, start_date, end_date, username, cookies=account.cookies)
+            temp_file = output_filename(profile, start_date, end_date)
             if os.path.exists(temp_file):
                 temp_df = pd.read_csv(temp_file, encoding="utf-8-sig")
                 os.remove(temp_file)
@@ -329,7 +849,7 @@ if __name__ == "__main__":
             print(f"⚠️ Error scraping {profile}: {e}")
         return pd.DataFrame()
 
-    max_threads = min(5, len(profiles))
+    max_threads = max(1, min(5, len(profiles), pool.capacity))
     with ThreadPoolExecutor(max_threads) as executor:
         futures = {executor.submit(scrape_and_return_df, profile): profile for profile in profiles}
         for future in as_completed(futures):
@@ -341,9 +861,25 @@ if __name__ == "__main__":
             except Exception as e:
                 print(f"⚠️ Exception for {profile}: {e}")
 
+    # Run summary (JSON + Prometheus text), uploaded separately from the CSV
+    run_seconds = time.time() - REGISTRY.started_at
+    comments_total = REGISTRY.counter("comments_scraped_total").value
+    REGISTRY.gauge("comments_per_second", "Comments scraped per second of run time").set(
+        round(comments_total / run_seconds, 3) if run_seconds else 0.0
+    )
+    REGISTRY.gauge("profiles_total", "Profiles requested").set(len(profiles))
+    REGISTRY.gauge("accounts_total", "Accounts in the session pool").set(len(pool))
+    REGISTRY.to_json(f"{artifact_name}_metrics.json")
+    REGISTRY.to_prometheus(f"{artifact_name}_metrics.prom")
+
     # Save combined CSV
     if not combined_df.empty:
         combined_df.to_csv(f"{artifact_name}.csv", index=False, encoding="utf-8-sig")
         print(f"\n✅ All profiles data combined and saved to {artifact_name}.csv (Rows: {len(combined_df)})")
     else:
         print("⚠️ No data scraped from any profile.")
+
+    from live_sink import get_sink
+    live = get_sink()
+    if live is not None:
+        live.close()
@@ -0,0 +1,144 @@
+# search_index.py
+# Full-text search over comments and captions (SQLite FTS5). Text is folded with
+# the EnhancedTeluguPreprocessor spelling rules, so "chaala baagundi" and
+# "chala bagundi" hit the same documents.
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from metrics import REGISTRY
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+
+_QUERY_TERMS = re.compile(r'"([^"]+)"|(\S+)')
+_LONG_REPEATS = re.compile(r"(.)\1{2,}")
+# Keeps Indic combining marks (\w alone splits Telugu words into consonants),
+# so the tokenizer's M* category actually sees them
+_NON_WORD = re.compile(r"[^\w\s\u0900-\u0DFF\u200C\u200D]", re.UNICODE)
+
+
+class SearchNormalizer:
+    # One combined regex for all transliteration variants instead of one re.sub per rule
+    def __init__(self, rules=None):
+        from sentiment_model import EnhancedTeluguPreprocessor, rules_dict
+
+        preprocessor = EnhancedTeluguPreprocessor(rules or rules_dict)
+        mapping = dict(preprocessor.rules.get("standard_spellings", {}))
+        mapping.update(preprocessor.translit_variants)
+        self.mapping = {k.lower(): v for k, v in mapping.items() if k.lower() != v}
+        keys = sorted(self.mapping, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(map(re.escape, keys)) + r")\b") if keys else None
+
+    def __call__(self, text):
+        if not isinstance(text, str):
+            return ""
+        text = _NON_WORD.sub(" ", text.lower())
+        text = _LONG_REPEATS.sub(r"\1", text)  # "superrrr" -> "super"
+        if self.pattern is not None:
+            text = self.pattern.sub(lambda m: self.mapping[m.group(1)], text)
+        return text
+
+
+class CommentSearchIndex:
+    def __init__(self, path=":memory:", normalizer=None):
+        self.normalizer = normalizer or SearchNormalizer()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5("
+            "body, kind UNINDEXED, username UNINDEXED, date UNINDEXED, sentiment UNINDEXED, "
+            f'tokenize="{FTS_TOKENIZER}")'
+        )
+        self.size = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs):
+        index = cls(**kwargs)
+        index.add_frame(df)
+        return index
+
+    def close(self):
+        self._conn.close()
+
+    def add_frame(self, df: pd.DataFrame):
+        # rowid = positional row of df, so hits map straight back with iloc.
+        # Post fields sit on the first row of each post; spread date to every comment.
+        started = time.perf_counter()
+        frame = df.reset_index(drop=True)
+        if "URL" in frame.columns and "Date" in frame.columns:
+            dates = pd.to_datetime(frame["Date"].replace("", pd.NA), errors="coerce")
+            dates = dates.groupby(frame["URL"]).transform("first")
+        else:
+            dates = pd.Series(pd.NaT, index=frame.index)
+        dates = dates.dt.strftime("%Y-%m-%d").where(dates.notna(), None)
+        usernames = frame["username"] if "username" in frame.columns else pd.Series(None, index=frame.index)
+        if "Sentiment_label" in frame.columns:
+            labels = frame["Sentiment_label"]
+            sentiments = labels.astype(str).str.strip().str.title().where(labels.notna(), None)
+        else:
+            sentiments = pd.Series(None, index=frame.index)
+
+        rows = []
+        for kind, column in (("comment", "Comments"), ("caption", "Caption")):
+            if column not in frame.columns:
+                continue
+            texts = frame[column]
+            present = texts.notna() & (texts.astype(str).str.strip() != "")
+            for pos in present[present].index:
+                rows.append((
+                    int(pos) * 2 + (kind == "caption"),  # comment and caption of one row get distinct rowids
+                    self.normalizer(texts[pos]), kind, usernames[pos], dates[pos],
+                    sentiments[pos] if kind == "comment" else None,
+                ))
+        with self._conn:
+            self._conn.executemany("INSERT INTO docs(rowid, body, kind, username, date, sentiment) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self.size += len(rows)
+        REGISTRY.histogram("search_index_build_seconds", help="Time to index a frame").observe(time.perf_counter() - started)
+        return len(rows)
+
+    def _match_expression(self, query):
+        # Quoted text is a phrase, bare words are ANDed; every term is quoted for FTS5
+        terms = []
+        for phrase, word in _QUERY_TERMS.findall(query):
+            normalized = self.normalizer(phrase or word).strip()
+            if normalized:
+                terms.append('"' + normalized.replace('"', "") + '"')
+        return " AND ".join(terms)
+
+    def search(self, query, usernames=None, start_date=None, end_date=None, sentiments=None,
+               kinds=("comment", "caption"), limit=200):
+        # Returns (row positions into the indexed frame, kinds), best match first
+        match = self._match_expression(query)
+        if not match:
+            return []
+        sql = "SELECT rowid, kind FROM docs WHERE docs MATCH ?"
+        params = [match]
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        if usernames:
+            sql += f" AND username IN ({','.join('?' * len(usernames))})"
+            params.extend(usernames)
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(str(start_date))
+        if end_date:
+            sql += " AND date <= ?"
+            params.append(str(end_date))
+        if sentiments:
+            sql += f" AND sentiment IN ({','.join('?' * len(sentiments))})"
+            params.extend(s.title() for s in sentiments)
+        sql += " ORDER BY bm25(docs) LIMIT ?"
+        params.append(int(limit))
+        with REGISTRY.timer("search_query_seconds", "Full-text search query time"):
+            hits = self._conn.execute(sql, params).fetchall()
+        return [(rowid // 2, kind) for rowid, kind in hits]
+
+    def search_frame(self, df: pd.DataFrame, query, **filters):
+        # Matching rows of the indexed frame with a Match column (comment / caption)
+        hits = self.search(query, **filters)
+        if not hits:
+            return df.iloc[0:0].assign(Match=pd.Series(dtype=str))
+        positions, kinds = zip(*hits)
+        return df.iloc[list(positions)].assign(Match=list(kinds))
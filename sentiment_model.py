@@ -1,11 +1,29 @@
 # sentiment_model.py
-import torch
-import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+# torch / transformers / emoji are imported lazily on first use so that
+# importing this module (e.g. from app.py) stays cheap.
+import os
 import re
-import emoji
+import threading
+import time
 import pandas as pd
-from tqdm import tqdm
+import profiling
+from metrics import REGISTRY, SIZE_BUCKETS
+
+DEFAULT_MODEL_NAME = "DSL-13-SRMAP/MuRIL_WR"
+TRUNCATION_STRATEGIES = ("head", "head_tail", "window")
+SENTIMENT_TIERS = ("full", "student", "cascade")
+
+TELUGU_PATTERN = re.compile(r"[\u0C00-\u0C7F]")
+# Column-wide text passes join all rows with this separator and run each regex once
+_ROW_SEP = "\x1f"
+
+
+def _join_rows(texts):
+    # None when a comment contains the separator itself (caller falls back to per-row)
+    blob = _ROW_SEP.join(texts)
+    if blob.count(_ROW_SEP) != max(len(texts) - 1, 0):
+        return None
+    return blob
 
 # Paste your rules_dict and EnhancedTeluguPreprocessor here (same as your code)
 # ...
@@ -112,88 +130,359 @@ class EnhancedTeluguPreprocessor:
         self.boosters = {word: word for word in self.rules.get("booster_words", [])}
         self.translit_variants = self.rules.get("translit_variants", {})
         self.punctuation_pattern = re.compile(r"[^\w\s]", re.UNICODE)
+        # One alternation per rule table (applied in this order) instead of one re.sub per key
+        self._rule_passes = [
+            rules for rules in map(self._compile_rules, (self.translit_variants, self.negations, self.boosters)) if rules
+        ]
+        import emoji
+        self._emoji = emoji
+        self._emoji_polarity = None
 
-    def _apply_rules(self, text, mapping):
-        for key, val in mapping.items():
-            text = re.sub(rf"\b{re.escape(key)}\b", val, text, flags=re.IGNORECASE)
+    def _compile_rules(self, mapping):
+        mapping = {key.lower(): val for key, val in mapping.items() if key.lower() != val}
+        if not mapping:
+            return None
+        keys = sorted(mapping, key=len, reverse=True)
+        return re.compile(r"\b(?:" + "|".join(map(re.escape, keys)) + r")\b", re.IGNORECASE), mapping
+
+    def _apply_rules(self, text):
+        for pattern, mapping in self._rule_passes:
+            text = pattern.sub(lambda m: mapping[m.group(0).lower()], text)
         return text
 
-    def _normalize_emoji(self, text):
-        for char in text:
-            if char in emoji.EMOJI_DATA:
-                desc = emoji.demojize(char)
+    def _polarity_table(self):
+        # demojize() once per emoji character instead of once per occurrence
+        if self._emoji_polarity is None:
+            table = {}
+            for char in self._emoji.EMOJI_DATA:
+                if len(char) != 1:
+                    continue
+                desc = self._emoji.demojize(char)
                 if any(pos in desc for pos in ["smile", "joy", "heart", "thumbsup", "clap", "tada", "pray"]):
-                    text += " positive"
+                    table[char] = " positive"
                 elif any(neg in desc for neg in ["angry", "sad", "thumbsdown", "cry", "frown", "rage"]):
-                    text += " negative"
-        return text
+                    table[char] = " negative"
+            self._polarity_pattern = re.compile("[" + "".join(map(re.escape, table)) + "]" if table else "(?!)")
+            self._emoji_polarity = table
+        return self._emoji_polarity
+
+    def _normalize_emoji(self, text):
+        table = self._polarity_table()
+        return text + "".join(table[char] for char in self._polarity_pattern.findall(text))
 
     def preprocess(self, text):
         if not isinstance(text, str):
             return ""
         text = text.strip().lower()
-        text = self._apply_rules(text, self.translit_variants)
-        text = self._apply_rules(text, self.negations)
-        text = self._apply_rules(text, self.boosters)
+        text = self._apply_rules(text)
         text = self._normalize_emoji(text)
         text = self.punctuation_pattern.sub("", text)
         return text
 
+    def preprocess_many(self, texts):
+        # preprocess() over a whole column: every pass is one regex call on the joined rows
+        texts = [t.strip().lower() if isinstance(t, str) else "" for t in texts]
+        blob = _join_rows(texts)
+        if blob is None:
+            return [self.preprocess(t) for t in texts]
+        blob = self._apply_rules(blob)
+        self._polarity_table()
+        if self._polarity_pattern.search(blob):
+            blob = _ROW_SEP.join(self._normalize_emoji(t) for t in blob.split(_ROW_SEP))
+        blob = self.punctuation_pattern.sub("", blob)
+        return blob.split(_ROW_SEP) if texts else []
+
 # ------------------------
 # Sentiment Model Wrapper
 # ------------------------
+def probs_to_results(probs, labels):
+    # [(label, confidence %), ...] from a (n, n_labels) probability array
+    idx = probs.argmax(axis=1)
+    return [(labels[i], float(probs[row, i] * 100)) for row, i in enumerate(idx)]
+
+
 class MuRILSentiment:
-    def __init__(self, model_name="DSL-13-SRMAP/MuRIL_WR", rules_dict=rules_dict):
+    # max_length caps tokens per forward pass (attention cost grows with the
+    # square of it). Longer comments are cut by `truncation`:
+    #   "head"      - keep the first tokens (tokenizer default)
+    #   "head_tail" - keep the first quarter and the last three quarters of the budget
+    #   "window"    - score overlapping windows and average their logits
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, rules_dict=rules_dict, max_length=None,
+                 truncation=None, batch_size=32):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        self._torch = torch
+        load_started = time.perf_counter()
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(self.device)
         self.preprocessor = EnhancedTeluguPreprocessor(rules_dict)
         self.labels = ["negative", "neutral", "positive"]
+        model_limit = min(self.tokenizer.model_max_length, 512)
+        self.max_length = min(int(max_length or os.environ.get("SENTIMENT_MAX_LENGTH", model_limit)), model_limit)
+        self.truncation = truncation or os.environ.get("SENTIMENT_TRUNCATION", "head_tail")
+        if self.truncation not in TRUNCATION_STRATEGIES:
+            raise ValueError(f"truncation must be one of {TRUNCATION_STRATEGIES}")
+        self.batch_size = batch_size
+        self._truncated = REGISTRY.counter("comments_truncated_total", "Comments longer than max_length")
+        REGISTRY.gauge("model_load_seconds", "Tokenizer + model load time").set(round(time.perf_counter() - load_started, 3))
+        REGISTRY.gauge("model_max_length", "Token budget per forward pass").set(self.max_length)
 
     def _contains_telugu(self, text):
-        return bool(re.search(r'[\u0C00-\u0C7F]', text))
+        return bool(TELUGU_PATTERN.search(text))
+
+    def _prepare(self, text):
+        return self.prepare_many([text])[0][0]
+
+    def prepare_many(self, texts):
+        # Script routing for a whole batch: native Telugu rows are only stripped,
+        # romanized rows go through the preprocessor together. Returns (texts, is_native).
+        texts = pd.Series(texts, dtype=object).fillna("").astype(str)
+        native = texts.str.contains(TELUGU_PATTERN)
+        prepared = texts.str.strip()
+        if not native.all():
+            prepared[~native] = self.preprocessor.preprocess_many(texts[~native].tolist())
+        REGISTRY.counter("comments_native_script_total", "Comments routed as native Telugu script").inc(int(native.sum()))
+        return prepared.tolist(), native.tolist()
+
+    def _windows(self, ids):
+        # Splits one comment's token ids into the pieces that are actually scored
+        budget = self.max_length - self.tokenizer.num_special_tokens_to_add()
+        if len(ids) <= budget:
+            return [ids]
+        self._truncated.inc()
+        if self.truncation == "head":
+            return [ids[:budget]]
+        if self.truncation == "head_tail":
+            head = budget // 4
+            return [ids[:head] + ids[len(ids) - (budget - head):]]
+        stride = max(1, budget // 2)
+        starts = range(0, len(ids) - budget + stride, stride)
+        return [ids[i:i + budget] for i in starts]
+
+    def predict_proba(self, texts):
+        # (len(texts), 3) class probabilities in self.labels order
+        token_lengths = REGISTRY.histogram("comment_tokens", buckets=SIZE_BUCKETS, help="Tokens per comment before truncation")
+        batch_sizes = REGISTRY.histogram("batch_size", buckets=SIZE_BUCKETS, help="Texts per forward pass")
+
+        with profiling.stage("preprocess"):
+            prepared, native = self.prepare_many(texts)
+        with REGISTRY.timer("tokenize_seconds", "Tokenizer wall time per batch"), profiling.stage("tokenize"):
+            encoded = self.tokenizer(prepared, add_special_tokens=False)["input_ids"]
+        pieces, owners = [], []
+        for owner, ids in enumerate(encoded):
+            token_lengths.observe(len(ids))
+            for window in self._windows(ids):
+                pieces.append(self.tokenizer.build_inputs_with_special_tokens(window))
+                owners.append(owner)
+
+        # Scripts are batched apart (Telugu script runs to many more tokens), and
+        # similar lengths in one batch keep padding (and wasted attention) small
+        order = sorted(range(len(pieces)), key=lambda i: len(pieces[i]))
+        chunks = []
+        for script in (False, True):
+            group = [i for i in order if native[owners[i]] == script]
+            chunks.extend(group[start:start + self.batch_size] for start in range(0, len(group), self.batch_size))
+        logits_sum = self._torch.zeros(len(texts), len(self.labels))
+        window_counts = self._torch.zeros(len(texts), 1)
+        for chunk in chunks:
+            inputs = self.tokenizer.pad({"input_ids": [pieces[i] for i in chunk]}, return_tensors="pt").to(self.device)
+            batch_sizes.observe(len(chunk))
+            with REGISTRY.timer("forward_seconds", "Model forward-pass wall time per batch"), profiling.stage("forward"), \
+                    self._torch.no_grad():
+                logits = self.model(**inputs).logits.float().cpu()
+            index = self._torch.tensor([owners[i] for i in chunk])
+            logits_sum.index_add_(0, index, logits)
+            window_counts.index_add_(0, index, self._torch.ones(len(chunk), 1))
+
+        return self._torch.softmax(logits_sum / window_counts.clamp(min=1), dim=-1).numpy()
+
+    def predict_batch(self, texts):
+        return probs_to_results(self.predict_proba(texts), self.labels)
 
     def predict(self, text):
-        if self._contains_telugu(text):
-            processed_text = text.strip()
-        else:
-            processed_text = self.preprocessor.preprocess(text)
-        inputs = self.tokenizer(processed_text, return_tensors="pt", truncation=True, padding=True).to(self.device)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            logits = outputs.logits
-        probs = F.softmax(logits, dim=-1).squeeze().cpu().numpy()
-        pred_idx = probs.argmax()
-        sentiment = self.labels[pred_idx]
-        confidence = probs[pred_idx] * 100
-        return sentiment, confidence
+        return self.predict_batch([text])[0]
+
+# ------------------------
+# Shared Model Cache + Warm-up
+# ------------------------
+_MODEL_CACHE = {}
+_MODEL_LOCK = threading.Lock()
+
+
+def get_model(model_name=DEFAULT_MODEL_NAME, rules_dict=rules_dict):
+    # One MuRILSentiment per model name per process; loading takes seconds.
+    with _MODEL_LOCK:
+        model = _MODEL_CACHE.get(model_name)
+        if model is None:
+            model = MuRILSentiment(model_name=model_name, rules_dict=rules_dict)
+            _MODEL_CACHE[model_name] = model
+    return model
+
+
+def warm_up(model_name=DEFAULT_MODEL_NAME):
+    # Preload in the background (e.g. while the user fills the form) whatever
+    # get_scorer() will use for SENTIMENT_TIER: only the student for "student",
+    # and no local MuRIL when SENTIMENT_SERVER_URL points at inference_server.py
+    def _load():
+        try:
+            get_scorer(model_name=model_name)
+        except Exception as e:
+            print(f"⚠️ Sentiment model warm-up failed: {e}")
+
+    thread = threading.Thread(target=_load, name="sentiment-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# ------------------------
+# Inference Server Client
+# ------------------------
+class RemoteSentiment:
+    # Same predict_batch() contract as MuRILSentiment, served by inference_server.py.
+    # Texts go out in small requests, several in flight, so the server can
+    # coalesce them with other sessions' requests.
+    def __init__(self, url, chunk_size=64, in_flight=4, timeout=120, max_retries=8):
+        import requests
+        self.url = url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.in_flight = in_flight
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._session = requests.Session()
+
+    def _post(self, texts):
+        for attempt in range(self.max_retries):
+            r = self._session.post(f"{self.url}/predict", json={"texts": texts}, timeout=self.timeout)
+            if r.status_code == 503:
+                # Server is shedding load; back off and retry
+                REGISTRY.counter("server_backpressure_retries_total", "Requests retried after 503").inc()
+                time.sleep(float(r.headers.get("Retry-After", 1)) * (1 + attempt))
+                continue
+            r.raise_for_status()
+            return [tuple(item) for item in r.json()["results"]]
+        raise RuntimeError(f"Sentiment server at {self.url} stayed overloaded")
+
+    def predict_batch(self, texts):
+        from concurrent.futures import ThreadPoolExecutor
+
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        with ThreadPoolExecutor(max_workers=self.in_flight) as pool:
+            return [result for chunk in pool.map(self._post, chunks) for result in chunk]
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+
+_STUDENT_CACHE = {}
+
+
+def get_student(path=None):
+    from distill import DEFAULT_STUDENT_PATH, CharNgramStudent
+    path = path or os.environ.get("SENTIMENT_STUDENT_PATH", DEFAULT_STUDENT_PATH)
+    with _MODEL_LOCK:
+        if path not in _STUDENT_CACHE:
+            _STUDENT_CACHE[path] = CharNgramStudent.load(path)
+        return _STUDENT_CACHE[path]
+
+
+def get_scorer(server_url=None, tier=None, model_name=DEFAULT_MODEL_NAME):
+    # Tiers (SENTIMENT_TIER): "full" MuRIL, "student" distilled model only, or
+    # "cascade" = student first, low-confidence comments re-scored by MuRIL.
+    # The full model is the inference server when SENTIMENT_SERVER_URL is set.
+    tier = tier or os.environ.get("SENTIMENT_TIER", "full")
+    if tier not in SENTIMENT_TIERS:
+        raise ValueError(f"tier must be one of {SENTIMENT_TIERS}")
+    if tier == "student":
+        return get_student()
+
+    server_url = server_url or os.environ.get("SENTIMENT_SERVER_URL")
+    full = RemoteSentiment(server_url) if server_url else get_model(model_name, rules_dict)
+    if tier == "cascade":
+        from distill import CascadeSentiment
+        threshold = float(os.environ.get("SENTIMENT_CASCADE_THRESHOLD", "0.8"))
+        return CascadeSentiment(get_student(), full, threshold)
+    return full
 
 # ------------------------
 # Emoji Removal Function
 # ------------------------
+_EMOJI_PATTERN = None
+
+
+def emoji_pattern():
+    # Runs of emoji code points (ZWJ sequences, variation selectors, keycaps) as one
+    # character-class regex; ZWJ / VS16 alone are kept since Telugu text uses ZWJ
+    global _EMOJI_PATTERN
+    if _EMOJI_PATTERN is None:
+        import emoji
+        joiners = {"\u200d", "\ufe0f", "\u20e3"}
+        chars = {c for key in emoji.EMOJI_DATA for c in key if ord(c) > 127} - joiners
+        cls = "[" + "".join(map(re.escape, sorted(chars))) + "]"
+        token = rf"(?:[0-9#*]\ufe0f?\u20e3|{cls}\ufe0f?(?:\u200d{cls}\ufe0f?)*)"
+        _EMOJI_PATTERN = re.compile(f"(?:{token})+")
+    return _EMOJI_PATTERN
+
+
 def remove_emojis(text):
     if not isinstance(text, str):
         return text
-    return emoji.replace_emoji(text, replace='')
+    return emoji_pattern().sub("", text)
+
+
+def strip_emojis(comments: pd.Series) -> pd.Series:
+    # Whole-column remove_emojis + strip: one regex pass over the joined rows
+    texts = comments.fillna("").astype(str).tolist()
+    pattern = emoji_pattern()
+    blob = _join_rows(texts)
+    if blob is None:
+        cleaned = [pattern.sub("", t) for t in texts]
+    else:
+        cleaned = pattern.sub("", blob).split(_ROW_SEP) if texts else []
+    return pd.Series(cleaned, index=comments.index, dtype=object).str.strip()
 
 # ------------------------
 # Sentiment Analysis on DataFrame
 # ------------------------
-def analyze_comments(df: pd.DataFrame, column="Comments") -> pd.DataFrame:
+def analyze_comments(df: pd.DataFrame, column="Comments", dedup=False, server_url=None, tier=None) -> pd.DataFrame:
     # Keep a copy of the original comments
     original_comments = df[column].copy()
 
     # Preprocess a temporary version for analysis
-    temp_comments = df[column].fillna("").astype(str).apply(remove_emojis).str.strip()
+    with profiling.stage("clean"):
+        temp_comments = strip_emojis(df[column])
+
+    # Near-duplicate clusters are scored once, via their first member
+    clusters = None
+    to_score = temp_comments
+    if dedup:
+        from dedup import cluster_near_duplicates
+        with profiling.stage("dedup"):
+            clusters = cluster_near_duplicates(original_comments.tolist())
+        representatives = pd.unique(clusters)
+        to_score = temp_comments.iloc[representatives]
+        REGISTRY.counter("comments_deduplicated_total", "Comments skipped as near-duplicates").inc(
+            len(temp_comments) - len(representatives)
+        )
 
-    # Run sentiment model
-    model = MuRILSentiment(model_name="DSL-13-SRMAP/MuRIL_WR", rules_dict=rules_dict)
-    sentiments, confidences = [], []
+    # Run sentiment model (tier + inference server from the environment unless given)
+    model = get_scorer(server_url, tier)
+    started = time.perf_counter()
+    with profiling.stage("score"), profiling.torch_profile():
+        results = model.predict_batch(to_score.tolist())
+    sentiments = [label for label, _ in results]
+    confidences = [confidence for _, confidence in results]
+    REGISTRY.counter("comments_analyzed_total", "Comments scored").inc(len(results))
+    elapsed = time.perf_counter() - started
+    REGISTRY.histogram("analyze_seconds", help="analyze_comments() scoring wall time").observe(elapsed)
+    REGISTRY.gauge("analyze_comments_per_second", "Comments scored per second (last call)").set(
+        round(len(to_score) / elapsed, 3) if elapsed else 0.0
+    )
 
-    for text in tqdm(temp_comments, desc="Analyzing Sentiments", disable=True):
-        sentiment, confidence = model.predict(text)
-        sentiments.append(sentiment)
-        confidences.append(confidence)
+    if clusters is not None:
+        # Broadcast each representative's result to every member of its cluster
+        slot = {int(pos): i for i, pos in enumerate(representatives)}
+        sentiments = [sentiments[slot[int(c)]] for c in clusters]
+        confidences = [confidences[slot[int(c)]] for c in clusters]
 
     # Add sentiment results to the dataframe
     df['Sentiment_label'] = sentiments
@@ -204,4 +493,9 @@ def analyze_comments(df: pd.DataFrame, column="Comments") -> pd.DataFrame:
     # Restore original comments column
     df[column] = original_comments
 
+    if clusters is not None:
+        # One stored row per cluster and post, weighted by Cluster_size
+        from dedup import collapse_near_duplicates
+        df = collapse_near_duplicates(df, clusters)
+
     return df
@@ -0,0 +1,199 @@
+# session_pool.py
+# Pool of Instagram accounts (cookie sets) leased to scraper workers, with
+# per-account health: last use, failures and cooldown after throttling.
+#
+# Accounts live in a Fernet-encrypted JSON file:
+#   [{"name": "acct1", "cookies": [{"name": "sessionid", "value": "...", ...}, ...]}, ...]
+#
+#   python session_pool.py keygen                          # prints a new key
+#   python session_pool.py encrypt accounts.json accounts.enc
+# then set IG_ACCOUNTS_FILE=accounts.enc and IG_ACCOUNTS_KEY=<key>.
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import REGISTRY
+from rate_limiter import get_limiter
+
+ACCOUNTS_FILE_ENV = "IG_ACCOUNTS_FILE"
+ACCOUNTS_KEY_ENV = "IG_ACCOUNTS_KEY"
+# Set per runner by dispatch.py so parallel shards never share an account
+ACCOUNT_INDEX_ENV = "IG_ACCOUNT_INDEX"
+ACCOUNT_STRIDE_ENV = "IG_ACCOUNT_STRIDE"
+
+
+def _fernet(key):
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise RuntimeError("The 'cryptography' package is required for encrypted account files.")
+    return Fernet(key.encode() if isinstance(key, str) else key)
+
+
+def load_accounts(path, key):
+    with open(path, "rb") as f:
+        raw = _fernet(key).decrypt(f.read())
+    entries = json.loads(raw.decode("utf-8"))
+    if isinstance(entries, dict):
+        entries = [{"name": name, "cookies": cookies} for name, cookies in entries.items()]
+    return [Account(e["name"], e["cookies"]) for e in entries]
+
+
+def encrypt_accounts(json_path, out_path, key):
+    with open(json_path, "rb") as f:
+        token = _fernet(key).encrypt(f.read())
+    with open(out_path, "wb") as f:
+        f.write(token)
+
+
+def shard_accounts(accounts, index, stride, per_account):
+    # Disjoint slice of the pool for shard `index` of `stride`. With more shards
+    # than accounts (only allowed up to accounts x per_account) each runner gets
+    # one account and a single session on it, since the runners sharing it
+    # cannot see each other's leases.
+    if stride <= len(accounts):
+        return accounts[index::stride], per_account
+    return [accounts[index % len(accounts)]], 1
+
+
+class Account:
+    def __init__(self, name, cookies):
+        self.name = name
+        self.cookies = cookies
+        self.in_use = 0
+        self.last_used = 0.0
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def user_id(self):
+        return next((c["value"] for c in self.cookies if c["name"] == "ds_user_id"), self.name)
+
+    def available(self, now, per_account):
+        return self.in_use < per_account and now >= self.cooldown_until
+
+    def health(self):
+        return {
+            "name": self.name,
+            "in_use": self.in_use,
+            "last_used": self.last_used,
+            "failures": self.failures,
+            "cooldown_s": max(0.0, round(self.cooldown_until - time.time(), 1)),
+        }
+
+
+class SessionPool:
+    def __init__(self, accounts, per_account=1, base_cooldown=300.0, max_cooldown=6 * 3600.0):
+        if not accounts:
+            raise ValueError("SessionPool needs at least one account")
+        self.accounts = list(accounts)
+        self.per_account = per_account
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._cond = threading.Condition()
+        self._leases = REGISTRY.counter("account_leases_total", "Accounts leased to workers")
+        self._lease_wait = REGISTRY.histogram("account_lease_wait_seconds", help="Time waiting for a free account")
+
+    @classmethod
+    def from_env(cls, default_cookies):
+        # Encrypted pool when configured, otherwise the single built-in cookie set
+        path = os.environ.get(ACCOUNTS_FILE_ENV)
+        key = os.environ.get(ACCOUNTS_KEY_ENV)
+        per_account = int(os.environ.get("IG_SESSIONS_PER_ACCOUNT", "1"))
+        if path and key and os.path.exists(path):
+            accounts = load_accounts(path, key)
+            print(f"🔐 Loaded {len(accounts)} accounts from {path}")
+        else:
+            accounts = [Account("default", default_cookies)]
+        index = os.environ.get(ACCOUNT_INDEX_ENV, "")
+        if index:
+            stride = int(os.environ.get(ACCOUNT_STRIDE_ENV) or "1")
+            accounts, per_account = shard_accounts(accounts, int(index), stride, per_account)
+            print(f"🔑 Shard {index}/{stride}: accounts {', '.join(a.name for a in accounts)}")
+        return cls(accounts, per_account=per_account)
+
+    def __len__(self):
+        return len(self.accounts)
+
+    @property
+    def capacity(self):
+        return len(self.accounts) * self.per_account
+
+    def _pick(self, now):
+        # Least recently used healthy account
+        candidates = [a for a in self.accounts if a.available(now, self.per_account)]
+        return min(candidates, key=lambda a: (a.in_use, a.last_used), default=None)
+
+    def acquire(self, timeout=None):
+        started = time.time()
+        with self._cond:
+            while True:
+                now = time.time()
+                account = self._pick(now)
+                if account is not None:
+                    account.in_use += 1
+                    account.last_used = now
+                    self._leases.inc()
+                    self._lease_wait.observe(now - started)
+                    return account
+                remaining = None if timeout is None else timeout - (now - started)
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No healthy account available")
+                # Wake up when a lease is released or the earliest cooldown ends
+                next_ready = min((a.cooldown_until for a in self.accounts if a.cooldown_until > now), default=None)
+                wait_for = None if next_ready is None else next_ready - now
+                if remaining is not None:
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                self._cond.wait(wait_for)
+
+    def release(self, account, ok=True):
+        with self._cond:
+            account.in_use -= 1
+            if ok:
+                account.failures = 0
+            else:
+                account.failures += 1
+                cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (account.failures - 1))
+                account.cooldown_until = time.time() + cooldown
+                print(f"🧊 Account {account.name} cooling down for {cooldown:.0f}s (failures: {account.failures})")
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        account = self.acquire(timeout)
+        limiter = get_limiter(account.user_id)
+        throttles_before = limiter.throttle_count
+        ok = True
+        try:
+            yield account
+        except Exception:
+            ok = False
+            raise
+        finally:
+            # Any throttling signal seen while this account was leased counts as a failure
+            if limiter.throttle_count > throttles_before:
+                ok = False
+            self.release(account, ok)
+
+    def health(self):
+        with self._cond:
+            return [a.health() for a in self.accounts]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "keygen":
+        from cryptography.fernet import Fernet
+        print(Fernet.generate_key().decode())
+    elif len(sys.argv) == 4 and sys.argv[1] == "encrypt":
+        key = os.environ.get(ACCOUNTS_KEY_ENV)
+        if not key:
+            print(f"⚠️ Set {ACCOUNTS_KEY_ENV} first (python session_pool.py keygen).")
+            sys.exit(1)
+        encrypt_accounts(sys.argv[2], sys.argv[3], key)
+        print(f"✅ Encrypted accounts written to {sys.argv[3]}")
+    else:
+        print("Usage: python session_pool.py keygen | encrypt <accounts.json> <accounts.enc>")
+        sys.exit(1)